@@ -1,54 +1,54 @@
 import os
+import json
 from langchain.agents import Tool, initialize_agent, AgentType
 from langchain.chat_models import ChatOpenAI
 
 # Import our tool functions
-from agent_tools import plan_tool, generate_tool, run_tool, feedback_tool
+from agent_tools import service, plan_tool, generate_tool, run_tool, feedback_tool
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 1) New function: safe_run_tests
 #    This function runs the tests once, checks if they failed, and if so:
-#    - gives feedback (the captured output),
-#    - regenerates tests, and
-#    - runs tests again (only once).
+#    - sends only the failing tests' source and traces to the LLM,
+#    - patches just those functions in place,
+#    - reruns only the failing tests offline from the first run's recorded
+#      responses, then the full suite once more against the live API.
 # ─────────────────────────────────────────────────────────────────────────────
+def format_run(result: dict) -> str:
+    return json.dumps(result, indent=2)
+
+
 def safe_run_tests(input_text: str) -> str:
     """
-    Runs the tests once using run_tool. If there's a failure, it attempts
-    one reflection pass by calling the feedback_tool and generate_tool, then
-    runs again. This only happens once to avoid infinite loops.
+    Runs the tests once. If there's a failure, it attempts one targeted
+    reflection pass on the failing test IDs only, reruns those tests, and
+    finishes with a full run. This only happens once to avoid infinite loops.
     """
-    # First run
+    # First run, recording every response so the rerun below needs no network
     print("----- SafeRun: First Attempt -----")
-    first_run_output = run_tool("Run tests")
-    if "failed" not in first_run_output.lower():
-        return "All tests passed on first attempt.\n\n" + first_run_output
-
-    # If tests failed, do a single reflection cycle
-    print("----- SafeRun: Tests Failed, Attempting Single Reflection -----")
-    # Provide minimal feedback to the LLM, or more detailed. For example:
-    feedback_prompt = (
-        "Some tests failed. Here is the run output:\n\n"
-        f"{first_run_output}\n\n"
-        "Please fix these failures and regenerate the tests accordingly."
-    )
-    feedback_output = feedback_tool(feedback_prompt)
+    first_run = service.run(cassette_mode="record")
+    if not first_run.get("failed_tests"):
+        return "All tests passed on first attempt.\n\n" + format_run(first_run)
 
-    # Attempt to regenerate
-    generate_output = generate_tool("Regenerate tests after failures")
+    # If tests failed, do a single reflection cycle on the failing tests only
+    failed = first_run.get("failed_test_names", [])
+    print(f"----- SafeRun: {len(failed)} Tests Failed, Reflecting On Them Only -----")
+    reflection = service.reflect(first_run.get("failure_traces") or dict.fromkeys(failed, ""))
 
-    # Second run
-    print("----- SafeRun: Second Attempt After Regeneration -----")
-    second_run_output = run_tool("Run tests again")
-    if "failed" not in second_run_output.lower():
-        return "Tests passed on second attempt after reflection.\n\n" + second_run_output
+    # Rerun only what failed against the recorded responses, then the whole suite live once
+    print("----- SafeRun: Rerunning Failed Tests -----")
+    targeted_run = service.run(failed, cassette_mode="replay")
+    print("----- SafeRun: Final Full Run -----")
+    final_run = service.run()
+    if not final_run.get("failed_tests"):
+        return "Tests passed on second attempt after reflection.\n\n" + format_run(final_run)
     else:
         return (
             "Tests still failed after one reflection attempt.\n\n"
-            "First run output:\n" + first_run_output + "\n\n"
-            "Feedback response:\n" + feedback_output + "\n\n"
-            "Regeneration output:\n" + generate_output + "\n\n"
-            "Second run output:\n" + second_run_output
+            "First run:\n" + format_run(first_run) + "\n\n"
+            "Reflection:\n" + format_run(reflection) + "\n\n"
+            "Rerun of failed tests:\n" + format_run(targeted_run) + "\n\n"
+            "Final run:\n" + format_run(final_run)
         )
 
 
@@ -81,22 +81,22 @@ tools = [
     Tool(
         name="Plan",
         func=plan_tool,
-        description="Generate a test plan using `api_tester.py plan`."
+        description="Generate a test plan with the LLM."
     ),
     Tool(
         name="Generate",
         func=generate_tool,
-        description="Generate or update Python test code for the API using `api_tester.py generate`."
+        description="Generate or update Python test code for the API from its OpenAPI spec."
     ),
     Tool(
         name="Run",
         func=run_tool,
-        description="Run pytest on the generated tests using `api_tester.py run`."
+        description="Run pytest on the generated tests and return the summary."
     ),
     Tool(
         name="Feedback",
         func=feedback_tool,
-        description="Provide user feedback using `api_tester.py feedback <feedback>`."
+        description="Provide user feedback on the generated tests to the LLM."
     ),
     safe_run_tool  # <-- Our new 'SafeRun' tool
 ]
@@ -1,44 +1,102 @@
-import subprocess
+import os
+import json
+from contextlib import contextmanager
+
+import api_tester
+
+
+class TesterService:
+    """
+    In-process handle on api_tester shared by every agent tool. The module, its
+    OpenAPI cache, the Ollama client and the source context stay loaded between
+    agent steps instead of being rebuilt by a `python api_tester.py` subprocess.
+    """
+
+    def __init__(self, fastapi_url=None, src_folder=None, workspace=None):
+        self.fastapi_url = (fastapi_url or os.getenv("TEST_API_URL", api_tester.FASTAPI_URL)).rstrip("/")
+        self.src_folder = src_folder
+        self.workspace = workspace or os.path.dirname(os.path.abspath(__file__))
+        self._source_contents = None
+
+    @contextmanager
+    def in_workspace(self):
+        previous = os.getcwd()
+        os.chdir(self.workspace)
+        try:
+            yield
+        finally:
+            os.chdir(previous)
+
+    @property
+    def source_contents(self):
+        if self._source_contents is None:
+            with self.in_workspace():
+                self._source_contents = api_tester.read_source_code_contents(self.src_folder)
+        return self._source_contents
+
+    def refresh(self):
+        """Drops the cached spec and source context, e.g. after the target service changed."""
+        api_tester.OPENAPI_CACHE.pop(self.fastapi_url, None)
+        self._source_contents = None
+
+    def plan(self) -> str:
+        return api_tester.generate_plan()
+
+    def generate(self) -> dict:
+        with self.in_workspace():
+            return api_tester.generate_test_code_pytest(self.fastapi_url, self.source_contents)
+
+    def run(self, node_ids=None, cassette_mode=None) -> dict:
+        with self.in_workspace():
+            return api_tester.run_tests(node_ids, cassette_mode)
+
+    def reflect(self, failure_traces) -> dict:
+        with self.in_workspace():
+            return api_tester.reflect_on_failures(failure_traces)
+
+    def feedback(self, user_feedback: str) -> str:
+        return api_tester.handle_feedback(user_feedback)
+
+
+service = TesterService()
+
 
 def plan_tool(input_text: str) -> str:
     """
-    Calls `python api_tester.py plan` and returns the console output.
+    Generates a test plan with the LLM and returns it.
     """
     try:
-        result = subprocess.check_output(["python", "api_tester.py", "plan"])
-        return result.decode("utf-8")
-    except subprocess.CalledProcessError as e:
+        return service.plan()
+    except Exception as e:
         return f"Error running plan_tool: {str(e)}"
 
 
 def generate_tool(input_text: str) -> str:
     """
-    Calls `python api_tester.py generate` and returns the console output.
+    Generates pytest code for the target API and returns the result.
     """
     try:
-        result = subprocess.check_output(["python", "api_tester.py", "generate"])
-        return result.decode("utf-8")
-    except subprocess.CalledProcessError as e:
+        result = service.generate()
+        return result.get("error") or result.get("file_content", "")
+    except Exception as e:
         return f"Error running generate_tool: {str(e)}"
 
 
 def run_tool(input_text: str) -> str:
     """
-    Calls `python api_tester.py run` and returns the console output.
+    Runs the generated tests and returns the summary as JSON.
     """
     try:
-        result = subprocess.check_output(["python", "api_tester.py", "run"])
-        return result.decode("utf-8")
-    except subprocess.CalledProcessError as e:
+        return json.dumps(service.run(), indent=2)
+    except Exception as e:
         return f"Error running run_tool: {str(e)}"
 
 
 def feedback_tool(user_feedback: str) -> str:
     """
-    Calls `python api_tester.py feedback "<user_feedback>"` and returns the console output.
+    Sends user feedback to the LLM and returns its response.
     """
     try:
-        result = subprocess.check_output(["python", "api_tester.py", "feedback", user_feedback])
-        return result.decode("utf-8")
-    except subprocess.CalledProcessError as e:
+        return service.feedback(user_feedback)
+    except Exception as e:
         return f"Error running feedback_tool: {str(e)}"
@@ -1,16 +1,55 @@
 import os
+import ast
+import uuid
+import json
+import time
+import asyncio
 import subprocess
 import re
+import textwrap
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import requests
 import ollama
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, File, Form, UploadFile, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import zipfile
 import shutil
 import xmltodict
 
-app = FastAPI()
+from baseline_tests import generate_baseline_tests, baseline_test_names, scenario_combinations
+from probing import probe_scenarios, generate_probe_tests, summarize_findings
+from load_tester import load_sequences, run_load
+from traffic_recorder import TRAFFIC_ENV, CASSETTE_ENV, CASSETTE_MODE_ENV, CASSETTE_MODES
+from openapi_stream import StreamingSpec
+from llm_pool import LLMPool
+from prompt_encoding import PromptEncoder
+from token_budget import METER, LLM_CONTEXT_TOKENS, PROMPT_TOKEN_BUDGET, PromptTooLarge, fit_sections
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (run results and load reports can be large)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# FAST_JSON=1 renders every response with orjson instead of the json module
+FAST_JSON = os.getenv("FAST_JSON", "").lower() in ("1", "true", "yes")
+if FAST_JSON and orjson is None:
+    print("FAST_JSON is set but orjson is not installed; using the default JSON encoder")
+    FAST_JSON = False
+
+app = FastAPI(default_response_class=FastJSONResponse if FAST_JSON else JSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +62,7 @@ app.add_middleware(
 
 FASTAPI_URL = "http://localhost:8001"
 UPLOAD_DIRECTORY = "src"
+SPEC_DIRECTORY = "specs"
 
 
 class GenerateRequest(BaseModel):
@@ -33,6 +73,49 @@ class GenerateRequest(BaseModel):
 
 class RunRequest(BaseModel):
     type: str
+    # Test-impact selection: run only tests touching these routes ("POST /fraud-score/" or a bare path)
+    # and/or the operations that differ between `previous_spec` and the live spec at `fastapi_url`.
+    fastapi_url: str = None
+    changed_routes: List[str] = None
+    previous_spec: dict = None
+    # "record" stores every response in CASSETTE_FILE, "replay" serves them from it without the network
+    cassette_mode: str = None
+    # Behave processes the BDD scenarios are split across (default BDD_WORKERS)
+    workers: int = None
+
+
+class BatchService(BaseModel):
+    # A live service (`fastapi_url`) or a spec file on this server (`spec_path`, with
+    # `fastapi_url` as the optional execution base URL)
+    name: str = None
+    fastapi_url: str = None
+    spec_path: str = None
+
+
+class BatchGenerateRequest(BaseModel):
+    services: List[BatchService]
+    baseline: bool = True
+    strength: int = 2
+    stream: bool = False
+    stream_batch: int = 50
+    # Concurrent LLM calls shared by all services, and services prepared concurrently
+    llm_workers: int = 4
+    service_workers: int = 8
+    # Each service's tests go to <output_dir>/<name>/generated_tests.py
+    output_dir: str = "generated"
+
+
+class LoadTestRequest(BaseModel):
+    # Target for the replayed traffic; defaults to the URLs the tests recorded
+    fastapi_url: str = None
+    # Open model starting `sequences_per_second` recorded sequences (one test's requests) each
+    # second, or `concurrency` looping virtual users
+    sequences_per_second: float = None
+    concurrency: int = None
+    duration: float = 30.0
+    ramp_up: float = 5.0
+    # Reuse previously recorded traffic instead of running the generated tests once to record it
+    traffic_file: str = None
 
 
 # -----------------------------------------------------------------------------
@@ -154,11 +237,35 @@ async def generate_coverage_report():
 
 @app.post("/generate")
 async def generate(
-        fastapi_url: str = Form(...),
+        fastapi_url: str = Form(None),
         type: str = Form(...),
-        source_file: UploadFile = File(None)
+        source_file: UploadFile = File(None),
+        spec_file: UploadFile = File(None),
+        spec_path: str = Form(None),
+        baseline: bool = Form(True),
+        strength: int = Form(2),
+        must_include: str = Form(None),
+        probe: bool = Form(False),
+        stream: bool = Form(False),
+        stream_batch: int = Form(50)
 ):
+    """
+    The spec is read from `spec_file` (upload) or `spec_path` (on this server) when
+    given, as JSON or YAML, and `fastapi_url` is then only the base URL the tests
+    will run against (default: the spec's first absolute `servers` URL), so tests can
+    be generated before the service is deployed. Otherwise it is fetched from
+    `<fastapi_url>/openapi.json`.
+    `strength` is the t of the t-wise covering array used for combination tests;
+    `must_include` is JSON mapping "METHOD /path" to rows that must be in the plan,
+    e.g. {"POST /fraud-score/": [{"location": "Nigeria", "transaction_type": "Wire Transfer"}]}.
+    `probe` sends a few hundred requests per POST endpoint to find its scoring thresholds
+    (this writes data to the target) and adds boundary tests at the discovered edges.
+    `stream` parses the spec incrementally and generates tests `stream_batch` operations
+    at a time, for specs too large to load at once (pytest only, without probing).
+    """
     try:
+        src_folder = None
+
         # Handle file upload if provided
         if source_file:
             # Ensure upload directory exists
@@ -186,26 +293,62 @@ async def generate(
             # Update src_folder to the uploaded directory
             src_folder = UPLOAD_DIRECTORY
 
-        # Validate fastapi_url
-        fastapi_url = fastapi_url.rstrip('/')
-        openapi_url = f"{fastapi_url}/openapi.json"
+        # Save an uploaded spec so it can be parsed (or streamed) like one on disk
+        if spec_file:
+            os.makedirs(SPEC_DIRECTORY, exist_ok=True)
+            spec_path = os.path.join(SPEC_DIRECTORY, os.path.basename(spec_file.filename or "openapi.json"))
+            with open(spec_path, "wb") as f:
+                shutil.copyfileobj(spec_file.file, f)
+        if spec_path and not os.path.isfile(spec_path):
+            return {"error": f"OpenAPI specification file not found: {spec_path}"}
+        if not spec_path and not fastapi_url:
+            return {"error": "Provide fastapi_url or an OpenAPI specification file"}
 
-        # Verify OpenAPI spec
         try:
-            response = requests.get(openapi_url)
-            response.raise_for_status()
-            openapi_data = response.json()
-            if not openapi_data:
+            combination_options = {"strength": strength,
+                                   "must_include": json.loads(must_include) if must_include else None}
+        except ValueError as e:
+            return {"error": f"Invalid must_include JSON: {str(e)}"}
+
+        if stream:
+            if type != "pytest" or probe:
+                return {"error": "stream is only supported for pytest generation without probe"}
+            if stream_batch < 1:
+                return {"error": "stream_batch must be at least 1"}
+            if spec_path and is_yaml_file(spec_path):
+                return {"error": "stream needs a JSON specification; YAML files are loaded whole"}
+            fastapi_url = (fastapi_url or FASTAPI_URL).rstrip('/')
+            return generate_test_code_pytest_streaming(fastapi_url, read_source_code_contents(src_folder), baseline,
+                                                       batch_size=stream_batch, spec_path=spec_path,
+                                                       **combination_options)
+
+        if spec_path:
+            # Parse the file and register it as the spec of the execution URL; route extraction reads it from there
+            try:
+                openapi_data = load_openapi_file(spec_path)
+            except (OSError, ValueError) as e:
+                return {"error": f"Could not read OpenAPI specification: {str(e)}"}
+            if not isinstance(openapi_data, dict) or not openapi_data:
                 return {"error": "Empty OpenAPI specification received"}
-        except requests.RequestException as e:
-            return {"error": f"Could not fetch OpenAPI schema: {str(e)}"}
+            fastapi_url = (fastapi_url or spec_base_url(openapi_data)).rstrip('/')
+            OPENAPI_CACHE[fastapi_url] = openapi_data
+        else:
+            # Verify OpenAPI spec (refetched per request, then reused by route extraction)
+            fastapi_url = fastapi_url.rstrip('/')
+            try:
+                openapi_data = load_openapi_spec(fastapi_url, refresh=True)
+                if not openapi_data:
+                    return {"error": "Empty OpenAPI specification received"}
+            except requests.RequestException as e:
+                return {"error": f"Could not fetch OpenAPI schema: {str(e)}"}
 
         # Read source code contents if a folder is specified or uploaded
         source_contents = read_source_code_contents(src_folder)
 
         # Generate tests based on type
         if type == "pytest":
-            result = generate_test_code_pytest(fastapi_url, source_contents)
+            result = generate_test_code_pytest(fastapi_url, source_contents, baseline, probe=probe,
+                                               **combination_options)
         elif type == "bdd":
             result = generate_test_code_bdd(fastapi_url, source_contents)
         else:
@@ -222,19 +365,70 @@ async def generate(
         return {"error": f"Internal server error: {str(e)}"}
 
 
+@app.post("/generate/batch")
+async def generate_batch(request: BatchGenerateRequest):
+    """
+    Generates pytest suites for many services in one call. Services are prepared
+    concurrently and share one bounded pool of `llm_workers` LLM calls, served
+    round-robin across services. Returns each service's result and timings.
+    """
+    if not request.services:
+        return {"error": "No services given"}
+    if request.llm_workers < 1 or request.service_workers < 1 or request.stream_batch < 1:
+        return {"error": "llm_workers, service_workers and stream_batch must be at least 1"}
+    return await asyncio.to_thread(generate_services, request)
+
+
+@app.get("/llm-metrics")
+async def llm_metrics():
+    """Token counts and throughput of the recent LLM calls, and the prompt budget."""
+    return METER.summary()
+
+
 @app.post("/run")
 async def run(request: RunRequest):
     try:
-        if request.type == "pytest":
-            return run_tests()
+        if request.type == "pytest" and (request.changed_routes or request.previous_spec):
+            return run_impacted_tests(request.fastapi_url or FASTAPI_URL,
+                                      request.changed_routes, request.previous_spec)
+        elif request.type == "pytest":
+            if request.cassette_mode and request.cassette_mode not in CASSETTE_MODES:
+                raise HTTPException(status_code=400, detail=f"cassette_mode must be one of {CASSETTE_MODES}")
+            return run_tests(cassette_mode=request.cassette_mode)
         elif request.type == "bdd":
-            return run_bdd_tests()
+            return run_bdd_tests(workers=request.workers)
         else:
             raise HTTPException(status_code=400, detail="Invalid test type")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/loadtest")
+async def loadtest(request: LoadTestRequest):
+    try:
+        traffic_file = request.traffic_file or TRAFFIC_FILE
+        if not request.traffic_file or not os.path.exists(traffic_file):
+            record_traffic(traffic_file=traffic_file)
+        sequences = load_sequences(traffic_file)
+        if not sequences:
+            return {"error": "The generated tests did not send any requests to replay"}
+
+        operations = {}
+        if request.fastapi_url:
+            try:
+                operations = list_operations(load_openapi_spec(request.fastapi_url))
+            except (requests.RequestException, ValueError):
+                operations = {}
+
+        def operation_of(method, path):
+            return match_operation(method, path, operations) if operations else None
+
+        return await run_load(sequences, request.fastapi_url, request.sequences_per_second, request.concurrency,
+                              request.duration, request.ramp_up, operation_of)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 def read_source_code_contents(src_folder=None):
     """
     Read contents of source code files
@@ -259,12 +453,86 @@ def read_source_code_contents(src_folder=None):
 # -----------------------------------------------------------------------------
 #  Template for final test file
 # -----------------------------------------------------------------------------
+CLIENT_SETUP = """
+REQUEST_TIMEOUT = float(os.getenv('TEST_API_TIMEOUT', '10'))
+TEST_RUN_ID = os.getenv('TEST_RUN_ID') or uuid.uuid4().hex
+
+
+# Keep-alive session that prefixes BASE_URL and applies a default timeout.
+# Every request carries the run ID; records created by POST are deleted in cleanup().
+class ApiClient(requests.Session):
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT):
+        super().__init__()
+        self.base_url = str(base_url).rstrip('/')
+        self.timeout = timeout
+        self.created = []
+        self.headers['X-Test-Run-Id'] = TEST_RUN_ID
+        retries = Retry(total=3, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        if not str(url).startswith(('http://', 'https://')):
+            url = self.base_url + '/' + str(url).lstrip('/')
+        kwargs.setdefault('timeout', self.timeout)
+        response = super().request(method, url, *args, **kwargs)
+        body = kwargs.get('json')
+        if method.upper() == 'POST' and response.status_code < 300 and isinstance(body, dict):
+            path = requests.utils.urlparse(url).path
+            self.created += [(path, value) for key, value in body.items()
+                             if (key == 'id' or key.endswith('_id')) and isinstance(value, str)]
+        return response
+
+    def cleanup(self):
+        # DELETE what this run created where the API has a DELETE route, then let the
+        # service purge the rest by run ID (ignored when it has no such endpoint).
+        try:
+            paths = self.get('/openapi.json').json().get('paths', {})
+            templates = [p for p, ops in paths.items() if 'delete' in ops and p.endswith('}')]
+            for path, value in self.created:
+                for template in templates:
+                    if template.rsplit('/{', 1)[0] == path.rstrip('/'):
+                        self.delete(template.rsplit('{', 1)[0] + value)
+            self.delete('/admin/test-runs/' + TEST_RUN_ID)
+        except (requests.RequestException, ValueError):
+            pass
+        self.created = []
+"""
+
+CLIENT_FIXTURE = """
+
+@pytest.fixture(scope='session')
+def api_client():
+    with ApiClient(BASE_URL) as client:
+        yield client
+        client.cleanup()
+"""
+
+STEP_CLIENT = """
+
+api_client = ApiClient(BASE_URL)
+atexit.register(api_client.cleanup)
+"""
+
+CLIENT_IMPORTS = """
+import os
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+"""
+
 TEST_TEMPLATE = """
 import os
+import uuid
 import requests
 import pytest
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = os.getenv('TEST_API_URL', {FASTAPI_URL})
+""" + CLIENT_SETUP + CLIENT_FIXTURE + """
 
 {test_functions}
 """
@@ -286,45 +554,209 @@ Feature: API Testing
 {scenarios}
 """
 
-STEP_DEFINITION_TEMPLATE = """
-from behave import given, when, then
-import requests
+BDD_FEATURE_FILE = "features/api_tests.feature"
+BDD_STEPS_FILE = "features/steps/api_steps.py"
+
+# Generic steps shipped with every generated feature, so the LLM only writes scenarios.
+# `{name}` in paths, bodies and values is replaced by a value stored earlier in the
+# scenario; `{unique}` is a fresh ID per scenario.
+STEP_LIBRARY_STEPS = '''
+
+def render(context, text):
+    values = {'unique': stored(context).setdefault('unique', uuid.uuid4().hex[:12]), **stored(context)}
+    return re.sub(r'\\{(\\w+)\\}', lambda m: str(values.get(m.group(1), m.group(0))), text)
+
+
+def stored(context):
+    if not hasattr(context, 'stored'):
+        context.stored = {}
+    return context.stored
+
+
+def as_value(text):
+    """Table and step values are JSON when they parse as JSON, strings otherwise."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def field_of(body, field):
+    """Value at a dotted path (`items.0.id`) of a JSON body; raises AssertionError if absent."""
+    value = body
+    for part in field.split('.'):
+        if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        elif isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            raise AssertionError(f'Response has no field "{field}": {str(body)[:500]}')
+    return value
+
+
+def response_json(context):
+    try:
+        return context.response.json()
+    except ValueError:
+        raise AssertionError(f'Response is not JSON: {context.response.text[:500]}')
+
+
+def send(context, method, path, **kwargs):
+    headers = getattr(context, 'headers', {})
+    context.response = api_client.request(method.upper(), render(context, path), headers=headers, **kwargs)
+
+
+@given('the API is running')
+def step_api_running(context):
+    context.headers = {}
+
+
+@step('the request header "{name}" is "{value}"')
+def step_header(context, name, value):
+    context.headers = {**getattr(context, 'headers', {}), name: render(context, value)}
+
+
+@step('I send a {method} request to "{path}"')
+def step_send(context, method, path):
+    send(context, method, path)
+
+
+@step('I send a {method} request to "{path}" with body')
+def step_send_body(context, method, path):
+    send(context, method, path, json=json.loads(render(context, context.text)))
+
+
+@step('I send a {method} request to "{path}" with fields')
+def step_send_fields(context, method, path):
+    body = {}
+    for row in context.table:
+        target = body
+        *parents, leaf = row[0].split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = as_value(render(context, row[1]))
+    send(context, method, path, json=body)
+
+
+@step('I send a {method} request to "{path}" with query')
+def step_send_query(context, method, path):
+    send(context, method, path, params={row[0]: render(context, row[1]) for row in context.table})
+
+
+@then('the response status code should be {status:d}')
+def step_status(context, status):
+    assert context.response.status_code == status, \\
+        f'Expected {status}, got {context.response.status_code}: {context.response.text[:500]}'
+
+
+@then('the response status code should be one of {statuses}')
+def step_status_in(context, statuses):
+    allowed = [int(code) for code in re.findall(r'\\d{3}', statuses)]
+    assert not allowed or context.response.status_code in allowed, \\
+        f'Expected one of {allowed}, got {context.response.status_code}: {context.response.text[:500]}'
+
+
+@then('the response field "{field}" should be "{value}"')
+def step_field_equals(context, field, value):
+    actual, expected = field_of(response_json(context), field), as_value(render(context, value))
+    assert actual == expected or str(actual) == str(expected), f'"{field}" is {actual!r}, expected {expected!r}'
+
+
+@then('the response field "{field}" should exist')
+def step_field_exists(context, field):
+    field_of(response_json(context), field)
+
+
+@then('the response should be a list')
+def step_list(context):
+    assert isinstance(response_json(context), list), f'Expected a JSON list: {context.response.text[:500]}'
+
+
+@then('the response should contain "{text}"')
+def step_contains(context, text):
+    assert render(context, text) in context.response.text, \\
+        f'"{text}" not in the response: {context.response.text[:500]}'
+
+
+@step('I store the response field "{field}" as "{name}"')
+def step_store(context, field, name):
+    stored(context)[name] = field_of(response_json(context), field)
+'''
+
+STEP_LIBRARY = """
+import json
 import os
+import re
+import uuid
+import atexit
+import requests
+from behave import given, when, then, step
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = os.getenv('TEST_API_URL', {FASTAPI_URL})
-
-{step_definitions}
+""" + CLIENT_SETUP + STEP_CLIENT + STEP_LIBRARY_STEPS
+
+# The step vocabulary as the LLM sees it
+STEP_VOCABULARY = """
+Given the API is running
+And the request header "<name>" is "<value>"
+When I send a <METHOD> request to "<path>"
+When I send a <METHOD> request to "<path>" with body
+  \"\"\"
+  <JSON body>
+  \"\"\"
+When I send a <METHOD> request to "<path>" with fields
+  | field | value |
+  | <name> | <JSON or text value> |
+When I send a <METHOD> request to "<path>" with query
+  | param | value |
+  | <name> | <value> |
+Then the response status code should be <code>
+Then the response status code should be one of [<code>, <code>]
+Then the response field "<dotted.path>" should be "<value>"
+Then the response field "<dotted.path>" should exist
+Then the response should be a list
+Then the response should contain "<text>"
+And I store the response field "<dotted.path>" as "<name>"
 """
 
 
 def generate_test_code_bdd(fastapi_url, source_contents):
+    """
+    Asks the LLM for feature scenarios only; they run on the shipped step library
+    (STEP_LIBRARY), written next to the feature as features/steps/api_steps.py.
+    """
     print("\n----- Generating BDD Test Cases from FastAPI Schema -----\n")
     dynamic_prompt = generate_dynamic_prompt_bdd(fastapi_url)
 
     if dynamic_prompt.startswith("ERROR:"):
         print(dynamic_prompt)
-        return
+        return {"error": dynamic_prompt}
 
     raw_response = call_ollama(dynamic_prompt)
     if raw_response.startswith("ERROR:"):
         print(raw_response)
-        return
-
-    feature_content, step_definitions = extract_bdd_from_response(raw_response)
+        return {"error": raw_response}
 
-    # Write the feature file
-    feature_file = "features/api_tests.feature"
-    os.makedirs(os.path.dirname(feature_file), exist_ok=True)
-    with open(feature_file, "w", encoding="utf-8") as f:
-        f.write(feature_content)
+    feature_content = extract_bdd_from_response(raw_response)
+    if not feature_content:
+        return {"error": "The LLM response has no ```gherkin feature block"}
 
-    # Write the step definition file
-    step_def_file = "features/steps/step_definitions.py"
-    os.makedirs(os.path.dirname(step_def_file), exist_ok=True)
-    with open(step_def_file, "w", encoding="utf-8") as f:
-        f.write(step_definitions)
+    os.makedirs(os.path.dirname(BDD_STEPS_FILE), exist_ok=True)
+    with open(BDD_FEATURE_FILE, "w", encoding="utf-8") as f:
+        f.write(feature_content + "\n")
+    with open(BDD_STEPS_FILE, "w", encoding="utf-8") as f:
+        f.write(STEP_LIBRARY.replace("{FASTAPI_URL}", repr(fastapi_url)))
+    # Step files from earlier LLM-written suites would define the same steps twice
+    for name in os.listdir(os.path.dirname(BDD_STEPS_FILE)):
+        path = os.path.join(os.path.dirname(BDD_STEPS_FILE), name)
+        if name.endswith(".py") and path != BDD_STEPS_FILE and os.path.isfile(path):
+            os.remove(path)
 
-    print(f"Successfully generated BDD tests in '{feature_file}' and '{step_def_file}'")
+    print(f"Successfully generated BDD tests in '{BDD_FEATURE_FILE}' (steps: '{BDD_STEPS_FILE}')")
+    return {"file_content": feature_content, "status": "success",
+            "feature_file": BDD_FEATURE_FILE, "steps_file": BDD_STEPS_FILE}
 
 
 def generate_dynamic_prompt_bdd(fastapi_url):
@@ -333,7 +765,6 @@ def generate_dynamic_prompt_bdd(fastapi_url):
         return api_tests
 
     scenarios = ""
-    step_definitions = ""
 
     for scenario in api_tests:
         method = scenario['method']
@@ -343,20 +774,19 @@ def generate_dynamic_prompt_bdd(fastapi_url):
         expected_status = scenario['expected_status']
 
         scenario_name = f"Scenario: Test {method} {endpoint}"
-        steps = f"""
-        Given the API is running
-        When I send a {method} request to "{endpoint}"
-        """
-
+        steps = "    Given the API is running\n"
         if body_required:
-            steps += f"And I include the request body {body_example}\n"
-
-        steps += f"Then the response status code should be one of {expected_status}\n"
+            steps += f'    When I send a {method} request to "{endpoint}" with body\n' \
+                     f'      """\n      {json.dumps(body_example, default=str)}\n      """\n'
+        else:
+            steps += f'    When I send a {method} request to "{endpoint}"\n'
+        steps += f"    Then the response status code should be one of [{', '.join(map(str, expected_status))}]\n"
 
-        scenarios += f"{scenario_name}\n{steps}\n"
+        scenarios += f"  {scenario_name}\n{steps}\n"
 
     GENERATION_PROMPT = f"""
-    Generate a feature file and step definitions in Python using Behave for the following API test scenarios:
+    Write a Gherkin feature file for the following API test scenarios, expanded with
+    negative, boundary and data-dependent scenarios:
 
     {scenarios}
 
@@ -365,37 +795,151 @@ def generate_dynamic_prompt_bdd(fastapi_url):
     {FEATURE_TEMPLATE}
     ```
 
-    The step definitions should follow this structure:
-    ```python
-    {STEP_DEFINITION_TEMPLATE}
+    The step definitions already exist. Use ONLY these steps, word for word (<...> are placeholders):
+    ```gherkin
+    {STEP_VOCABULARY}
     ```
+
+    - `{{name}}` inside a path, body or value is replaced by a value stored earlier in the same
+      scenario with "I store the response field ... as ...", and `{{unique}}` by a fresh ID, so a
+      scenario can create a record with a unique ID and then read, update or delete it.
+    - Every scenario must create the data it needs; scenarios may run in any order.
+    - Do NOT write step definitions or any Python. Reply with the feature in one ```gherkin block.
     """
     return GENERATION_PROMPT
 
 
 def extract_bdd_from_response(llm_response: str):
-    pattern_feature = r"```gherkin\s*(.*?)\s*```"
-    pattern_steps = r"```python\s*(.*?)\s*```"
-
-    feature_match = re.search(pattern_feature, llm_response, re.DOTALL)
-    step_match = re.search(pattern_steps, llm_response, re.DOTALL)
-
-    feature_content = feature_match.group(1).strip() if feature_match else ""
-    step_definitions = step_match.group(1).strip() if step_match else ""
-
-    return feature_content, step_definitions
+    """The feature file from the LLM's ```gherkin (or ```feature) block."""
+    feature_match = re.search(r"```(?:gherkin|feature)\s*(.*?)\s*```", llm_response, re.DOTALL)
+    return feature_match.group(1).strip() if feature_match else ""
 
 
 # -----------------------------------------------------------------------------
 #  Run BDD Tests
 # -----------------------------------------------------------------------------
-def run_bdd_tests():
+BDD_FEATURES_DIR = "features"
+# Scenarios mostly wait on the API, so more workers than CPUs still pay off
+BDD_WORKERS = int(os.getenv("BDD_WORKERS", "4"))
+
+
+def bdd_scenarios(features_dir=BDD_FEATURES_DIR):
+    """`file:line` of every scenario (and every Scenario Outline example row) under `features_dir`."""
+    from behave.parser import parse_file
+
+    locations = []
+    for root, _, files in sorted(os.walk(features_dir)):
+        for name in sorted(files):
+            if name.endswith(".feature"):
+                feature = parse_file(os.path.join(root, name))
+                if feature is not None:
+                    locations += [f"{scenario.filename}:{scenario.line}" for scenario in feature.walk_scenarios()]
+    return locations
+
+
+def run_bdd_worker(locations, run_id, workdir):
+    """Runs Behave on `locations` with the JSON formatter; returns (features, output)."""
+    os.makedirs(workdir, exist_ok=True)
+    selection, report = os.path.join(workdir, "scenarios.txt"), os.path.join(workdir, "report.json")
+    with open(selection, "w", encoding="utf-8") as f:
+        # Locations in an @file are resolved against the file's own folder
+        f.write("\n".join(os.path.abspath(location) for location in locations) + "\n")
+    # Behave reads the scenario locations from an @file, so the command line stays short
+    process = subprocess.run(["behave", "--format", "json", "--outfile", report, "--no-summary",
+                              f"@{selection}"], capture_output=True, text=True,
+                             env=dict(os.environ, TEST_RUN_ID=run_id))
+    try:
+        with open(report, encoding="utf-8") as f:
+            return json.load(f), process.stdout + process.stderr
+    except (OSError, ValueError):
+        return [], process.stdout + process.stderr
+
+
+def bdd_step_trace(step):
+    result = step["result"]
+    message = result.get("error_message") or ""
+    if isinstance(message, list):
+        message = "\n".join(message)
+    return f"{step['keyword']} {step['name']} ({step.get('location')}): {result['status']}\n{message}".strip()
+
+
+def bdd_results(features):
+    """Per-scenario outcome, duration and failure trace from Behave's JSON report."""
+    results = []
+    for feature in features:
+        for element in feature.get("elements", []):
+            if element.get("type") != "scenario" or element.get("status") == "skipped":
+                continue
+            steps = element.get("steps", [])
+            for step in steps:
+                if step.get("result", {}).get("status") == "undefined":
+                    step["result"].setdefault("error_message", "No step definition matches this step")
+            failed = [step for step in steps if step.get("result", {}).get("status") not in (None, "passed", "skipped")]
+            results.append({
+                "name": f"{feature.get('name')}: {element.get('name')}",
+                "location": element.get("location"),
+                "status": "passed" if element.get("status") == "passed" else "failed",
+                "duration_seconds": round(sum(step.get("result", {}).get("duration", 0.0) for step in steps), 3),
+                "trace": "\n\n".join(bdd_step_trace(step) for step in failed),
+            })
+    return results
+
+
+def run_bdd_tests(workers=None, features_dir=BDD_FEATURES_DIR):
+    """
+    Runs the feature scenarios split across `workers` Behave processes (default
+    BDD_WORKERS) and merges their JSON reports into the pytest summary shape,
+    plus a per-scenario list. Each worker has its own test run ID, so one worker's
+    cleanup cannot purge records another one is still using.
+    """
     print("\n----- Running BDD Tests with Behave -----\n")
-    code = subprocess.call(["behave", "features"], shell=True)
-    if code == 0:
-        print("\nAll BDD tests passed successfully!")
+    locations = bdd_scenarios(features_dir)
+    if not locations:
+        return {"error": f"No scenarios found under '{features_dir}'"}
+    workers = max(1, min(workers or BDD_WORKERS, len(locations)))
+    chunks = [locations[i::workers] for i in range(workers)]
+    run_id = uuid.uuid4().hex
+    workdir = tempfile.mkdtemp(prefix="behave-")
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            runs = list(executor.map(lambda i: run_bdd_worker(chunks[i], f"{run_id}-{i}", os.path.join(workdir, str(i))),
+                                     range(workers)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+
+    scenarios = []
+    for chunk, (features, output) in zip(chunks, runs):
+        results = bdd_results(features)
+        scenarios += results
+        # A worker that crashed before reporting: its scenarios count as failed, with its output
+        reported = {os.path.abspath(result["location"] or "") for result in results}
+        scenarios += [{"name": location, "location": location, "status": "failed", "duration_seconds": 0.0,
+                       "trace": output[-2000:]} for location in chunk if os.path.abspath(location) not in reported]
+    # Scenario names need not be unique; a repeated one gets its location so no trace is lost
+    repeated = Counter(scenario["name"] for scenario in scenarios)
+    for scenario in scenarios:
+        if repeated[scenario["name"]] > 1:
+            scenario["name"] = f"{scenario['name']} ({scenario['location']})"
+
+    failed = [scenario for scenario in scenarios if scenario["status"] == "failed"]
+    test_session = {"total_tests": len(scenarios),
+                    "passed_tests": len(scenarios) - len(failed),
+                    "failed_tests": len(failed),
+                    "execution_time_seconds": round(elapsed, 2),
+                    "workers": workers,
+                    "run_id": run_id,
+                    "scenarios": [{key: value for key, value in scenario.items() if key != "trace"}
+                                  for scenario in scenarios]}
+    if failed:
+        test_session["failed_test_names"] = [scenario["name"] for scenario in failed]
+        test_session["failure_traces"] = {scenario["name"]: scenario["trace"] for scenario in failed}
+        print(f"\n{len(failed)} of {len(scenarios)} BDD scenarios failed.")
     else:
-        print(f"\nSome BDD tests failed with exit code {code}. See above for details.")
+        print("\nAll BDD tests passed successfully!")
+    return test_session
 
 
 def fetch_openapi_schema(fastapi_url):
@@ -407,6 +951,95 @@ def fetch_openapi_schema(fastapi_url):
         return f"ERROR: Could not fetch OpenAPI schema: {e}"
 
 
+OPENAPI_CACHE = {}
+
+
+def load_openapi_spec(fastapi_url, refresh=False):
+    """
+    Fetches `<fastapi_url>/openapi.json` once per process and serves it from
+    OPENAPI_CACHE afterwards; `refresh` forces a refetch.
+    """
+    fastapi_url = fastapi_url.rstrip('/')
+    if refresh or fastapi_url not in OPENAPI_CACHE:
+        response = requests.get(f"{fastapi_url}/openapi.json")
+        response.raise_for_status()
+        OPENAPI_CACHE[fastapi_url] = response.json()
+    return OPENAPI_CACHE[fastapi_url]
+
+
+def is_yaml_file(path):
+    return path.lower().endswith((".yaml", ".yml"))
+
+
+def parse_openapi_document(content, filename=""):
+    """Parses an OpenAPI document from JSON or, by extension or as a fallback, YAML."""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    if not is_yaml_file(filename):
+        try:
+            return json.loads(content)
+        except ValueError:
+            if filename.lower().endswith(".json"):
+                raise
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("PyYAML is required to read YAML OpenAPI specifications (pip install pyyaml)")
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML: {e}")
+    return json_types(data)
+
+
+def json_types(value):
+    """
+    A YAML document as its JSON equivalent would parse: keys (`200:`) become
+    strings, and so do dates and other non-JSON scalars. `openapi` and
+    `info.version` are strings by definition, so `3.0` or `1.0` stay as written.
+    """
+    def convert(node):
+        if isinstance(node, dict):
+            return {str(key): convert(item) for key, item in node.items()}
+        if isinstance(node, list):
+            return [convert(item) for item in node]
+        if node is None or isinstance(node, (str, bool, int, float)):
+            return node
+        return str(node)
+
+    data = convert(value)
+    if isinstance(data, dict):
+        if data.get("openapi") is not None:
+            data["openapi"] = str(data["openapi"])
+        if isinstance(data.get("info"), dict) and data["info"].get("version") is not None:
+            data["info"]["version"] = str(data["info"]["version"])
+    return data
+
+
+def load_openapi_file(path):
+    with open(path, "rb") as f:
+        return parse_openapi_document(f.read(), path)
+
+
+def spec_base_url(openapi_data):
+    """The spec's first absolute `servers` URL, else FASTAPI_URL."""
+    for server in openapi_data.get("servers") or []:
+        url = server.get("url", "") if isinstance(server, dict) else ""
+        if url.startswith(("http://", "https://")):
+            return url
+    return FASTAPI_URL
+
+
+def schema_name(schema):
+    """Component name of a `$ref` body schema ("TransactionList" for an array of them), else None."""
+    if "$ref" in schema:
+        return schema["$ref"].rsplit("/", 1)[-1]
+    items = schema.get("items")
+    if schema.get("type") == "array" and isinstance(items, dict) and "$ref" in items:
+        return items["$ref"].rsplit("/", 1)[-1] + "List"
+    return None
+
+
 def resolve_ref(ref, openapi_data):
     ref_path = ref.replace("#/components/schemas/", "")
     return openapi_data.get("components", {}).get("schemas", {}).get(ref_path, {})
@@ -419,6 +1052,96 @@ def extract_categories(description):
     return None
 
 
+NUMERIC_BOUND_KEYS = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+STRING_BOUND_KEYS = ("minLength", "maxLength", "pattern", "format", "enum")
+FORMAT_SAMPLES = {
+    "date-time": "2024-01-01T00:00:00Z",
+    "date": "2024-01-01",
+    "time": "12:00:00",
+    "email": "user@example.com",
+    "uuid": "123e4567-e89b-42d3-a456-426614174000",
+    "uri": "https://example.com",
+    "ipv4": "192.0.2.1",
+}
+
+
+def scalar_schema(value):
+    """Unwraps `anyOf: [{...}, {"type": "null"}]` (Optional fields) to the non-null branch."""
+    for option in value.get("anyOf", []):
+        if option.get("type") != "null":
+            return {**value, **option}
+    return value
+
+
+def sample_string(key, value):
+    """
+    Sample for a string field: its format's sample, else `sample_<key>` cut or padded
+    to minLength/maxLength. A `pattern` is not generated for (see extract_string_bounds).
+    """
+    if value.get("format") in FORMAT_SAMPLES:
+        return FORMAT_SAMPLES[value["format"]]
+    sample = f"sample_{key}"
+    if "maxLength" in value:
+        sample = sample[-value["maxLength"]:] if value["maxLength"] else ""
+    return sample.ljust(value.get("minLength", 0), "x")
+
+
+def sample_scalar(key, value):
+    """Type-based sample for a described field, kept inside its numeric and string bounds."""
+    value = scalar_schema(value)
+    kind = value.get("type")
+    if "example" in value:
+        return value["example"]
+    if value.get("enum"):
+        return value["enum"][0]
+    if kind == "string":
+        return sample_string(key, value)
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        sample = 123 if kind == "integer" else 5000
+        if "maximum" in value and sample > value["maximum"]:
+            sample = value["maximum"]
+        if "exclusiveMaximum" in value and sample >= value["exclusiveMaximum"]:
+            sample = value["exclusiveMaximum"] - 1
+        if "minimum" in value and sample < value["minimum"]:
+            sample = value["minimum"]
+        if "exclusiveMinimum" in value and sample <= value["exclusiveMinimum"]:
+            sample = value["exclusiveMinimum"] + 1
+        return int(sample) if kind == "integer" else sample
+    return None
+
+
+def extract_numeric_bounds(schema, openapi_data):
+    """Returns {field: {"type": ..., "minimum": ..., ...}} for the top-level numeric fields of a body schema."""
+    if not schema:
+        return None
+    if "$ref" in schema:
+        schema = resolve_ref(schema["$ref"], openapi_data)
+
+    bounds = {}
+    for key, value in schema.get("properties", {}).items():
+        value = scalar_schema(value)
+        if value.get("type") in ("integer", "number"):
+            bounds[key] = {"type": value["type"], **{k: value[k] for k in NUMERIC_BOUND_KEYS if k in value}}
+    return bounds
+
+
+def extract_string_bounds(schema, openapi_data):
+    """Returns {field: {"minLength": ..., "pattern": ..., ...}} for the constrained top-level string fields of a body schema."""
+    if not schema:
+        return None
+    if "$ref" in schema:
+        schema = resolve_ref(schema["$ref"], openapi_data)
+
+    bounds = {}
+    for key, value in schema.get("properties", {}).items():
+        value = scalar_schema(value)
+        if value.get("type") == "string" and any(k in value for k in STRING_BOUND_KEYS):
+            bounds[key] = {k: value[k] for k in STRING_BOUND_KEYS if k in value}
+    return bounds
+
+
 def generate_example_from_schema(schema, openapi_data):
     if not schema:
         return None, None, None
@@ -426,6 +1149,10 @@ def generate_example_from_schema(schema, openapi_data):
     if "$ref" in schema:
         schema = resolve_ref(schema["$ref"], openapi_data)
 
+    if schema.get("type") == "array" and "items" in schema:
+        item_example, item_descriptions, item_categories = generate_example_from_schema(schema["items"], openapi_data)
+        return [item_example], item_descriptions, item_categories
+
     example = {}
     descriptions = {}
     categories = {}
@@ -433,20 +1160,21 @@ def generate_example_from_schema(schema, openapi_data):
     properties = schema.get("properties", {})
 
     for key, value in properties.items():
-        if "$ref" in value:
+        if "$ref" in value and "enum" in resolve_ref(value["$ref"], openapi_data):
+            example[key] = sample_scalar(key, resolve_ref(value["$ref"], openapi_data))
+        elif "$ref" in value:
             example[key], descriptions[key], categories[key]  = generate_example_from_schema(resolve_ref(value["$ref"], openapi_data), openapi_data)
         elif "description" in value:
                 descriptions[key] = value.get("description", "")
                 extracted_categories = extract_categories(value.get("description", ""))
                 if extracted_categories:
                     categories[key] = extracted_categories
+                example[key] = extracted_categories[0] if extracted_categories else sample_scalar(key, value)
         elif "example" in value:
             example[key] = value["example"]
         elif "type" in value:
-            if value["type"] == "string":
-                example[key] = f"sample_{key}"
-            elif value["type"] == "integer":
-                example[key] = 123
+            if value["type"] in ("string", "integer", "number"):
+                example[key] = sample_scalar(key, value)
             elif value["type"] == "boolean":
                 example[key] = True
             elif value["type"] == "array":
@@ -454,61 +1182,77 @@ def generate_example_from_schema(schema, openapi_data):
                     example[key] = [item_example]
                     descriptions[key] = item_description
                     categories[key] = item_categories
-            elif value["type"] == "number":
-                example[key] = 5000
             elif value["type"] == "object":
                 example[key], descriptions[key], categories[key] = generate_example_from_schema(value, openapi_data)
+        elif "anyOf" in value:
+            example[key] = sample_scalar(key, value)
         else:
             example[key] = None
     return example, descriptions, categories
 
+def iter_fastapi_routes(openapi_data):
+    """
+    Yields one test scenario per operation in `openapi_data` (a parsed spec or
+    a StreamingSpec), in document order.
+    """
+    if isinstance(openapi_data, StreamingSpec):
+        paths = openapi_data.iter_paths()
+    else:
+        paths = openapi_data.get("paths", {}).items()
+
+    for path, methods in paths:
+        if not isinstance(methods, dict):
+            continue
+
+        for method, details in methods.items():
+            if method.lower() not in ['get', 'post', 'put', 'delete', 'patch']:
+                continue
+
+            request_body_required = "requestBody" in details
+            body_example = None
+            body_schema = None
+            description = None
+            categories = None
+            numeric_bounds = None
+            string_bounds = None
+
+            if request_body_required:
+                content = details.get("requestBody", {}).get("content", {})
+                if "application/json" in content:
+                    schema = content["application/json"].get("schema", {})
+                    body_example, description, categories = generate_example_from_schema(schema, openapi_data)
+                    numeric_bounds = extract_numeric_bounds(schema, openapi_data)
+                    string_bounds = extract_string_bounds(schema, openapi_data)
+                    body_schema = schema_name(schema)
+
+            yield {
+                "method": method.upper(),
+                "endpoint": path,
+                "bodyRequired": request_body_required,
+                "bodyExample": body_example,
+                "bodySchema": body_schema,
+                "expected_status": [str(code) for code in details.get("responses", {})],
+                "descriptions": description if description else None,
+                "categories" : categories if categories else None,
+                "numericBounds": numeric_bounds if numeric_bounds else None,
+                "stringBounds": string_bounds if string_bounds else None
+            }
+
+
 def extract_fastapi_routes(fastapi_url):
     try:
-        openapi_url = f"{fastapi_url}/openapi.json"
-        response = requests.get(openapi_url)
-        response.raise_for_status()
-        openapi_data = response.json()
+        openapi_data = load_openapi_spec(fastapi_url)
 
         if not isinstance(openapi_data, dict):
             raise ValueError("Invalid OpenAPI specification format")
 
-        test_scenarios = []
-        paths = openapi_data.get("paths", {})
-
-        if not paths:
+        if not openapi_data.get("paths", {}):
             raise ValueError("No paths found in OpenAPI specification")
 
-        for path, methods in paths.items():
-            if not isinstance(methods, dict):
-                continue
-
-            for method, details in methods.items():
-                if method.lower() not in ['get', 'post', 'put', 'delete', 'patch']:
-                    continue
-
-                request_body_required = "requestBody" in details
-                body_example = None
-                description = None
-                categories = None
-
-
-                if request_body_required:
-                    content = details.get("requestBody", {}).get("content", {})
-                    if "application/json" in content:
-                        schema = content["application/json"].get("schema", {})
-                        body_example, description, categories = generate_example_from_schema(schema, openapi_data)
-
-                test_case = {
-                    "method": method.upper(),
-                    "endpoint": path,
-                    "bodyRequired": request_body_required,
-                    "bodyExample": body_example,
-                    "expected_status": list(details.get("responses", {}).keys()),
-                    "descriptions": description if description else None,
-                    "categories" : categories if categories else None
-                }
-                print(test_case)
-                test_scenarios.append(test_case)
+        test_scenarios = []
+        for test_case in iter_fastapi_routes(openapi_data):
+            print(test_case)
+            test_scenarios.append(test_case)
 
         if not test_scenarios:
             raise ValueError("No valid API endpoints found to test")
@@ -520,6 +1264,27 @@ def extract_fastapi_routes(fastapi_url):
         raise ValueError(f"Failed to extract API routes: {str(e)}")
 
 
+def stream_fastapi_routes(fastapi_url, spec_path=None):
+    """
+    Streaming counterpart of extract_fastapi_routes() for very large specs: the
+    spec (`spec_path`, or spooled to disk from `fastapi_url`) is memory-mapped and
+    scenarios are yielded as its paths are parsed, without holding the document or
+    the scenario list in memory.
+    """
+    if spec_path:
+        spec = StreamingSpec(spec_path)
+    else:
+        spec = StreamingSpec.from_url(f"{fastapi_url.rstrip('/')}/openapi.json")
+    with spec as openapi_data:
+        count = 0
+        for test_case in iter_fastapi_routes(openapi_data):
+            count += 1
+            yield test_case
+        if not count:
+            raise ValueError("No valid API endpoints found to test")
+        print(f"Streamed {count} operations from the OpenAPI specification")
+
+
 # For more context
 def fetch_get_endpoints(api_tests, base_url):
     responses = {}
@@ -530,7 +1295,7 @@ def fetch_get_endpoints(api_tests, base_url):
         if method == 'GET' and not scenario.get('bodyRequired', False):
             url = f"{base_url}{endpoint}"
             try:
-                response = requests.get(url)
+                response = requests.get(url, timeout=10)
                 responses[endpoint] = {
                     'status_code': response.status_code,
                     'json': response.json() if response.headers.get(
@@ -542,34 +1307,27 @@ def fetch_get_endpoints(api_tests, base_url):
     return responses
 
 
-def generate_dynamic_prompt(fastapi_url, source_contents=None):
-    api_tests = extract_fastapi_routes(fastapi_url)
+def generate_dynamic_prompt(fastapi_url, source_contents=None, api_tests=None, baseline_count=0,
+                            strength=2, must_include=None, probe_summary=""):
+    if api_tests is None:
+        api_tests = extract_fastapi_routes(fastapi_url)
     if isinstance(api_tests, str) and api_tests.startswith("ERROR"):
         return api_tests
 
-    test_cases = ""
+    # Each body schema and each GET response is written once and referenced by name
+    encoder = PromptEncoder()
     for scenario in api_tests:
-        method = scenario['method']
-        endpoint = scenario['endpoint']
-        body_required = scenario['bodyRequired']
-        body_example = scenario['bodyExample']
-        expected_status = scenario['expected_status']
-        descriptions = scenario['descriptions']
-        categories = scenario['categories']
-
+        combinations_plan = None
+        if scenario['bodyRequired'] and not baseline_count:
+            combinations_plan = scenario_combinations(scenario, strength, must_include)
+        encoder.add_operation(scenario, combinations_plan, strength)
 
-        test_name = f"test_{method.lower()}_{endpoint.strip('/').replace('/', '_').replace('{', '').replace('}', '')}"
-        print(test_name)
-        test_cases += f"- {test_name}: {method} {endpoint} => Expected {expected_status}\n"
+    for endpoint, response in fetch_get_endpoints(api_tests, fastapi_url).items():
+        encoder.add_context(endpoint, response)
 
-        if body_required:
-            test_cases += f"  Request Body: {body_example}\n"
-            test_cases += f" Description: {descriptions}\n"
-            test_cases += f" Categories : {categories}\n"
-
-        print(test_cases)
-
-    additional_context = fetch_get_endpoints(api_tests, fastapi_url)
+    test_cases = encoder.operations_section()
+    schemas_context = encoder.schemas_section()
+    additional_context = encoder.context_section()
 
     source_code_context = ""
 
@@ -578,15 +1336,48 @@ def generate_dynamic_prompt(fastapi_url, source_contents=None):
         for file_path, content in source_contents.items():
             source_code_context += f"# File: {file_path}\n{content[:500]}...\n\n"
 
-    print(source_code_context)
+    probe_context = ""
+    if probe_summary:
+        probe_context = ("\n\n### Probed Behaviour (observed from the live API; boundary tests for these edges "
+                         "are generated separately):\n" + probe_summary + "\n")
+
+    if baseline_count:
+        coverage_requirements = f"""10. {baseline_count} baseline tests named `test_baseline_*` are generated without you and appended to this file.
+                They already cover: one test per categorical value, invalid categorical values, minimum/maximum/zero/negative/extremely
+                large numeric values, {strength}-wise combinations of categorical and numeric values, and the declared status code
+                of every endpoint.
+            11. Do NOT write tests for single categorical values, invalid categorical values or single numeric boundaries.
+            12. Write only tests that need understanding of the API: assertions on response content for inputs that change the
+                outcome (e.g. the score for a high-risk location with a large amount), realistic data derived from the context, and
+                flows across endpoints (create then read back).
+            13. Generate at least **5+ such test cases** for APIs with categorical data."""
+    else:
+        coverage_requirements = f"""10. If a request body schema has **categorical values** (its "categories"), generate:
+                - Generate a **separate test case for each possible categorical value**.  
+                - Create tests covering **combinations of multiple categorical values**, where applicable, using exactly the rows listed under "Combinations" (a covering array; do not add other combinations).  
+                - Validate behavior against **invalid or out-of-scope categorical values**.  
+            11. Extract categorical values from categories (e.g., "City" may include **Bangalore, Pune, Kolkata, etc.**)  
+                - **Each value must be tested individually.**
+                - **Also, test for invalid categorical values** (e.g., random strings, out-of-scope values).  
 
-    GENERATION_PROMPT = f"""
+            12. To maximize test coverage, further expand the test scenarios by integrating quantitative values (e.g., numerical data) alongside categorical values. Expand **numerical test cases** for fields like "Distance" by covering:
+                - **Minimum allowed value**
+                - **Maximum allowed value**
+                - **Negative values**
+                - **Zero**
+                - **Extremely large values**  
+
+            13. Generate at least **5+ test cases** for APIs with categorical data to ensure proper validation."""
+
+    def render(test_cases, schemas_context, additional_context, source_code_context, probe_context):
+        return f"""
             You are a highly skilled AI specializing in writing robust API test cases using pytest. Your task is to generate a complete and executable Python test file based on the following requirements:
             Below is a skeleton of our test file using pytest. Fill in the 'test_functions'
             placeholder with tests for the following real API behavior:
 
             {test_cases}
-            {source_code_context}
+            {schemas_context}
+            {additional_context}{source_code_context}{probe_context}
 
             Requirements:
             1. Only return valid Python code, wrapped in triple backticks (no extra commentary).
@@ -594,53 +1385,79 @@ def generate_dynamic_prompt(fastapi_url, source_contents=None):
             3. Provide all tests in place of {{test_functions}}.
             4. Each test asserts the correct status code (and JSON if needed).
             5. The final output should be a complete Python file that can run under pytest.
-            6. In the {test_cases} there is a request body. Instead of filling "sample_field_name" in the field value, understand the context from {additional_context} and generate and fill meaning ful mock data to test.
+            6. Operations with a request body name its schema under "Request Body Schemas". Instead of filling "sample_field_name" in the field value, understand the context from "Existing Data" and generate and fill meaning ful mock data to test.
             7. The mock data generated should be completely unique and different from data which already exists in the DB. 
             9. Strictly Do not modify any existing data. The CRUD operations should be performed on data which does not already exist in DB.
-            10. If an API schema includes **categorical values**  field of {test_cases}, generate:
-                - Generate a **separate test case for each possible categorical value**.  
-                - Create tests covering **combinations of multiple categorical values**, where applicable.  
-                - Validate behavior against **invalid or out-of-scope categorical values**.  
-            11. Extract categorical values from categories (e.g., "City" may include **Bangalore, Pune, Kolkata, etc.**)  
-                - **Each value must be tested individually.**
-                - **Also, test for invalid categorical values** (e.g., random strings, out-of-scope values).  
-
-            12. To maximize test coverage, further expand the test scenarios by integrating quantitative values (e.g., numerical data) alongside categorical values. Expand **numerical test cases** for fields like "Distance" by covering:
-                - **Minimum allowed value**
-                - **Maximum allowed value**
-                - **Negative values**
-                - **Zero**
-                - **Extremely large values**  
-
-            13. Generate at least **5+ test cases** for APIs with categorical data to ensure proper validation.
+            {coverage_requirements}
             14. Enclose all property name in double quotes for the json payload to post. 
             15. Do not assume any negative scenarios and assert them to failed response code. Such as amount being negative.
             16. Mock Data Generation:
                    - Use the `Faker()` Python library compulsory for generating unique and realistic test data.
                    - The generated data **must not exist** in the database to prevent conflicts.
-                   - Derive meaningful values for request body fields based on `{additional_context}` instead of using placeholder names like `"sample_field_name"`. 
+                   - Derive meaningful values for request body fields based on "Existing Data" instead of using placeholder names like `"sample_field_name"`. 
+            17. Keep the `ApiClient` class and the session-scoped `api_client` fixture from the skeleton unchanged. Every test takes
+                `api_client` as a parameter and sends requests with a path only, e.g. `api_client.post("/fraud-score/", json=payload)`.
+                Never call `requests.get/post/...` directly or prepend BASE_URL; the fixture reuses one pooled keep-alive connection.
             Skeleton:
             ```python
             {TEST_TEMPLATE}"""
 
+    # Operations and schemas are sent whole; harvested GET data goes first, then source code, then probes
+    sections = [
+        ("operations", test_cases, None),
+        ("schemas", schemas_context, None),
+        ("existing data", additional_context, 1),
+        ("source code", source_code_context, 2),
+        ("probes", probe_context, 3),
+    ]
+    instructions = METER.estimate(render("", "", "", "", "")) + METER.estimate(SYSTEM_PROMPT)
+    try:
+        texts, tokens = fit_sections(sections, PROMPT_TOKEN_BUDGET - instructions)
+    except PromptTooLarge as e:
+        return f"ERROR: {e}. Generate with stream=true and a smaller stream_batch."
+
+    GENERATION_PROMPT = render(texts["operations"], texts["schemas"], texts["existing data"],
+                               texts["source code"], texts["probes"])
+    trimmed = [name for name, text, _ in sections if texts[name] != text]
+    report_prompt_tokens({**tokens, "instructions": instructions}, trimmed)
     return GENERATION_PROMPT
 
 
+def report_prompt_tokens(tokens, trimmed=()):
+    """Prints the estimated token count of each prompt section against the budget."""
+    total = sum(tokens.values())
+    print(f"Prompt tokens (estimated): {total} of {PROMPT_TOKEN_BUDGET} - "
+          + ", ".join(f"{name} {count}" for name, count in tokens.items())
+          + (f"; trimmed to fit: {', '.join(trimmed)}" if trimmed else ""))
+
+
 # -----------------------------------------------------------------------------
 #  call_ollama: Sends a prompt to an LLM via OpenRouter
 # -----------------------------------------------------------------------------
+LLM_MODEL = 'qwen2.5-coder:7b'  # You can change this to your preferred model
+SYSTEM_PROMPT = (
+    "You are an AI that generates or updates an API test plan or code "
+    "based on user instructions. Reply with well-structured text or code. "
+    "Do NOT include extra commentary outside code blocks."
+)
+
+
 def call_ollama(prompt: str) -> str:
+    """
+    Refuses prompts over PROMPT_TOKEN_BUDGET instead of letting the model silently
+    drop their beginning, and records token counts and throughput in METER.
+    """
+    estimated = METER.estimate(SYSTEM_PROMPT) + METER.estimate(prompt)
+    if estimated > PROMPT_TOKEN_BUDGET:
+        return f"ERROR: Prompt of about {estimated} tokens exceeds the prompt budget of {PROMPT_TOKEN_BUDGET}"
+    start = time.perf_counter()
     try:
         response = ollama.chat(
-            model='qwen2.5-coder:7b',  # You can change this to your preferred model
+            model=LLM_MODEL,
             messages=[
                 {
                     'role': 'system',
-                    'content': (
-                        "You are an AI that generates or updates an API test plan or code "
-                        "based on user instructions. Reply with well-structured text or code. "
-                        "Do NOT include extra commentary outside code blocks."
-                    )
+                    'content': SYSTEM_PROMPT
                 },
                 {
                     'role': 'user',
@@ -648,14 +1465,30 @@ def call_ollama(prompt: str) -> str:
                 }
             ],
             options={
-                'temperature': 0.0
+                'temperature': 0.0,
+                'num_ctx': LLM_CONTEXT_TOKENS
             }
         )
+        record_llm_call(response, estimated, time.perf_counter() - start)
         return response['message']['content'].strip()
     except Exception as e:
         return f"ERROR: Ollama request failed: {e}"
 
 
+def record_llm_call(response, estimated, seconds):
+    def seconds_of(key):
+        nanoseconds = response.get(key)
+        return nanoseconds / 1e9 if nanoseconds else None
+
+    call = METER.record(estimated, response.get('prompt_eval_count'), response.get('eval_count'),
+                        seconds_of('prompt_eval_duration'), seconds_of('eval_duration'), seconds, LLM_MODEL)
+    print(f"LLM call: {call['prompt_tokens']} prompt tokens (estimated {estimated}), "
+          f"{call['completion_tokens']} completion tokens, {call['completion_tokens_per_second']} tokens/s, "
+          f"{call['total_seconds']}s")
+    if call['prompt_tokens'] and call['prompt_tokens'] >= LLM_CONTEXT_TOKENS:
+        print(f"Warning: the prompt filled the {LLM_CONTEXT_TOKENS}-token context and was truncated by the model")
+
+
 # -----------------------------------------------------------------------------
 #  extract_code_from_response
 # -----------------------------------------------------------------------------
@@ -667,6 +1500,106 @@ def extract_code_from_response(llm_response: str) -> str:
     return llm_response.strip()
 
 
+# -----------------------------------------------------------------------------
+#  use_shared_client: route bare requests.<verb>(BASE_URL + ...) calls through
+#  the pooled keep-alive client from the templates
+# -----------------------------------------------------------------------------
+HTTP_VERBS = "get|post|put|patch|delete|head|options"
+BARE_CONCAT_CALL = re.compile(rf"\brequests\.({HTTP_VERBS})\(\s*BASE_URL\s*\+\s*")
+BARE_FSTRING_CALL = re.compile(rf"\brequests\.({HTTP_VERBS})\(\s*f([\"'])\{{BASE_URL\}}")
+
+
+def rewrite_bare_calls(code):
+    rewritten = BARE_CONCAT_CALL.sub(r"api_client.\1(", code)
+    return BARE_FSTRING_CALL.sub(r"api_client.\1(f\2", rewritten)
+
+
+def is_fixture(node):
+    return any("fixture" in ast.unparse(decorator) for decorator in node.decorator_list)
+
+
+def client_functions(tree):
+    """
+    (node, is_method) for the functions pytest calls with fixtures: test functions,
+    test methods and fixtures. Helpers are called by the tests with their own arguments.
+    """
+    for node, is_method in test_function_nodes(tree):
+        if node.name.startswith("test") or is_fixture(node):
+            yield node, is_method
+
+
+def use_shared_client(code: str, as_fixture: bool = True) -> str:
+    """
+    Rewrites bare `requests.<verb>(BASE_URL + ...)` calls to `api_client.<verb>(...)`.
+    With `as_fixture` only tests and fixtures are rewritten, and they get an
+    `api_client` parameter (pytest session fixture); helpers keep their calls,
+    since their callers would not pass a client. Otherwise a module-level client
+    is used everywhere (Behave steps). The client setup is injected if the LLM left it out.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code
+
+    if as_fixture:
+        lines = code.splitlines()
+        for node, _ in sorted(client_functions(tree), key=lambda item: item[0].lineno, reverse=True):
+            body = "\n".join(lines[node.lineno - 1:node.end_lineno])
+            lines[node.lineno - 1:node.end_lineno] = rewrite_bare_calls(body).splitlines()
+        rewritten = "\n".join(lines)
+    else:
+        rewritten = rewrite_bare_calls(code)
+    if "api_client." not in rewritten:
+        return code
+
+    try:
+        tree = ast.parse(rewritten)
+    except SyntaxError:
+        return code
+
+    lines = rewritten.splitlines()
+    defines_client = any(
+        isinstance(node, (ast.FunctionDef, ast.Assign)) and (
+            getattr(node, "name", None) == "api_client" or
+            any(isinstance(t, ast.Name) and t.id == "api_client" for t in getattr(node, "targets", []))
+        )
+        for node in tree.body
+    )
+
+    if as_fixture:
+        for node, is_method in client_functions(tree):
+            arg_names = [a.arg for a in node.args.args]
+            if node.name == "api_client" or "api_client" in arg_names:
+                continue
+            body = "\n".join(lines[node.lineno - 1:node.end_lineno])
+            if "api_client." not in body:
+                continue
+            line = lines[node.lineno - 1]
+            if is_method and arg_names:
+                lines[node.lineno - 1] = re.sub(rf"(def\s+{node.name}\s*\(\s*{arg_names[0]})",
+                                                r"\1, api_client", line, count=1)
+            else:
+                separator = ", " if arg_names or node.args.vararg or node.args.kwarg or node.args.kwonlyargs else ""
+                lines[node.lineno - 1] = re.sub(rf"(def\s+{node.name}\s*\()",
+                                                rf"\1api_client{separator}", line, count=1)
+
+    if not defines_client:
+        setup = CLIENT_IMPORTS + ("import pytest\n" if as_fixture else "import atexit\n") + CLIENT_SETUP
+        setup += CLIENT_FIXTURE if as_fixture else STEP_CLIENT
+        if "BASE_URL =" not in rewritten:
+            setup = setup.replace("REQUEST_TIMEOUT =",
+                                  f"BASE_URL = os.getenv('TEST_API_URL', {FASTAPI_URL!r})\nREQUEST_TIMEOUT =", 1)
+        first_def = next((node for node in tree.body
+                          if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))), None)
+        if first_def is not None:
+            at = min([first_def.lineno] + [d.lineno for d in first_def.decorator_list]) - 1
+        else:
+            at = len(lines)
+        lines[at:at] = setup.splitlines() + ["", ""]
+
+    return "\n".join(lines) + "\n"
+
+
 # -----------------------------------------------------------------------------
 #  plan
 # -----------------------------------------------------------------------------
@@ -675,31 +1608,54 @@ def generate_plan():
     plan = call_ollama(PLAN_PROMPT)
     print(plan)
     print("\n----- End of Test Plan -----\n")
+    return plan
 
 
 # -----------------------------------------------------------------------------
 #  generate pytest
 # -----------------------------------------------------------------------------
-def generate_test_code_pytest(fastapi_url, source_contents):
+def generate_test_code_pytest(fastapi_url, source_contents, baseline=True, strength=2, must_include=None,
+                              probe=False, api_tests=None, output_file=None, llm=None):
+    """
+    With `baseline`, the mechanical cases come from generate_baseline_tests() and the
+    LLM is only asked for the semantic ones; both end up in generated_tests.py.
+    Combination tests follow a `strength`-wise covering array either way. With
+    `probe`, POST endpoints are probed first and boundary tests at the discovered
+    edges are added. `api_tests`, `output_file` and `llm` override the scenarios
+    extracted from `fastapi_url`, generated_tests.py and call_ollama.
+    """
+    llm = llm or call_ollama
     try:
-        dynamic_prompt = generate_dynamic_prompt(fastapi_url, source_contents)
+        if api_tests is None:
+            api_tests = extract_fastapi_routes(fastapi_url)
+        baseline_code = generate_baseline_tests(api_tests, strength, must_include) if baseline else ""
+        baseline_count = len(baseline_test_names(baseline_code))
+        findings = probe_scenarios(fastapi_url, api_tests) if probe else {}
+        probe_code = generate_probe_tests(api_tests, findings, include_helpers=not baseline_code) if findings else ""
+        dynamic_prompt = generate_dynamic_prompt(fastapi_url, source_contents, api_tests, baseline_count,
+                                                 strength, must_include, summarize_findings(findings))
 
         if dynamic_prompt.startswith("ERROR:"):
             return {"error": dynamic_prompt}
 
-        raw_response = call_ollama(dynamic_prompt)
+        raw_response = llm(dynamic_prompt)
         if raw_response.startswith("ERROR:"):
             return {"error": raw_response}
 
         python_code = extract_code_from_response(raw_response)
         if not python_code:
             return {"error": "No test code generated by LLM"}
+        for extra_code in (baseline_code, probe_code):
+            if extra_code:
+                python_code = python_code.rstrip() + "\n\n" + extra_code
+        python_code = use_shared_client(python_code)
 
-        output_file = "generated_tests.py"
+        output_file = output_file or "generated_tests.py"
         try:
             with open(output_file, "w", encoding="utf-8") as f:
                 f.write(python_code)
-            return {"file_content": python_code}
+            return {"file_content": python_code, "baseline_tests": baseline_count,
+                    "probes": sum(result.get("probes", 0) for result in findings.values())}
 
         except OSError as e:
             return {"error": f"Could not write to {output_file}: {e}"}
@@ -708,9 +1664,270 @@ def generate_test_code_pytest(fastapi_url, source_contents):
         return {"error": f"Internal server error: {str(e)}"}
 
 
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def defined_names(node):
+    """Names a module-level statement binds (imports, assignments, defs, classes)."""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return [(alias.asname or alias.name).split(".")[0] for alias in node.names]
+    targets = node.targets if isinstance(node, ast.Assign) else \
+        [node.target] if isinstance(node, (ast.AnnAssign, ast.AugAssign)) else []
+    return [name.id for target in targets for name in ast.walk(target) if isinstance(name, ast.Name)]
+
+
+def is_test_node(node):
+    return (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")) or \
+        (isinstance(node, ast.ClassDef) and node.name.startswith("Test"))
+
+
+def is_definition(node):
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+
+
+def rename_names(code, renames):
+    """`code` with every definition, use and parameter named in `renames` ({old: new}) renamed."""
+    lines = code.splitlines()
+    spots = []
+    for node in ast.walk(ast.parse(code)):
+        if isinstance(node, ast.Name) and node.id in renames:
+            spots.append((node.lineno, node.col_offset, node.id))
+        elif isinstance(node, ast.arg) and node.arg in renames:
+            spots.append((node.lineno, node.col_offset, node.arg))
+        elif is_definition(node) and node.name in renames:
+            line = lines[node.lineno - 1].encode("utf-8")
+            match = re.search(rb"\b(?:def|class)\s+(%s)\b" % node.name.encode("utf-8"), line)
+            spots.append((node.lineno, match.start(1), node.name))
+    # ast columns are UTF-8 byte offsets
+    for lineno, column, name in sorted(spots, reverse=True):
+        line, old, new = (text.encode("utf-8") for text in (lines[lineno - 1], name, renames[name]))
+        lines[lineno - 1] = (line[:column] + new + line[column + len(old):]).decode("utf-8")
+    return "\n".join(lines)
+
+
+def new_module_code(code, taken):
+    """
+    What `code` adds to a test file whose module-level names are `taken` ({name:
+    ast dump of the statement binding it}, updated), for appending to it. Returns
+    (code, {old: new} renames, dropped names). Tests, and helpers, fixtures and
+    classes that differ from the file's definition of the same name, are renamed
+    together with their uses in `code`. Imports and assignments of names the file
+    already has are left out; those that differ from the file's are `dropped`.
+    """
+    tree = ast.parse(code)
+    batch_names = {name for node in tree.body for name in defined_names(node)}
+    renames = {}
+    for node in tree.body:
+        if is_definition(node) and node.name in taken and (is_test_node(node) or taken[node.name] != ast.dump(node)):
+            unique, index = node.name, 2
+            while unique in taken or unique in batch_names or unique in renames.values():
+                unique, index = f"{node.name}_{index}", index + 1
+            renames[node.name] = unique
+    if renames:
+        code = rename_names(code, renames)
+        tree = ast.parse(code)
+
+    lines = code.splitlines()
+    blocks, dropped = [], []
+    for node in tree.body:
+        names = defined_names(node)
+        if not names:
+            continue
+        if all(name in taken for name in names):
+            if not is_definition(node) and any(taken[name] != ast.dump(node) for name in names):
+                dropped.extend(names)
+            continue
+        start, end = node_span(node) if hasattr(node, "decorator_list") else (node.lineno, node.end_lineno)
+        taken.update((name, ast.dump(node)) for name in names)
+        blocks.append("\n".join(lines[start - 1:end]))
+    return "\n\n\n".join(blocks), renames, dropped
+
+
+def generate_test_code_pytest_streaming(fastapi_url, source_contents, baseline=True, strength=2, must_include=None,
+                                        batch_size=50, spec_path=None, output_file=None, llm=None):
+    """
+    For specs too large to load at once: operations are streamed from the spec
+    (see stream_fastapi_routes) and sent to the LLM `batch_size` at a time, so
+    generation starts while the rest of the spec is still being parsed. Each
+    batch is appended to generated_tests.py as soon as it is ready; the first
+    batch supplies the file header, later ones their tests, their helpers and
+    fixtures (renamed where an earlier batch defined the name differently) and
+    whatever imports and module-level values the file does not have yet.
+    """
+    llm = llm or call_ollama
+    output_file = output_file or GENERATED_TESTS_FILE
+    operations = batches = baseline_count = 0
+    taken = {}
+    renamed, dropped = [], []
+    try:
+        with open(output_file, "w", encoding="utf-8") as f:
+            for batch in batched(stream_fastapi_routes(fastapi_url, spec_path), batch_size):
+                baseline_code = generate_baseline_tests(batch, strength, must_include) if baseline else ""
+                batch_baseline = len(baseline_test_names(baseline_code))
+                dynamic_prompt = generate_dynamic_prompt(fastapi_url, source_contents, batch, batch_baseline,
+                                                         strength, must_include)
+                if dynamic_prompt.startswith("ERROR:"):
+                    return {"error": dynamic_prompt, "operations": operations}
+
+                raw_response = llm(dynamic_prompt)
+                if raw_response.startswith("ERROR:"):
+                    return {"error": raw_response, "operations": operations}
+
+                python_code = extract_code_from_response(raw_response)
+                if not python_code:
+                    return {"error": f"No test code generated by LLM for operations {operations + 1}-"
+                                     f"{operations + len(batch)}", "operations": operations}
+                if baseline_code:
+                    python_code = python_code.rstrip() + "\n\n" + baseline_code
+                python_code = use_shared_client(python_code)
+                if batches:
+                    python_code, batch_renames, batch_dropped = new_module_code(python_code, taken)
+                    renamed.extend(f"{old} -> {new}" for old, new in batch_renames.items()
+                                   if not old.startswith(("test", "Test")))
+                    dropped.extend(batch_dropped)
+                else:
+                    taken.update((name, ast.dump(node)) for node in ast.parse(python_code).body
+                                 for name in defined_names(node))
+
+                f.write(python_code.rstrip() + "\n\n\n")
+                f.flush()
+                operations += len(batch)
+                batches += 1
+                baseline_count += batch_baseline
+                print(f"Generated tests for {operations} operations ({batches} batches)")
+
+        # Helpers and fixtures a later batch redefined differently, and module-level
+        # values it could not add because an earlier batch already set them
+        return {"file": output_file, "operations": operations, "batches": batches,
+                "baseline_tests": baseline_count, "renamed": renamed, "dropped": list(dict.fromkeys(dropped))}
+
+    except Exception as e:
+        return {"error": f"Internal server error: {str(e)}", "operations": operations}
+
+
+def service_names(services):
+    """A unique directory-safe name per service: its `name`, spec file name or host:port."""
+    names = []
+    for service in services:
+        label = service.name or (os.path.splitext(os.path.basename(service.spec_path))[0] if service.spec_path
+                                 else re.sub(r"^\w+://", "", service.fastapi_url or ""))
+        base = re.sub(r"[^\w.-]+", "_", label).strip("_.") or "service"
+        name, index = base, 2
+        while name in names:
+            name, index = f"{base}_{index}", index + 1
+        names.append(name)
+    return names
+
+
+def generate_service(service, name, request, pool):
+    """One service of a /generate/batch call; LLM calls go through the shared `pool`."""
+    start = time.perf_counter()
+    timings = {}
+    result = {"name": name, "fastapi_url": service.fastapi_url, "spec_path": service.spec_path}
+    try:
+        if not service.fastapi_url and not service.spec_path:
+            raise ValueError("Provide fastapi_url or spec_path")
+        output_dir = os.path.join(request.output_dir, name)
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, GENERATED_TESTS_FILE)
+        options = {"baseline": request.baseline, "strength": request.strength,
+                   "output_file": output_file, "llm": pool.client(name)}
+
+        if request.stream:
+            if service.spec_path and is_yaml_file(service.spec_path):
+                raise ValueError("stream needs a JSON specification; YAML files are loaded whole")
+            fastapi_url = (service.fastapi_url or FASTAPI_URL).rstrip('/')
+            outcome = generate_test_code_pytest_streaming(fastapi_url, None, batch_size=request.stream_batch,
+                                                          spec_path=service.spec_path, **options)
+        else:
+            # Scenarios are extracted here rather than through OPENAPI_CACHE, which is keyed by URL
+            spec_start = time.perf_counter()
+            if service.spec_path:
+                openapi_data = load_openapi_file(service.spec_path)
+                fastapi_url = (service.fastapi_url or spec_base_url(openapi_data)).rstrip('/')
+            else:
+                fastapi_url = service.fastapi_url.rstrip('/')
+                openapi_data = load_openapi_spec(fastapi_url, refresh=True)
+            if not isinstance(openapi_data, dict) or not openapi_data:
+                raise ValueError("Empty OpenAPI specification received")
+            api_tests = list(iter_fastapi_routes(openapi_data))
+            if not api_tests:
+                raise ValueError("No valid API endpoints found to test")
+            timings["spec_seconds"] = round(time.perf_counter() - spec_start, 3)
+            outcome = generate_test_code_pytest(fastapi_url, None, api_tests=api_tests, **options)
+            outcome.pop("file_content", None)
+            if "error" not in outcome:
+                outcome["file"] = output_file
+        result.update(outcome)
+        result["fastapi_url"] = fastapi_url
+    except Exception as e:
+        result["error"] = str(e)
+    timings["total_seconds"] = round(time.perf_counter() - start, 3)
+    timings["llm"] = pool.service_stats(name)
+    result["timings"] = timings
+    return result
+
+
+def generate_services(request):
+    names = service_names(request.services)
+    # Resolve call_ollama per call so a replaced LLM backend is picked up
+    pool = LLMPool(lambda prompt: call_ollama(prompt), request.llm_workers)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=request.service_workers) as executor:
+            results = list(executor.map(lambda args: generate_service(*args, request, pool),
+                                        zip(request.services, names)))
+    finally:
+        pool.shutdown()
+    return {
+        "services": results,
+        "succeeded": sum(1 for result in results if "error" not in result),
+        "failed": sum(1 for result in results if "error" in result),
+        "total_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
 # -----------------------------------------------------------------------------
 #  run
 # -----------------------------------------------------------------------------
+GENERATED_TESTS_FILE = "generated_tests.py"
+FAILURE_HEADER = re.compile(r"^_{3,} (.+?) _{3,}$", re.MULTILINE)
+SECTION_HEADER = re.compile(r"^={3,} .*? ={3,}$", re.MULTILINE)
+
+
+def parse_failure_traces(output):
+    """
+    Splits the FAILURES section of pytest output into {node_id: trace}.
+    Headers read `TestClass.test_name[param]`, node IDs `TestClass::test_name[param]`.
+    """
+    start = re.search(r"^={3,} FAILURES ={3,}$", output, re.MULTILINE)
+    if not start:
+        return {}
+    section = output[start.end():]
+    end = SECTION_HEADER.search(section)
+    if end:
+        section = section[:end.start()]
+
+    traces = {}
+    headers = list(FAILURE_HEADER.finditer(section))
+    for i, header in enumerate(headers):
+        name, bracket, params = header.group(1).partition("[")
+        node_id = name.replace(".", "::") + bracket + params
+        body_end = headers[i + 1].start() if i + 1 < len(headers) else len(section)
+        traces[node_id] = section[header.end():body_end].strip()
+    return traces
+
+
 def parse_json(output):
     test_session = {"total_tests": 0,
                     "passed_tests": 0,
@@ -726,18 +1943,56 @@ def parse_json(output):
 
     if (test_session['failed_tests']):
         test_session["failed_test_names"] = re.findall(r'generated_tests.py::(\S+)\sFAILED', output)
+        test_session["failure_traces"] = parse_failure_traces(output)
 
     return test_session
 
 
-def run_tests():
+TRAFFIC_FILE = "recorded_traffic.jsonl"
+CASSETTE_FILE = "generated_tests.cassette.json"
+
+
+def recorder_env(**variables):
+    """Environment for a pytest subprocess loading the traffic_recorder plugin from this folder."""
+    env = dict(os.environ)
+    env.update(variables)
+    plugin_dir = os.path.dirname(os.path.abspath(__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [plugin_dir, env.get("PYTHONPATH")]))
+    return env
+
+
+def record_traffic(test_file=GENERATED_TESTS_FILE, traffic_file=TRAFFIC_FILE):
+    """
+    Runs the generated tests once with the traffic_recorder plugin, writing every
+    request they send to `traffic_file`. Returns the run summary.
+    """
+    env = recorder_env(**{TRAFFIC_ENV: os.path.abspath(traffic_file)})
+    process = subprocess.run(['pytest', test_file, '-v', '-p', 'traffic_recorder'],
+                             capture_output=True, text=True, env=env)
+    return parse_json(process.stdout)
+
+
+def run_tests(node_ids=None, cassette_mode=None, cassette_file=CASSETTE_FILE):
+    """
+    Runs the generated suite, or only the given node IDs (e.g. `test_x[1]`, `TestC::test_y`).
+    With `cassette_mode="record"` responses are saved to `cassette_file`; with
+    "replay" they are served from it offline and unrecorded requests fail.
+    """
     print("\n----- Running the generated tests with pytest -----\n")
+    targets = [f"{GENERATED_TESTS_FILE}::{node_id}" for node_id in node_ids] if node_ids else [GENERATED_TESTS_FILE]
+    command = ['pytest', *targets, '-v', '--tb=short']
+    # Records the suite creates are tagged with this ID and removed by its api_client cleanup
+    run_id = uuid.uuid4().hex
+    env = dict(os.environ, TEST_RUN_ID=run_id)
+    if cassette_mode:
+        command += ['-p', 'traffic_recorder']
+        env = recorder_env(TEST_RUN_ID=run_id, **{CASSETTE_ENV: os.path.abspath(cassette_file),
+                                                  CASSETTE_MODE_ENV: cassette_mode})
     try:
-        output = subprocess.check_output(['pytest', 'generated_tests.py', '-v'], text=True)
-        return parse_json(output)
-
+        output = subprocess.check_output(command, text=True, env=env)
     except subprocess.CalledProcessError as e:
-        return parse_json(e.output)
+        output = e.output
+    return {**parse_json(output), "run_id": run_id}
 
 
 # -----------------------------------------------------------------------------
@@ -756,8 +2011,334 @@ def handle_feedback(user_feedback: str):
         {TEST_TEMPLATE}
         ```
         Insert your changes in {{test_functions}}, produce valid Python code in triple backticks.
+        Send every request through the `api_client` fixture with a path only, never `requests.<verb>(BASE_URL + ...)`.
     """
 
     response = call_ollama(prompt_text)
     print(response)
     print("\n----- End of Feedback Response -----\n")
+    return response
+
+
+# -----------------------------------------------------------------------------
+#  reflect: fix only the failing tests in place
+# -----------------------------------------------------------------------------
+def function_name(node_id):
+    return node_id.split("[", 1)[0].split("::")[-1]
+
+
+def test_function_nodes(tree):
+    """Yields (node, is_method) for module-level test functions and test class methods."""
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node, False
+        elif isinstance(node, ast.ClassDef):
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    yield child, True
+
+
+def node_span(node):
+    start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+    return start, node.end_lineno
+
+
+def extract_test_sources(code, names):
+    """Returns {function_name: source} for the named test functions in `code`."""
+    lines = code.splitlines()
+    sources = {}
+    for node, _ in test_function_nodes(ast.parse(code)):
+        if node.name in names:
+            start, end = node_span(node)
+            sources[node.name] = textwrap.dedent("\n".join(lines[start - 1:end]))
+    return sources
+
+
+def patch_test_functions(code, fixed_code):
+    """
+    Replaces functions in `code` with same-named ones from `fixed_code`, keeping their
+    original indentation, and adds any imports `fixed_code` introduces.
+    Returns (patched_code, patched_names).
+    """
+    fixed_tree = ast.parse(fixed_code)
+    fixed_lines = fixed_code.splitlines()
+    replacements = {}
+    for node, _ in test_function_nodes(fixed_tree):
+        start, end = node_span(node)
+        replacements[node.name] = textwrap.dedent("\n".join(fixed_lines[start - 1:end]))
+
+    lines = code.splitlines()
+    patched = []
+    spans = sorted(((node_span(node), node) for node, _ in test_function_nodes(ast.parse(code))
+                    if node.name in replacements), key=lambda item: item[0][0], reverse=True)
+    for (start, end), node in spans:
+        indent = " " * node.col_offset
+        lines[start - 1:end] = textwrap.indent(replacements[node.name], indent).splitlines()
+        patched.append(node.name)
+
+    existing_imports = {line.strip() for line in lines if line.startswith(("import ", "from "))}
+    new_imports = [fixed_lines[node.lineno - 1].strip() for node in fixed_tree.body
+                   if isinstance(node, (ast.Import, ast.ImportFrom))
+                   and fixed_lines[node.lineno - 1].strip() not in existing_imports]
+    if new_imports and patched:
+        lines[0:0] = new_imports
+
+    return "\n".join(lines) + "\n", patched[::-1]
+
+
+def reflect_on_failures(failure_traces, test_file=GENERATED_TESTS_FILE):
+    """
+    Sends only the failing tests' source and traces to the LLM and patches the
+    returned functions into `test_file` in place.
+    """
+    print("\n----- Reflecting on failing tests with LLM -----\n")
+    try:
+        with open(test_file, "r", encoding="utf-8") as f:
+            code = f.read()
+        names = {function_name(node_id) for node_id in failure_traces}
+        sources = extract_test_sources(code, names)
+    except (OSError, SyntaxError) as e:
+        return {"error": f"Could not read {test_file}: {e}"}
+
+    if not sources:
+        return {"error": "None of the failing tests were found in the test file"}
+
+    failing = ""
+    for name, source in sources.items():
+        traces = "\n\n".join(trace for node_id, trace in failure_traces.items() if function_name(node_id) == name)
+        failing += f"### {name}\n```python\n{source}\n```\nFailure:\n```\n{traces}\n```\n\n"
+
+    prompt_text = f"""
+        The following pytest functions failed against the live API. Each is shown with its failure trace.
+
+        {failing}
+        Fix each function so it asserts the API's actual, correct behaviour.
+        Return ONLY the corrected functions, keeping their names, decorators and the `api_client` fixture parameter,
+        plus any new import lines they need, in a single block of triple backticks. Do not return other tests.
+    """
+
+    raw_response = call_ollama(prompt_text)
+    if raw_response.startswith("ERROR:"):
+        return {"error": raw_response}
+
+    try:
+        patched_code, patched = patch_test_functions(code, extract_code_from_response(raw_response))
+    except SyntaxError as e:
+        return {"error": f"LLM returned invalid Python: {e}"}
+
+    patched_code = use_shared_client(patched_code)
+    try:
+        with open(test_file, "w", encoding="utf-8") as f:
+            f.write(patched_code)
+    except OSError as e:
+        return {"error": f"Could not write to {test_file}: {e}"}
+
+    return {"patched_tests": patched, "unpatched_tests": sorted(names - set(patched))}
+
+
+# -----------------------------------------------------------------------------
+#  test impact: map tests to the OpenAPI operations they call and run only
+#  the tests affected by changed routes
+# -----------------------------------------------------------------------------
+def list_operations(openapi_data):
+    """Returns {"METHOD /path": operation} including path-level parameters."""
+    operations = {}
+    for path, methods in (openapi_data or {}).get("paths", {}).items():
+        if not isinstance(methods, dict):
+            continue
+        for method, details in methods.items():
+            if method.lower() in ['get', 'post', 'put', 'delete', 'patch']:
+                operations[f"{method.upper()} {path}"] = {"parameters": methods.get("parameters"), **details}
+    return operations
+
+
+def resolve_refs(node, openapi_data, seen=()):
+    """Inlines local `$ref`s so that a changed component schema changes every operation using it."""
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/"):
+            if ref in seen:
+                return {"$ref": ref}
+            target = openapi_data
+            for part in ref[2:].split("/"):
+                target = target.get(part, {}) if isinstance(target, dict) else {}
+            return resolve_refs(target, openapi_data, seen + (ref,))
+        return {key: resolve_refs(value, openapi_data, seen) for key, value in node.items()}
+    if isinstance(node, list):
+        return [resolve_refs(item, openapi_data, seen) for item in node]
+    return node
+
+
+def diff_openapi_specs(old_spec, new_spec):
+    """Returns the operation keys that were added, removed or changed between two specs."""
+    old_ops = list_operations(old_spec)
+    new_ops = list_operations(new_spec)
+    changed = set()
+    for key in old_ops.keys() | new_ops.keys():
+        if key not in old_ops or key not in new_ops:
+            changed.add(key)
+            continue
+        old = json.dumps(resolve_refs(old_ops[key], old_spec), sort_keys=True, default=str)
+        new = json.dumps(resolve_refs(new_ops[key], new_spec), sort_keys=True, default=str)
+        if old != new:
+            changed.add(key)
+    return changed
+
+
+def path_pattern(template):
+    parts = re.split(r"(\{[^}]+\})", template.rstrip("/"))
+    return re.compile("^" + "".join("[^/]+" if part.startswith("{") else re.escape(part) for part in parts) + "/?$")
+
+
+def literal_segments(template):
+    return sum(1 for segment in template.strip("/").split("/") if segment and not segment.startswith("{"))
+
+
+def match_operation(method, path, operations):
+    """
+    Finds the operation key a concrete (or partly dynamic) path resolves to; the
+    template with the most literal segments wins (`/transactions/bulk` over
+    `/transactions/{id}`).
+    """
+    path = path.split("?", 1)[0]
+    candidates = [key for key in operations
+                  if (method is None or key.split(" ", 1)[0] == method.upper())
+                  and path_pattern(key.split(" ", 1)[1]).match(path)]
+    return max(candidates, key=lambda key: literal_segments(key.split(" ", 1)[1]), default=None)
+
+
+def match_changed_routes(changed_routes, operations):
+    """Resolves "METHOD /path" or bare "/path" entries (templated or concrete) to operation keys."""
+    changed = set()
+    for route in changed_routes:
+        method, _, path = route.strip().rpartition(" ")
+        methods = [method.upper()] if method else sorted({key.split(" ", 1)[0] for key in operations})
+        for op_method in methods:
+            # A template given as written matches itself, and it is the most specific match
+            key = match_operation(op_method, path, operations)
+            if key:
+                changed.add(key)
+    return changed
+
+
+def render_path_expr(node):
+    """Renders a URL argument to a path; BASE_URL drops out and dynamic parts become `{}`."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return "" if node.id == "BASE_URL" else "{}"
+    if isinstance(node, ast.JoinedStr):
+        return "".join(render_path_expr(value.value) if isinstance(value, ast.FormattedValue) and
+                       isinstance(value.value, ast.Name) and value.value.id == "BASE_URL"
+                       else value.value if isinstance(value, ast.Constant) else "{}"
+                       for value in node.values)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return render_path_expr(node.left) + render_path_expr(node.right)
+    return "{}"
+
+
+def called_operations(func_node, operations):
+    """
+    Operation keys hit by the `api_client.<verb>(...)` / `requests.<verb>(BASE_URL + ...)`
+    calls written in `func_node`, and whether any such call could not be mapped.
+    """
+    hits, unmapped = set(), False
+    for call in ast.walk(func_node):
+        if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and
+                isinstance(call.func.value, ast.Name) and call.func.value.id in ("api_client", "requests")):
+            continue
+        verb, args = call.func.attr, call.args
+        if verb == "request" and args and isinstance(args[0], ast.Constant):
+            verb, args = str(args[0].value), args[1:]
+        if verb.lower() not in HTTP_VERBS.split("|"):
+            continue
+        key = match_operation(verb, render_path_expr(args[0]), operations) if args else None
+        if key:
+            hits.add(key)
+        else:
+            unmapped = True
+    return hits, unmapped
+
+
+def called_functions(func_node, functions, methods=None):
+    """The helpers and fixtures `func_node` uses: called by name (or `self.<name>`), or requested as a parameter."""
+    methods = methods or {}
+    used = [functions.get(arg.arg) or methods.get(arg.arg) for arg in func_node.args.args]
+    for call in ast.walk(func_node):
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Name):
+            used.append(functions.get(call.func.id))
+        elif isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and \
+                isinstance(call.func.value, ast.Name) and call.func.value.id == "self":
+            used.append(methods.get(call.func.attr))
+    return [node for node in used if node is not None and node is not func_node]
+
+
+def reachable_operations(func_node, functions, operations, methods=None):
+    """called_operations() of a test together with every helper and fixture it reaches."""
+    hits, unmapped = set(), False
+    seen, pending = {id(func_node)}, [func_node]
+    while pending:
+        node = pending.pop()
+        node_hits, node_unmapped = called_operations(node, operations)
+        hits |= node_hits
+        unmapped |= node_unmapped
+        for used in called_functions(node, functions, methods):
+            if id(used) not in seen:
+                seen.add(id(used))
+                pending.append(used)
+    return hits, unmapped
+
+
+def map_test_operations(code, operations):
+    """
+    Returns {node_id: set of operation keys} for every test in `code`, following
+    the module-level helpers and fixtures (and class methods) each test uses. A
+    test with any request that cannot be mapped gets an empty set, i.e. always runs.
+    """
+    tree = ast.parse(code)
+    functions = {node.name: node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    impact = {}
+
+    def record(node_id, node, methods=None):
+        hits, unmapped = reachable_operations(node, functions, operations, methods)
+        impact[node_id] = set() if unmapped else hits
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            record(node.name, node)
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            methods = {child.name: child for child in node.body
+                       if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))}
+            for child in methods.values():
+                if child.name.startswith("test"):
+                    record(f"{node.name}::{child.name}", child, methods)
+    return impact
+
+
+def run_impacted_tests(fastapi_url, changed_routes=None, previous_spec=None, test_file=GENERATED_TESTS_FILE):
+    """
+    Runs only the tests exercising a changed operation, directly or through their
+    helpers and fixtures. Tests with a call that cannot be mapped to an operation
+    are always selected.
+    """
+    openapi_data = load_openapi_spec(fastapi_url, refresh=bool(previous_spec))
+    operations = list_operations(openapi_data)
+    changed = set()
+    if previous_spec:
+        operations = {**list_operations(previous_spec), **operations}
+        changed |= diff_openapi_specs(previous_spec, openapi_data)
+    if changed_routes:
+        changed |= match_changed_routes(changed_routes, operations)
+
+    with open(test_file, "r", encoding="utf-8") as f:
+        impact = map_test_operations(f.read(), operations)
+
+    selected = [node_id for node_id, hits in impact.items() if not hits or hits & changed]
+    if selected:
+        test_session = run_tests(selected)
+    else:
+        test_session = {"total_tests": 0, "passed_tests": 0, "failed_tests": 0, "execution_time_seconds": 0.0}
+    test_session["changed_operations"] = sorted(changed)
+    test_session["selected_tests"] = selected
+    test_session["skipped_tests"] = len(impact) - len(selected)
+    return test_session
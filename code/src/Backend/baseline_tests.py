@@ -0,0 +1,221 @@
+"""
+Deterministic baseline pytest cases built straight from `extract_fastapi_routes()`
+scenarios, without the LLM: a happy path per operation, one test per categorical
+value, an invalid value per categorical field and min/max/zero/negative/huge
+values per numeric field, each asserting the status codes the spec declares.
+Multi-field combinations come from a t-wise covering array (see covering_array.py)
+rather than the full cartesian product.
+"""
+import re
+
+from covering_array import plan_combinations
+
+BASELINE_PREFIX = "test_baseline"
+HUGE_NUMBER = 10 ** 12
+INVALID_CATEGORY = "__invalid_category__"
+
+BASELINE_HELPERS = '''
+import uuid
+
+
+def unique_value(field):
+    return f"{field}-{uuid.uuid4().hex[:12]}"
+'''
+
+
+def identifier(text):
+    return re.sub(r"\W+", "_", str(text)).strip("_").lower() or "value"
+
+
+def is_unique_field(name):
+    """Fields that must not collide with existing records (e.g. `transaction_id`)."""
+    return name == "id" or name.endswith("_id")
+
+
+def path_expression(endpoint):
+    """`/transactions/{transaction_id}` -> f"/transactions/{unique_value('transaction_id')}" (fresh ID per run)."""
+    if "{" not in endpoint:
+        return repr(endpoint)
+    return 'f"' + re.sub(r"\{([^}]+)\}", lambda m: "{unique_value(%r)}" % m.group(1), endpoint) + '"'
+
+
+def unique_expression(field, bounds):
+    """
+    Source for a fresh value of a unique field that keeps its string bounds, or
+    None when its enum or format leaves no room for one.
+    """
+    if bounds.get("format") == "uuid":
+        return "str(uuid.uuid4())"
+    if "enum" in bounds or "format" in bounds:
+        return None
+    expression = f"unique_value({field!r})"
+    if bounds.get("maxLength"):
+        expression += f"[-{bounds['maxLength']}:]"
+    if bounds.get("minLength", 0) > len(field) + 13:
+        expression += f".ljust({bounds['minLength']}, '0')"
+    return expression
+
+
+def matches_pattern(value, pattern):
+    try:
+        return re.search(pattern, str(value)) is not None
+    except re.error:
+        return False
+
+
+def unverified_fields(body, string_bounds, unique_fields):
+    """Fields whose value may break their `pattern`: samples are not generated from patterns."""
+    return [field for field, bounds in (string_bounds or {}).items()
+            if field in body and "pattern" in bounds
+            and (field in unique_fields or not matches_pattern(body[field], bounds["pattern"]))]
+
+
+def declared_codes(expected_status):
+    return [int(code) for code in expected_status or [] if str(code).isdigit()]
+
+
+def within_bounds(value, bounds):
+    if "minimum" in bounds and value < bounds["minimum"]:
+        return False
+    if "exclusiveMinimum" in bounds and value <= bounds["exclusiveMinimum"]:
+        return False
+    if "maximum" in bounds and value > bounds["maximum"]:
+        return False
+    if "exclusiveMaximum" in bounds and value >= bounds["exclusiveMaximum"]:
+        return False
+    return True
+
+
+def boundary_values(bounds):
+    """Returns [(label, value)] for the minimum/maximum allowed, zero, negative and huge values."""
+    step = 1 if bounds.get("type") == "integer" else 0.01
+    values = []
+    if "minimum" in bounds:
+        values.append(("min", bounds["minimum"]))
+    elif "exclusiveMinimum" in bounds:
+        values.append(("min", bounds["exclusiveMinimum"] + step))
+    if "maximum" in bounds:
+        values.append(("max", bounds["maximum"]))
+    elif "exclusiveMaximum" in bounds:
+        values.append(("max", bounds["exclusiveMaximum"] - step))
+    values += [("zero", 0), ("negative", -1), ("huge", HUGE_NUMBER)]
+    if bounds.get("type") == "integer":
+        values = [(label, int(value)) for label, value in values]
+    return values
+
+
+class BaselineWriter:
+    """Accumulates uniquely named baseline test functions for one spec."""
+
+    def __init__(self):
+        self.functions = []
+        self.names = set()
+
+    def unique_name(self, name):
+        candidate, index = name, 2
+        while candidate in self.names:
+            candidate, index = f"{name}_{index}", index + 1
+        self.names.add(candidate)
+        return candidate
+
+    def add(self, name, method, endpoint, body, expected, unique_fields=None, checks=None):
+        lines = [f"def {self.unique_name(name)}(api_client):"]
+        call_args = path_expression(endpoint)
+        if body is not None:
+            lines.append(f"    payload = {body!r}")
+            for field, expression in (unique_fields or {}).items():
+                lines.append(f"    payload[{field!r}] = {expression}")
+            call_args += ", json=payload"
+        lines.append(f"    response = api_client.{method.lower()}({call_args})")
+        if expected:
+            lines.append(f"    assert response.status_code in {tuple(sorted(set(expected)))!r}, response.text")
+        else:
+            lines.append("    assert response.status_code >= 400, response.text")
+        for key, value in (checks or {}).items():
+            lines.append(f"    assert response.json()[{key!r}] == {value!r}")
+        self.functions.append("\n".join(lines) + "\n")
+
+
+def valid_boundary_values(numeric_bounds):
+    """{field: [valid boundary values]} used as combination parameters."""
+    values = {}
+    for field, bounds in (numeric_bounds or {}).items():
+        valid = [value for _, value in boundary_values(bounds) if within_bounds(value, bounds)]
+        values[field] = list(dict.fromkeys(valid))
+    return values
+
+
+def scenario_combinations(scenario, strength=2, must_include=None):
+    """
+    Covering-array plan for one scenario. `must_include` maps "METHOD /path" to a
+    list of partial rows that have to appear in the plan.
+    """
+    body = scenario.get("bodyExample")
+    if not scenario.get("bodyRequired") or not isinstance(body, dict):
+        return []
+    categories = {field: values for field, values in (scenario.get("categories") or {}).items() if field in body}
+    numeric = {field: values for field, values in valid_boundary_values(scenario.get("numericBounds")).items()
+               if field in body}
+    seeds = (must_include or {}).get(f"{scenario['method']} {scenario['endpoint']}")
+    return plan_combinations(categories, numeric, strength, seeds)
+
+
+def generate_baseline_tests(api_tests, strength=2, must_include=None):
+    """
+    Returns pytest source for the mechanical cases of every scenario, or "" when
+    there is nothing to generate. The functions expect the `api_client` fixture.
+    """
+    writer = BaselineWriter()
+    for scenario in api_tests:
+        method = scenario["method"]
+        endpoint = scenario["endpoint"]
+        codes = declared_codes(scenario.get("expected_status"))
+        success = [code for code in codes if 200 <= code < 300] or codes
+        if "{" in endpoint:
+            # Path IDs are fresh, so "not found" is an acceptable outcome too
+            success = success + [404]
+            codes = codes + [404]
+        rejected = [code for code in codes if 400 <= code < 500]
+
+        base = f"{BASELINE_PREFIX}_{method.lower()}_{identifier(endpoint)}"
+        body = scenario.get("bodyExample") if scenario.get("bodyRequired") else None
+        if not isinstance(body, dict):
+            writer.add(f"{base}_status", method, endpoint, body, success)
+            continue
+
+        string_bounds = scenario.get("stringBounds") or {}
+        unique_fields = {field: unique_expression(field, string_bounds.get(field, {}))
+                         for field, value in body.items() if is_unique_field(field) and isinstance(value, str)}
+        unique_fields = {field: expression for field, expression in unique_fields.items() if expression}
+        if unverified_fields(body, string_bounds, unique_fields):
+            # The payload may fail a pattern check, so a validation error is acceptable too
+            success = success + (rejected or [400, 422])
+        writer.add(f"{base}_valid", method, endpoint, body, success, unique_fields)
+
+        for field, values in (scenario.get("categories") or {}).items():
+            if field not in body or not isinstance(values, list):
+                continue
+            for value in values:
+                writer.add(f"{base}_{identifier(field)}_{identifier(value)}", method, endpoint,
+                           {**body, field: value}, success, unique_fields)
+            writer.add(f"{base}_{identifier(field)}_invalid", method, endpoint,
+                       {**body, field: INVALID_CATEGORY}, rejected, unique_fields)
+
+        for field, bounds in (scenario.get("numericBounds") or {}).items():
+            if field not in body:
+                continue
+            for label, value in boundary_values(bounds):
+                expected = success if within_bounds(value, bounds) else rejected
+                writer.add(f"{base}_{identifier(field)}_{label}", method, endpoint,
+                           {**body, field: value}, expected, unique_fields)
+
+        for index, row in enumerate(scenario_combinations(scenario, strength, must_include), start=1):
+            writer.add(f"{base}_combo_{index}", method, endpoint, {**body, **row}, success, unique_fields)
+
+    if not writer.functions:
+        return ""
+    return BASELINE_HELPERS + "\n\n" + "\n\n".join(writer.functions)
+
+
+def baseline_test_names(code):
+    return re.findall(rf"^def ({BASELINE_PREFIX}\w*)\(", code, re.MULTILINE)
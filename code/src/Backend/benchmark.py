@@ -0,0 +1,416 @@
+"""
+End-to-end benchmark for the tester's non-LLM stages.
+
+Starts MockBankAPI, Frontend/main.py and synthetic OpenAPI services locally,
+swaps `api_tester.call_ollama` for a deterministic stub (or a replay cassette)
+and times every stage of /generate, /run and /generate-coverage.
+
+    python benchmark.py --targets mock frontend synthetic --sizes 10 100 1000
+"""
+import argparse
+import ast
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from fastapi.testclient import TestClient
+
+import api_tester
+
+SRC_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOCK_BANK_DIR = os.path.join(SRC_ROOT, "MockBankAPI")
+FRONTEND_DIR = os.path.join(SRC_ROOT, "Frontend")
+
+
+# -----------------------------------------------------------------------------
+#  Deterministic LLM backends
+# -----------------------------------------------------------------------------
+PROMPT_CASE = re.compile(r"^\s*- (test_\w+): (GET|POST|PUT|PATCH|DELETE) (\S+) => Expected (\[.*?\])\s*$", re.MULTILINE)
+PROMPT_BODY = re.compile(r"^\s*Request Body: (.*)$", re.MULTILINE)
+PROMPT_SCHEMA_REF = re.compile(r"^schema (array of )?(\w+)$")
+PROMPT_URL = re.compile(r"Keep 'BASE_URL' with (\S+?)\.?$", re.MULTILINE)
+
+
+def stub_llm(prompt: str) -> str:
+    """
+    Answers a generation prompt with one smoke test per listed operation, built
+    only from the prompt text, so the same prompt always yields the same file.
+    """
+    url_match = PROMPT_URL.search(prompt)
+    base_url = url_match.group(1) if url_match else api_tester.FASTAPI_URL
+
+    functions = []
+    seen = set()
+    cases = list(PROMPT_CASE.finditer(prompt))
+    for i, case in enumerate(cases):
+        name, method, endpoint = case.group(1), case.group(2), case.group(3)
+        if name in seen:
+            name = f"{name}_{i}"
+        seen.add(name)
+
+        segment_end = cases[i + 1].start() if i + 1 < len(cases) else len(prompt)
+        body_match = PROMPT_BODY.search(prompt, case.end(), segment_end)
+        body = None
+        if body_match:
+            body_text = body_match.group(1).strip()
+            schema_ref = PROMPT_SCHEMA_REF.match(body_text)
+            if schema_ref:
+                # Bodies are written once per schema: "<Name> example: {...}"
+                example = re.search(rf"^{schema_ref.group(2)} example: (.*)$", prompt, re.MULTILINE)
+                body_text = example.group(1) if example else ""
+                if schema_ref.group(1):
+                    body_text = f"[{body_text}]"
+            try:
+                body = ast.literal_eval(body_text)
+            except (ValueError, SyntaxError):
+                body = None
+
+        path = re.sub(r"\{[^}]+\}", "bench-1", endpoint)
+        call = f"api_client.{method.lower()}({path!r}" + (f", json={body!r})" if body is not None else ")")
+        functions.append(
+            f"def {name}(api_client):\n"
+            f"    response = {call}\n"
+            f"    assert response.status_code < 500\n"
+        )
+
+    code = api_tester.TEST_TEMPLATE.replace("{FASTAPI_URL}", repr(base_url))
+    code = code.replace("{test_functions}", "\n\n".join(functions) or "def test_placeholder():\n    assert True\n")
+    return f"```python\n{code.strip()}\n```"
+
+
+class ReplayLLM:
+    """
+    Serves responses recorded by prompt hash from a JSON cassette. With `record`
+    misses go to the real `call_ollama` and are saved; otherwise they fall back to
+    `stub_llm` and are counted in `misses`.
+    """
+
+    def __init__(self, path, record=False):
+        self.path = path
+        self.record = record
+        self.live = api_tester.call_ollama
+        self.misses = 0
+        self.responses = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.responses = json.load(f)
+
+    def __call__(self, prompt: str) -> str:
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        if key in self.responses:
+            return self.responses[key]
+        if not self.record:
+            self.misses += 1
+            return stub_llm(prompt)
+        response = self.live(prompt)
+        self.responses[key] = response
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.responses, f, indent=2)
+        return response
+
+
+# -----------------------------------------------------------------------------
+#  Stage timing
+# -----------------------------------------------------------------------------
+STAGES = {
+    "load_openapi_spec": "spec_fetch",
+    "extract_fastapi_routes": "route_extraction",
+    "fetch_get_endpoints": "context_harvest",
+    "read_source_code_contents": "context_harvest",
+    "generate_dynamic_prompt": "prompt_build",
+    "generate_baseline_tests": "baseline_build",
+    "call_ollama": "llm",
+    "extract_code_from_response": "extraction",
+    "use_shared_client": "extraction",
+    "generate_test_code_pytest": "write",
+    "run_tests": "test_run",
+}
+
+
+class StageTimer:
+    """
+    Wraps api_tester functions and records their exclusive wall time per stage,
+    so nested calls (e.g. spec fetch inside route extraction) are not counted twice.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self._stack = []
+        self._originals = {}
+
+    def wrap(self, func, stage):
+        def timed(*args, **kwargs):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = self._stack.pop()
+                self.totals[stage] = self.totals.get(stage, 0.0) + elapsed - nested
+                if self._stack:
+                    self._stack[-1] += elapsed
+        return timed
+
+    def install(self):
+        for name, stage in STAGES.items():
+            self._originals[name] = getattr(api_tester, name)
+            setattr(api_tester, name, self.wrap(self._originals[name], stage))
+
+    def uninstall(self):
+        for name, func in self._originals.items():
+            setattr(api_tester, name, func)
+        self._originals = {}
+
+    def reset(self):
+        self.totals = {}
+
+
+# -----------------------------------------------------------------------------
+#  Target services
+# -----------------------------------------------------------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, process=None, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Service for {url} exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/openapi.json", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Service at {url} did not start within {timeout}s")
+
+
+@contextlib.contextmanager
+def uvicorn_service(app_dir, app):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(url, process)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@contextlib.contextmanager
+def mock_bank_service():
+    # Run against a throwaway copy so benchmark writes never touch the checked-in workbooks
+    with tempfile.TemporaryDirectory() as workdir:
+        app_dir = os.path.join(workdir, "MockBankAPI")
+        shutil.copytree(MOCK_BANK_DIR, app_dir, ignore=shutil.ignore_patterns("__pycache__"))
+        with uvicorn_service(app_dir, "ApiCalls:app") as url:
+            yield url
+
+
+@contextlib.contextmanager
+def frontend_service():
+    with uvicorn_service(FRONTEND_DIR, "main:app") as url:
+        yield url
+
+
+def synthetic_spec(operations):
+    """
+    Builds an OpenAPI document with `operations` operations over resources that
+    each have a list, create, get-by-id and delete route and one component schema.
+    """
+    spec = {"openapi": "3.1.0", "info": {"title": "Synthetic", "version": "1.0"},
+            "paths": {}, "components": {"schemas": {}}}
+    routes = ("list", "create", "get", "delete")
+    for i in range(operations):
+        resource, kind = i // len(routes), routes[i % len(routes)]
+        schema = f"Resource{resource}"
+        spec["components"]["schemas"][schema] = {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string", "example": f"R{resource}-1"},
+                "region": {"type": "string", "description": "[North, South, East, West]"},
+                "channel": {"type": "string", "description": "[Web, Mobile, Branch]"},
+                "amount": {"type": "number"},
+                "active": {"type": "boolean"},
+            },
+        }
+        body = {"content": {"application/json": {"schema": {"$ref": f"#/components/schemas/{schema}"}}}}
+        responses = {"200": {"description": "OK"}, "422": {"description": "Validation Error"}}
+        if kind == "list":
+            spec["paths"].setdefault(f"/resource{resource}/", {})["get"] = {"responses": responses}
+        elif kind == "create":
+            spec["paths"].setdefault(f"/resource{resource}/", {})["post"] = {"requestBody": body, "responses": responses}
+        elif kind == "get":
+            spec["paths"].setdefault(f"/resource{resource}/{{item_id}}", {})["get"] = {"responses": responses}
+        else:
+            spec["paths"].setdefault(f"/resource{resource}/{{item_id}}", {})["delete"] = {"responses": responses}
+    return spec
+
+
+@contextlib.contextmanager
+def synthetic_service(operations):
+    body = json.dumps(synthetic_spec(operations)).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            payload = body if self.path == "/openapi.json" else b"[]" if self.command == "GET" else b"{}"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# -----------------------------------------------------------------------------
+#  Benchmark
+# -----------------------------------------------------------------------------
+def timed_call(timer, client, endpoint, **kwargs):
+    timer.reset()
+    start = time.perf_counter()
+    response = client.post(endpoint, **kwargs)
+    total = time.perf_counter() - start
+    stages = dict(timer.totals)
+    stages["total"] = total
+    payload = response.json()
+    error = payload.get("error") if isinstance(payload, dict) else None
+    return stages, error
+
+
+def benchmark_target(name, url, repeat, coverage, verbose):
+    """
+    Runs /generate, /run and (optionally) /generate-coverage `repeat` times against
+    `url` from a scratch workspace and returns median stage timings per endpoint.
+    """
+    timer = StageTimer()
+    timer.install()
+    previous = os.getcwd()
+    samples = {"/generate": [], "/run": [], "/generate-coverage": []}
+    errors = []
+    with tempfile.TemporaryDirectory() as workspace:
+        os.chdir(workspace)
+        try:
+            client = TestClient(api_tester.app)
+            output = sys.stdout if verbose else io.StringIO()
+            with contextlib.redirect_stdout(output):
+                for _ in range(repeat):
+                    api_tester.OPENAPI_CACHE.clear()
+                    calls = [
+                        ("/generate", {"data": {"fastapi_url": url, "type": "pytest"}}),
+                        ("/run", {"json": {"type": "pytest"}}),
+                    ]
+                    if coverage:
+                        calls.append(("/generate-coverage", {}))
+                    for endpoint, kwargs in calls:
+                        stages, error = timed_call(timer, client, endpoint, **kwargs)
+                        samples[endpoint].append(stages)
+                        if error:
+                            errors.append(f"{endpoint}: {error}")
+        finally:
+            os.chdir(previous)
+            timer.uninstall()
+
+    results = {}
+    for endpoint, runs in samples.items():
+        if not runs:
+            continue
+        stages = sorted({stage for run in runs for stage in run})
+        results[endpoint] = {stage: statistics.median(run.get(stage, 0.0) for run in runs) for stage in stages}
+    return {"target": name, "url": url, "results": results, "errors": sorted(set(errors))}
+
+
+def print_report(report):
+    print(f"\n=== {report['target']} ({report['url']}) ===")
+    for endpoint, stages in report["results"].items():
+        print(f"  {endpoint}")
+        for stage, seconds in sorted(stages.items(), key=lambda item: (item[0] == "total", -item[1])):
+            print(f"    {stage:<18} {seconds * 1000:10.1f} ms")
+    for error in report["errors"]:
+        print(f"  ! {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tester's non-LLM stages with a deterministic LLM.")
+    parser.add_argument("--targets", nargs="+", default=["mock", "frontend", "synthetic"],
+                        choices=["mock", "frontend", "synthetic"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000],
+                        help="operation counts for the synthetic specs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--replay", help="JSON cassette of recorded LLM responses (stub is used for misses)")
+    parser.add_argument("--record", action="store_true", help="record misses from the real LLM into --replay")
+    parser.add_argument("--no-coverage", action="store_true", help="skip /generate-coverage")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the tester's own console output")
+    args = parser.parse_args(argv)
+
+    llm = ReplayLLM(args.replay, record=args.record) if args.replay else stub_llm
+    live_llm = api_tester.call_ollama
+    api_tester.call_ollama = llm
+
+    services = []
+    if "mock" in args.targets:
+        services.append(("MockBankAPI", mock_bank_service))
+    if "frontend" in args.targets:
+        services.append(("Frontend", frontend_service))
+    if "synthetic" in args.targets:
+        services += [(f"synthetic-{size}", lambda size=size: synthetic_service(size)) for size in args.sizes]
+
+    reports = []
+    try:
+        for name, service in services:
+            with service() as url:
+                report = benchmark_target(name, url, args.repeat, not args.no_coverage, args.verbose)
+            print_report(report)
+            reports.append(report)
+    finally:
+        api_tester.call_ollama = live_llm
+
+    if isinstance(llm, ReplayLLM) and llm.misses:
+        print(f"\n{llm.misses} prompt(s) were not in {args.replay} and were answered by the stub")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
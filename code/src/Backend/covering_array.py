@@ -0,0 +1,79 @@
+"""
+Combinatorial planner for categorical/numeric combination tests.
+
+Instead of the full cartesian product of every categorical value and numeric
+boundary, `covering_array()` builds a t-wise covering array: every combination
+of values for any `strength` parameters appears in at least one row.
+"""
+from itertools import combinations, product
+
+
+def covering_array(parameters, strength=2, must_include=None):
+    """
+    Greedily builds rows (dicts of parameter -> value) covering every `strength`-way
+    value combination of `parameters` ({name: [values]}). Rows listed in
+    `must_include` (partial dicts) come first and are completed like any other row.
+    Deterministic for a given input.
+    """
+    names = [name for name, values in parameters.items() if values]
+    if not names:
+        return []
+    domains = {name: list(dict.fromkeys(parameters[name])) for name in names}
+    strength = max(1, min(int(strength), len(names)))
+
+    uncovered = set()
+    for group in combinations(names, strength):
+        for values in product(*(range(len(domains[name])) for name in group)):
+            uncovered.add(tuple(zip(group, values)))
+
+    def tuples_in(row):
+        assigned = [name for name in names if name in row]
+        for group in combinations(assigned, strength):
+            yield tuple((name, row[name]) for name in group)
+
+    def gain(row, name, index):
+        """Number of uncovered tuples that assigning `name=index` would complete."""
+        others = [other for other in names if other in row]
+        count = 0
+        for group in combinations(others, strength - 1):
+            candidate = tuple(sorted(group + (name,), key=names.index))
+            key = tuple((n, index if n == name else row[n]) for n in candidate)
+            if key in uncovered:
+                count += 1
+        return count
+
+    def complete(row):
+        for name in sorted((n for n in names if n not in row), key=lambda n: -len(domains[n])):
+            row[name] = max(range(len(domains[name])), key=lambda index: (gain(row, name, index), -index))
+        uncovered.difference_update(tuples_in(row))
+        return row
+
+    rows = []
+    for seed in must_include or []:
+        row = {}
+        for name, value in seed.items():
+            if name in domains:
+                if value not in domains[name]:
+                    domains[name].append(value)
+                row[name] = domains[name].index(value)
+        rows.append(complete(row))
+
+    # Seed each new row with the first still-uncovered tuple, in a fixed order
+    for seed in sorted(uncovered, key=lambda item: [(names.index(n), v) for n, v in item]):
+        if seed in uncovered:
+            rows.append(complete(dict(seed)))
+
+    return [{name: domains[name][row[name]] for name in names} for row in rows]
+
+
+def plan_combinations(categories, numeric_values=None, strength=2, must_include=None):
+    """
+    Covering array over an operation's categorical fields and the valid boundary
+    values of its numeric fields. Returns [] when there are fewer than two
+    parameters to combine.
+    """
+    parameters = {field: values for field, values in (categories or {}).items() if isinstance(values, list)}
+    parameters.update({field: values for field, values in (numeric_values or {}).items() if values})
+    if len(parameters) < 2:
+        return []
+    return covering_array(parameters, strength, must_include)
@@ -0,0 +1,91 @@
+"""
+A bounded pool of LLM workers shared by several services' generation jobs.
+
+Every service gets its own queue of prompts and the workers serve the queues
+round-robin, one prompt per turn, so a service with many prompts (a streamed
+spec) cannot hold back the others, and no more than `workers` calls reach the
+inference server at once.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class LLMPool:
+
+    def __init__(self, call, workers=4):
+        self.call = call
+        self.queues = {}
+        self.rotation = deque()
+        self.stats = {}
+        self.closed = False
+        self.condition = threading.Condition()
+        self.threads = [threading.Thread(target=self.work, name=f"llm-worker-{i}", daemon=True)
+                        for i in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, service, prompt):
+        """Queues `prompt` for `service`; returns a Future for the LLM's answer."""
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("LLM pool is shut down")
+            queue = self.queues.setdefault(service, deque())
+            if not queue:
+                self.rotation.append(service)
+            queue.append((prompt, future, time.perf_counter()))
+            self.condition.notify()
+        return future
+
+    def client(self, service):
+        """A blocking `call_ollama`-style function that goes through the pool as `service`."""
+        return lambda prompt: self.submit(service, prompt).result()
+
+    def next_job(self):
+        with self.condition:
+            while not self.rotation and not self.closed:
+                self.condition.wait()
+            if not self.rotation:
+                return None
+            service = self.rotation.popleft()
+            queue = self.queues[service]
+            prompt, future, queued_at = queue.popleft()
+            if queue:
+                # Back of the line: every other waiting service gets a turn first
+                self.rotation.append(service)
+            return service, prompt, future, queued_at
+
+    def work(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            service, prompt, future, queued_at = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = time.perf_counter()
+            try:
+                future.set_result(self.call(prompt))
+            except BaseException as e:
+                future.set_exception(e)
+            finished = time.perf_counter()
+            with self.condition:
+                stats = self.stats.setdefault(service, {"calls": 0, "llm_seconds": 0.0, "queue_seconds": 0.0})
+                stats["calls"] += 1
+                stats["llm_seconds"] += finished - start
+                stats["queue_seconds"] += start - queued_at
+
+    def service_stats(self, service):
+        with self.condition:
+            stats = dict(self.stats.get(service, {"calls": 0, "llm_seconds": 0.0, "queue_seconds": 0.0}))
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+
+    def shutdown(self):
+        """Stops the workers once the queued prompts are answered."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
@@ -0,0 +1,188 @@
+"""
+Replays the request sequences recorded from the generated tests (see
+traffic_recorder.py) as load: either an open model starting sequences at a
+target rate or a closed model with a fixed number of concurrent virtual users,
+both with a linear ramp-up. Reports throughput, error rate and latency
+percentiles per operation.
+"""
+import asyncio
+import json
+import re
+import time
+import uuid
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+from baseline_tests import is_unique_field
+
+
+def load_sequences(traffic_file):
+    """Groups recorded requests by the test that sent them, in recording order."""
+    sequences = {}
+    with open(traffic_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                sequences.setdefault(record.get("test"), []).append(record)
+    return list(sequences.values())
+
+
+def unique_values(sequence):
+    """Recorded values of ID-like body fields; each replay swaps them for fresh ones."""
+    values = set()
+    for record in sequence:
+        body = record.get("json")
+        if isinstance(body, dict):
+            values.update(str(v) for k, v in body.items() if is_unique_field(k) and isinstance(v, str) and v)
+    return values
+
+
+def fresh(value, replacements):
+    if isinstance(value, str):
+        for old, new in replacements.items():
+            value = value.replace(old, new)
+        return value
+    if isinstance(value, dict):
+        return {k: fresh(v, replacements) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fresh(v, replacements) for v in value]
+    return value
+
+
+def retarget(url, base_url):
+    """Points a recorded URL at `base_url`, keeping its path and query."""
+    if not base_url:
+        return url
+    target, parts = urlsplit(base_url), urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, target.path.rstrip("/") + parts.path, parts.query, ""))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class LoadStats:
+    """Per-operation latency samples and outcome counters."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.counts = {}
+        self.sequences = 0
+
+    def add(self, operation, latency, status=None, error=None):
+        self.latencies.setdefault(operation, []).append(latency)
+        counts = self.counts.setdefault(operation, {"requests": 0, "errors": 0, "non_2xx": 0, "status": {}})
+        counts["requests"] += 1
+        if error is not None or status is None or status >= 500:
+            counts["errors"] += 1
+        if status is not None:
+            counts["status"][str(status)] = counts["status"].get(str(status), 0) + 1
+            if not 200 <= status < 300:
+                counts["non_2xx"] += 1
+
+    def report(self, elapsed):
+        operations = {}
+        for operation, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            counts = self.counts[operation]
+            operations[operation] = {
+                "requests": counts["requests"],
+                "throughput_rps": round(counts["requests"] / elapsed, 2) if elapsed else 0.0,
+                "error_rate": round(counts["errors"] / counts["requests"], 4),
+                "non_2xx": counts["non_2xx"],
+                "status_codes": counts["status"],
+                "latency_ms": {
+                    "min": round(ordered[0], 2),
+                    "p50": round(percentile(ordered, 0.50), 2),
+                    "p90": round(percentile(ordered, 0.90), 2),
+                    "p95": round(percentile(ordered, 0.95), 2),
+                    "p99": round(percentile(ordered, 0.99), 2),
+                    "max": round(ordered[-1], 2),
+                },
+            }
+        total = sum(c["requests"] for c in self.counts.values())
+        errors = sum(c["errors"] for c in self.counts.values())
+        return {
+            "duration_seconds": round(elapsed, 3),
+            "total_sequences": self.sequences,
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "operations": operations,
+        }
+
+
+async def replay_sequence(client, sequence, stats, base_url=None, operation_of=None):
+    """Sends one recorded test's requests in order, with fresh values for its ID fields."""
+    stats.sequences += 1
+    replacements = {value: f"load-{uuid.uuid4().hex[:12]}" for value in unique_values(sequence)}
+    for record in sequence:
+        url = retarget(fresh(record["url"], replacements), base_url)
+        path = urlsplit(url).path
+        operation = operation_of(record["method"], path) if operation_of else None
+        operation = operation or f"{record['method']} {re.sub(r'load-[0-9a-f]{12}', '{id}', path)}"
+        kwargs = {key: fresh(record[key], replacements) for key in ("params", "json", "data", "headers") if key in record}
+        start = time.perf_counter()
+        try:
+            response = await client.request(record["method"], url, **kwargs)
+            stats.add(operation, (time.perf_counter() - start) * 1000, response.status_code)
+        except httpx.HTTPError as e:
+            stats.add(operation, (time.perf_counter() - start) * 1000, error=e)
+
+
+async def run_load(sequences, base_url=None, sequences_per_second=None, concurrency=None, duration=30.0,
+                   ramp_up=5.0, operation_of=None, timeout=10.0):
+    """
+    With `sequences_per_second`, sequences start at a rate ramping linearly from 0
+    to `sequences_per_second` over `ramp_up` seconds (open model; each start replays
+    one whole sequence, so requests/second is that rate times the mean sequence
+    length). Otherwise `concurrency` virtual users (default 10) loop over the sequences, joining
+    evenly over `ramp_up` (closed model). Runs for `duration` seconds.
+    """
+    if not sequences:
+        raise ValueError("No recorded requests to replay")
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=max(concurrency or 0, int(sequences_per_second or 0), 10) * 2)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+
+        if sequences_per_second:
+            tasks = set()
+            started = 0
+            while True:
+                now = time.perf_counter() - start
+                if now >= duration:
+                    break
+                # Sequences due by now: the integral of a rate ramping linearly to `sequences_per_second`
+                if ramp_up and now < ramp_up:
+                    due = sequences_per_second * now * now / (2 * ramp_up)
+                else:
+                    due = sequences_per_second * (now - (ramp_up or 0) / 2)
+                while started < int(due):
+                    sequence = sequences[started % len(sequences)]
+                    task = asyncio.ensure_future(replay_sequence(client, sequence, stats, base_url, operation_of))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    started += 1
+                await asyncio.sleep(0.005)
+            if tasks:
+                await asyncio.wait(tasks)
+        else:
+            users = concurrency or 10
+
+            async def user(index):
+                await asyncio.sleep(ramp_up * index / users if ramp_up else 0)
+                position = index
+                while time.perf_counter() < deadline:
+                    await replay_sequence(client, sequences[position % len(sequences)], stats, base_url, operation_of)
+                    position += users
+
+            await asyncio.gather(*(user(index) for index in range(users)))
+
+        elapsed = time.perf_counter() - start
+    return stats.report(elapsed)
@@ -0,0 +1,245 @@
+"""
+Low-memory access to very large OpenAPI documents.
+
+The spec is streamed to a temporary file and memory-mapped; nothing is parsed
+up front. `StreamingSpec` behaves like the `openapi_data` dict the rest of the
+tester reads (`spec.get("components", {}).get("schemas", {}).get(name)`), but
+every object is only decoded when it is looked up, and `iter_paths()` yields
+one path item at a time:
+
+    with StreamingSpec.from_url("http://gateway/openapi.json") as spec:
+        for path, methods in spec.iter_paths():
+            ...
+
+Each value is decoded with the C JSON decoder from a window of the file that
+grows until the value fits, so memory is bounded by the largest single value
+looked up (one path item, one schema), not by the document. A lazy object that
+has to be stepped over (the paths, to reach the components after them) is
+skipped member by member with a decoder that builds no objects.
+"""
+import json
+import mmap
+import os
+import re
+import tempfile
+from collections.abc import Mapping
+
+import requests
+
+WHITESPACE = re.compile(rb"[ \t\n\r]*")
+# Objects kept lazy (key -> layout of its own members, "*" for any key); all other values
+# are decoded when read. Path items and individual schemas are the decoded units.
+LAZY_LAYOUT = {"paths": {}, "components": {"*": {}}}
+FIRST_WINDOW = 4 * 1024
+DOWNLOAD_CHUNK = 1024 * 1024
+_DECODER = json.JSONDecoder()
+# Finds where a value ends without keeping anything it decodes
+_SKIPPER = json.JSONDecoder(object_pairs_hook=lambda pairs: None)
+
+
+def spool_url(url, directory=None, timeout=60):
+    """Downloads `url` to a temporary file in chunks and returns its path."""
+    fd, path = tempfile.mkstemp(prefix="openapi-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f, requests.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK):
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+class StreamingSpec:
+    """A memory-mapped OpenAPI JSON document, decoded on demand."""
+
+    def __init__(self, path, delete=False):
+        self.path = path
+        self.delete = delete
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        start = self.skip_whitespace(0)
+        if self.data[start:start + 1] != b"{":
+            self.close()
+            raise ValueError("Invalid OpenAPI specification format")
+        self.root = LazyObject(self, start, LAZY_LAYOUT)
+
+    @classmethod
+    def from_url(cls, url, directory=None):
+        return cls(spool_url(url, directory), delete=True)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+        if self.delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # dict-like access to the top level, so StreamingSpec can stand in for `openapi_data`
+    def get(self, key, default=None):
+        return self.root.get(key, default)
+
+    def __getitem__(self, key):
+        return self.root[key]
+
+    def __contains__(self, key):
+        return key in self.root
+
+    def iter_paths(self):
+        """Yields (path, path item) pairs in document order, decoding one at a time."""
+        paths = self.root.get("paths")
+        if isinstance(paths, LazyObject):
+            yield from paths.iter_items()
+        elif isinstance(paths, dict):
+            yield from paths.items()
+
+    # -------------------------------------------------------------------------
+    def skip_whitespace(self, position):
+        return WHITESPACE.match(self.data, position).end()
+
+    def decode(self, position, decoder=_DECODER):
+        """Decodes the JSON value starting at byte `position`; returns (value, end position)."""
+        size = FIRST_WINDOW
+        while True:
+            end = min(position + size, len(self.data))
+            raw = self.data[position:end]
+            try:
+                text = raw.decode("utf-8")
+            except UnicodeDecodeError as e:
+                # The window cut a multi-byte character in two; the value cannot end inside it
+                if e.start < len(raw) - 3:
+                    raise
+                raw = raw[:e.start]
+                text = raw.decode("utf-8")
+            try:
+                value, length = decoder.raw_decode(text)
+            except json.JSONDecodeError:
+                if end >= len(self.data):
+                    raise
+                size *= 4
+                continue
+            consumed = length if text.isascii() else len(text[:length].encode("utf-8"))
+            return value, position + consumed
+
+    def skip_object(self, position):
+        """
+        Byte position just past the object starting at `position`. Members are
+        skipped one at a time, so the decode window stays the size of one member.
+        """
+        position = self.skip_whitespace(self.expect(position, b"{"))
+        if self.data[position:position + 1] == b"}":
+            return position + 1
+        while True:
+            _, position = self.decode(self.skip_whitespace(position))
+            position = self.skip_whitespace(self.expect(position, b":"))
+            position = self.skip_whitespace(self.decode(position, _SKIPPER)[1])
+            separator = self.data[position:position + 1]
+            if separator == b"}":
+                return position + 1
+            if separator != b",":
+                raise ValueError(f"Expected ',' or '}}' at byte {position} of the OpenAPI document")
+            position += 1
+
+    def expect(self, position, token):
+        position = self.skip_whitespace(position)
+        if self.data[position:position + 1] != token:
+            raise ValueError(f"Expected {token.decode()!r} at byte {position} of the OpenAPI document")
+        return position + 1
+
+    def members(self, position, layout):
+        """
+        Yields (key, value) for the members of the object at `position`
+        and returns the position past its closing brace. Object values named in
+        `layout` come back as LazyObjects, undecoded; their end is only looked
+        for once the caller asks for the next member.
+        """
+        position = self.skip_whitespace(self.expect(position, b"{"))
+        if self.data[position:position + 1] == b"}":
+            return position + 1
+        while True:
+            key, position = self.decode(self.skip_whitespace(position))
+            start = self.skip_whitespace(self.expect(position, b":"))
+            child_layout = layout.get(key, layout.get("*"))
+            if child_layout is not None and self.data[start:start + 1] == b"{":
+                value = LazyObject(self, start, child_layout)
+                yield key, value
+                end = value.end()
+            else:
+                value, end = self.decode(start)
+                yield key, value
+            position = self.skip_whitespace(end)
+            separator = self.data[position:position + 1]
+            if separator == b"}":
+                return position + 1
+            if separator != b",":
+                raise ValueError(f"Expected ',' or '}}' at byte {position} of the OpenAPI document")
+            position += 1
+
+
+class LazyObject(Mapping):
+    """
+    A JSON object inside a StreamingSpec. Members are decoded the first time a
+    key is looked up, scanning only as far as that key; `iter_items()` streams
+    them instead, keeping none.
+    """
+
+    def __init__(self, spec, start, layout=None):
+        self.spec = spec
+        self.start = start
+        self.layout = layout or {}
+        self.cache = {}
+        self.scanner = spec.members(start, self.layout)
+        self.end_position = None
+
+    def _scan(self, until=None):
+        """Locates members up to `until` (or all of them); returns True if `until` was found."""
+        while self.scanner is not None:
+            try:
+                key, value = next(self.scanner)
+            except StopIteration as done:
+                self.scanner = None
+                self.end_position = done.value
+                break
+            # Decoded anyway to find where it ends; schemas are looked up repeatedly
+            self.cache[key] = value
+            if key == until:
+                return True
+        return until in self.cache
+
+    def end(self):
+        """Byte position just past the closing brace."""
+        if self.end_position is None:
+            self.end_position = self.spec.skip_object(self.start)
+        return self.end_position
+
+    def __getitem__(self, key):
+        if key not in self.cache and not self._scan(until=key):
+            raise KeyError(key)
+        return self.cache[key]
+
+    def __iter__(self):
+        self._scan()
+        return iter(list(self.cache))
+
+    def __len__(self):
+        self._scan()
+        return len(self.cache)
+
+    def iter_items(self):
+        """Yields (key, value) in document order without keeping the decoded values."""
+        members = self.spec.members(self.start, self.layout)
+        while True:
+            try:
+                key, value = next(members)
+            except StopIteration as done:
+                # Stepping over this object later (to reach the members after it) is now free
+                self.end_position = done.value
+                return
+            yield key, value
@@ -0,0 +1,236 @@
+"""
+Adaptive black-box probing of scoring endpoints such as MockBankAPI's /fraud-score/.
+
+For a POST operation whose response carries numeric or categorical outputs, the
+prober enumerates each categorical input value, scans each numeric input on a
+log scale and binary-searches every interval where the outputs change, sending
+independent probes concurrently. The discovered edges become boundary tests.
+"""
+import math
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from baseline_tests import BaselineWriter, BASELINE_HELPERS, identifier, is_unique_field
+
+PROBE_PREFIX = "test_probe"
+RUN_ID_HEADER = "X-Test-Run-Id"
+PILOT_POINTS = 8
+SCAN_POINTS = 32
+SCAN_MAX = 10 ** 7
+
+
+class Prober:
+    """Probes one operation; `probes` counts requests against `max_probes`."""
+
+    def __init__(self, base_url, scenario, max_probes=400, concurrency=8, timeout=10, run_id=None):
+        self.base_url = base_url.rstrip("/")
+        self.scenario = scenario
+        self.body = dict(scenario.get("bodyExample") or {})
+        self.unique_fields = [f for f, v in self.body.items() if is_unique_field(f) and isinstance(v, str)]
+        self.max_probes = max_probes
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.probes = 0
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        if run_id:
+            self.session.headers[RUN_ID_HEADER] = run_id
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # -------------------------------------------------------------------------
+    def probe(self, overrides):
+        """Sends the example body with `overrides` and returns (status, outputs) as a hashable signature."""
+        with self._lock:
+            if self.probes >= self.max_probes:
+                return None
+            self.probes += 1
+        payload = {**self.body, **overrides}
+        for field in self.unique_fields:
+            payload[field] = f"probe-{uuid.uuid4().hex[:12]}"
+        url = self.base_url + self.scenario["endpoint"]
+        try:
+            response = self.session.request(self.scenario["method"], url, json=payload, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        outputs = {}
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            # Skip echoes of the request (generated IDs, unchanged input fields)
+            generated = {payload[field] for field in self.unique_fields}
+            for key, value in data.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                    continue
+                if value in generated or (key in payload and payload[key] == value):
+                    continue
+                outputs[key] = value
+        return response.status_code, tuple(sorted(outputs.items()))
+
+    def probe_many(self, overrides_list):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(self.probe, overrides_list))
+
+    # -------------------------------------------------------------------------
+    def grid(self, bounds):
+        """Search grid as (resolution, lowest index, highest index); values are index * resolution."""
+        resolution = 1 if bounds.get("type") == "integer" else 0.01
+        low = bounds.get("minimum", bounds.get("exclusiveMinimum", 0) + resolution)
+        high = bounds.get("maximum", bounds.get("exclusiveMaximum", SCAN_MAX + resolution) - resolution)
+        low = max(low, resolution)
+        return resolution, math.ceil(low / resolution), math.floor(high / resolution)
+
+    @staticmethod
+    def value(resolution, index):
+        return index if resolution == 1 else round(index * resolution, 2)
+
+    @staticmethod
+    def log_points(low, high, count):
+        if high <= low:
+            return [low]
+        ratio = (high / low) ** (1 / (count - 1))
+        return sorted({min(high, max(low, round(low * ratio ** i))) for i in range(count)})
+
+    def search_edge(self, field, resolution, low, high, low_sig, high_sig):
+        """Binary search between grid indices whose signatures differ; returns the edge or None."""
+        while high - low > 1:
+            middle = (low + high) // 2
+            signature = self.probe({field: self.value(resolution, middle)})
+            if signature is None:
+                return None
+            if signature == low_sig:
+                low = middle
+            else:
+                high, high_sig = middle, signature
+        return {
+            "field": field,
+            "below": self.value(resolution, low),
+            "above": self.value(resolution, high),
+            "outputs_below": low_sig,
+            "outputs_above": high_sig,
+        }
+
+    def numeric_edges(self, field, bounds, points):
+        resolution, low, high = self.grid(bounds)
+        indices = self.log_points(low, high, points)
+        signatures = self.probe_many([{field: self.value(resolution, index)} for index in indices])
+        intervals = [(indices[i], indices[i + 1], signatures[i], signatures[i + 1])
+                     for i in range(len(indices) - 1)
+                     if None not in (signatures[i], signatures[i + 1]) and signatures[i] != signatures[i + 1]]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            edges = pool.map(lambda interval: self.search_edge(field, resolution, *interval), intervals)
+        return [edge for edge in edges if edge], signatures
+
+    # -------------------------------------------------------------------------
+    def run(self):
+        """
+        Returns {"baseline", "categorical", "edges", "probes"}; empty findings when no
+        output reacted to a cheap pilot of categorical values and a coarse numeric scan.
+        """
+        baseline = self.probe({})
+        if baseline is None:
+            return {"probes": self.probes, "error": "Baseline probe failed"}
+
+        categorical = {}
+        for field, values in (self.scenario.get("categories") or {}).items():
+            if field in self.body and isinstance(values, list):
+                categorical[field] = dict(zip(values, self.probe_many([{field: value} for value in values])))
+
+        numeric = {field: bounds for field, bounds in (self.scenario.get("numericBounds") or {}).items()
+                   if field in self.body}
+        pilot = {field: self.numeric_edges(field, bounds, PILOT_POINTS) for field, bounds in numeric.items()}
+
+        reacting = any(signature not in (None, baseline) for results in categorical.values()
+                       for signature in results.values())
+        reacting |= any(signature not in (None, baseline) for _, signatures in pilot.values()
+                        for signature in signatures)
+        if not reacting:
+            return {"baseline": baseline, "categorical": {}, "edges": [], "probes": self.probes}
+
+        edges = []
+        for field, bounds in numeric.items():
+            field_edges, _ = self.numeric_edges(field, bounds, SCAN_POINTS)
+            edges += field_edges
+        return {"baseline": baseline, "categorical": categorical, "edges": edges, "probes": self.probes}
+
+
+def outputs_check(signature):
+    status, outputs = signature
+    return status, dict(outputs)
+
+
+def probe_scenarios(base_url, api_tests, max_probes=400, concurrency=8):
+    """
+    Probes every POST operation with a JSON body; returns {"METHOD /path": findings}.
+    Probes are tagged with one run ID whose records the service is asked to purge afterwards.
+    """
+    findings = {}
+    run_id = f"probe-{uuid.uuid4().hex}"
+    for scenario in api_tests:
+        if scenario["method"] != "POST" or not isinstance(scenario.get("bodyExample"), dict):
+            continue
+        prober = Prober(base_url, scenario, max_probes, concurrency, run_id=run_id)
+        findings[f"{scenario['method']} {scenario['endpoint']}"] = prober.run()
+    if findings:
+        try:
+            requests.delete(f"{base_url.rstrip('/')}/admin/test-runs/{run_id}", timeout=10)
+        except requests.RequestException:
+            pass
+    return findings
+
+
+def generate_probe_tests(api_tests, findings, include_helpers=True):
+    """
+    Emits characterization tests at every discovered edge (just below and just above)
+    and for every categorical value whose outputs differ from the baseline. Pass
+    `include_helpers=False` when appending to code that already has BASELINE_HELPERS.
+    """
+    writer = BaselineWriter()
+    for scenario in api_tests:
+        key = f"{scenario['method']} {scenario['endpoint']}"
+        result = findings.get(key) or {}
+        if not result.get("edges") and not result.get("categorical"):
+            continue
+        body = scenario["bodyExample"]
+        unique_fields = [f for f, v in body.items() if is_unique_field(f) and isinstance(v, str)]
+        base = f"{PROBE_PREFIX}_{scenario['method'].lower()}_{identifier(scenario['endpoint'])}"
+
+        for field, results in result.get("categorical", {}).items():
+            for value, signature in results.items():
+                if signature is None or signature == result["baseline"]:
+                    continue
+                status, outputs = outputs_check(signature)
+                writer.add(f"{base}_{identifier(field)}_{identifier(value)}", scenario["method"], scenario["endpoint"],
+                           {**body, field: value}, [status], unique_fields, outputs)
+
+        for edge in result.get("edges", []):
+            for side in ("below", "above"):
+                status, outputs = outputs_check(edge[f"outputs_{side}"])
+                label = identifier(str(edge[side]).replace(".", "_"))
+                writer.add(f"{base}_{identifier(edge['field'])}_{side}_{label}", scenario["method"],
+                           scenario["endpoint"], {**body, edge["field"]: edge[side]}, [status], unique_fields, outputs)
+
+    if not writer.functions:
+        return ""
+    return (BASELINE_HELPERS + "\n\n" if include_helpers else "") + "\n\n".join(writer.functions)
+
+
+def summarize_findings(findings):
+    """Short text description of the probed logic for the generation prompt."""
+    lines = []
+    for key, result in findings.items():
+        for edge in result.get("edges", []):
+            lines.append(f"- {key}: {edge['field']}={edge['below']} -> {dict(edge['outputs_below'][1])}, "
+                         f"{edge['field']}={edge['above']} -> {dict(edge['outputs_above'][1])}")
+        for field, results in result.get("categorical", {}).items():
+            for value, signature in results.items():
+                if signature and signature != result.get("baseline"):
+                    lines.append(f"- {key}: {field}={value!r} -> {dict(signature[1])}")
+    return "\n".join(lines)
@@ -0,0 +1,95 @@
+"""
+Compact encoding of the operations part of the generation prompt.
+
+Request bodies are written once per distinct schema and referenced by name from
+the operations that use it, and the GET responses used as context are written
+once per distinct body, listed with every endpoint that returned it. The
+prompt's sections can then be measured with `count_tokens` before sending.
+"""
+import json
+import re
+
+TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """
+    Approximate token count (words and punctuation marks), close to what BPE
+    tokenizers produce for code and JSON; no tokenizer download needed.
+    """
+    return len(TOKEN.findall(text or ""))
+
+
+def canonical(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def test_name(method, endpoint):
+    return f"test_{method.lower()}_{endpoint.strip('/').replace('/', '_').replace('{', '').replace('}', '')}"
+
+
+class PromptEncoder:
+    """Collects operations, body schemas and context blobs, each distinct one stored once."""
+
+    def __init__(self):
+        self.operations = []
+        self.schemas = {}
+        self.schema_names = {}
+        self.contexts = {}
+
+    def schema_name(self, scenario):
+        """Name of the scenario's body schema, registering it on first use."""
+        key = canonical([scenario.get("bodyExample"), scenario.get("descriptions"), scenario.get("categories")])
+        if key in self.schema_names:
+            return self.schema_names[key]
+        base = re.sub(r"\W+", "_", scenario.get("bodySchema") or "").strip("_") \
+            or f"{scenario['method'].title()}{re.sub(r'[^0-9A-Za-z]+', '_', scenario['endpoint']).strip('_').title()}Body"
+        name, index = base, 2
+        while name in self.schemas:
+            name, index = f"{base}{index}", index + 1
+        self.schema_names[key] = name
+        self.schemas[name] = scenario
+        return name
+
+    def add_operation(self, scenario, combinations=None, strength=2):
+        line = f"- {test_name(scenario['method'], scenario['endpoint'])}: {scenario['method']} {scenario['endpoint']} " \
+               f"=> Expected {scenario['expected_status']}\n"
+        if scenario.get("bodyRequired"):
+            body = scenario.get("bodyExample")
+            if isinstance(body, list) and len(body) == 1:
+                # An array body shares its item schema with the single-item operations
+                item = {**scenario, "bodyExample": body[0],
+                        "bodySchema": (scenario.get("bodySchema") or "").removesuffix("List")}
+                line += f"  Request Body: schema array of {self.schema_name(item)}\n"
+            else:
+                line += f"  Request Body: schema {self.schema_name(scenario)}\n"
+            if combinations:
+                line += f" Combinations ({strength}-wise): {combinations}\n"
+        self.operations.append(line)
+
+    def add_context(self, endpoint, response):
+        self.contexts.setdefault(canonical(response), (response, []))[1].append(endpoint)
+
+    # -------------------------------------------------------------------------
+    def operations_section(self):
+        return "".join(self.operations)
+
+    def schemas_section(self):
+        if not self.schemas:
+            return ""
+        lines = ["### Request Body Schemas (referenced by name from the operations)"]
+        for name, scenario in self.schemas.items():
+            lines.append(f"{name} example: {scenario.get('bodyExample')}")
+            if scenario.get("descriptions"):
+                lines.append(f"{name} descriptions: {scenario.get('descriptions')}")
+            if scenario.get("categories"):
+                lines.append(f"{name} categories: {scenario.get('categories')}")
+        return "\n".join(lines) + "\n"
+
+    def context_section(self):
+        if not self.contexts:
+            return ""
+        lines = ["### Existing Data (current responses of the GET endpoints)"]
+        for response, endpoints in self.contexts.values():
+            lines.append(f"GET {', '.join(endpoints)}: {response}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,191 @@
+"""
+Serialization benchmark for large list responses.
+
+Encodes the same rows the way each app would answer a list endpoint:
+
+  - default:        jsonable_encoder + json.dumps (endpoints without a response_model)
+  - response_model: Pydantic validation + dump_json (Frontend's List[Transaction])
+  - fast:           orjson.dumps on the rows as stored (FAST_JSON=1)
+
+then times the same GET through each app with FAST_JSON off and on.
+
+    python serialization_benchmark.py --rows 100000 --repeat 3
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+SRC_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOCK_BANK_DIR = os.path.join(SRC_ROOT, "MockBankAPI")
+FRONTEND_DIR = os.path.join(SRC_ROOT, "Frontend")
+
+
+def mock_rows(count):
+    return [{
+        "Transaction ID": f"BENCH{i:07d}", "Transaction Type": ("ACH", "Wire", "SWIFT")[i % 3],
+        "Source Account": f"ACC{i % 500:04d}", "Source Currency": "USD",
+        "Destination Account": f"ACC{(i * 7) % 500:04d}", "Destination Currency": "EUR",
+        "Amount": round(10 + (i * 37) % 10000 + 0.25, 2), "Expected Result": "Success", "Notes": None,
+    } for i in range(count)]
+
+
+def frontend_rows(count):
+    return [{
+        "transaction_id": f"BENCH{i:07d}", "customer_id": f"CUST{i % 500:04d}",
+        "timestamp": "2025-01-01T00:00:00", "amount": round(10 + (i * 37) % 10000 + 0.25, 2),
+        "currency": "USD", "type": "Wire Transfer", "status": "Completed",
+        "expected_result": "Successfully Processed",
+    } for i in range(count)]
+
+
+def best_of(repeat, function):
+    """Median seconds of `repeat` calls, and the last result."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def encoder_results(rows, repeat, model=None):
+    encoders = {
+        "default": lambda: json.dumps(jsonable_encoder(rows), ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        "fast": lambda: orjson.dumps(rows),
+    }
+    if model is not None:
+        adapter = TypeAdapter(List[model])
+        encoders["response_model"] = lambda: adapter.dump_json(adapter.validate_python(rows))
+    results = {}
+    for name, encode in encoders.items():
+        seconds, body = best_of(repeat, encode)
+        results[name] = {"seconds": seconds, "rows_per_second": len(rows) / seconds, "bytes": len(body)}
+    return results
+
+
+# -----------------------------------------------------------------------------
+#  Through the apps
+# -----------------------------------------------------------------------------
+@contextlib.contextmanager
+def app_module(directory, module_name, fast, env=None):
+    """Imports a fresh copy of an app with FAST_JSON set, from a scratch copy of its directory."""
+    workdir = tempfile.mkdtemp(prefix="serialization-bench-")
+    shutil.copytree(directory, workdir, dirs_exist_ok=True, ignore=shutil.ignore_patterns("__pycache__", "snapshots"))
+    previous_dir, previous_path = os.getcwd(), list(sys.path)
+    previous_env = {key: os.environ.get(key) for key in ["FAST_JSON", *(env or {})]}
+    os.environ.update({"FAST_JSON": "1" if fast else "0", **(env or {})})
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    cached = {name for name in sys.modules if name in (module_name, "storage", "indexes", "faults")
+              or name == "models" or name.startswith("models.")}
+    for name in cached:
+        del sys.modules[name]
+    try:
+        yield importlib.import_module(module_name)
+    finally:
+        sys.modules.pop(module_name, None)
+        os.chdir(previous_dir)
+        sys.path[:] = previous_path
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def time_endpoint(client, path, repeat, params=None):
+    seconds, response = best_of(repeat, lambda: client.get(path, params=params))
+    response.raise_for_status()
+    return {"seconds": seconds, "rows": len(response.json()), "bytes": len(response.content)}
+
+
+def mock_endpoint_results(count, repeat):
+    results = {}
+    for fast in (False, True):
+        # SQLite storage: seeding 100k rows into the Excel workbook would dominate the run
+        with app_module(MOCK_BANK_DIR, "ApiCalls", fast, {"MOCKBANK_STORAGE": "sqlite"}) as module:
+            client = TestClient(module.app)
+            rows = [{key.lower().replace(" ", "_"): value for key, value in row.items()} for row in mock_rows(count)]
+            for row in rows:
+                row["notes"] = ""
+            client.post("/transactions/bulk", json=rows).raise_for_status()
+            results["fast" if fast else "default"] = time_endpoint(client, "/transactions/", repeat)
+    return results
+
+
+def frontend_endpoint_results(count, repeat):
+    results = {}
+    for fast in (False, True):
+        with app_module(FRONTEND_DIR, "main", fast) as module:
+            client = TestClient(module.app)
+            client.post("/transactions/bulk", json=frontend_rows(count)).raise_for_status()
+            limit = module.MAX_PAGE_SIZE
+            pages = [{"skip": skip, "limit": limit} for skip in range(0, count, limit)]
+            # One full sweep of the pages per sample
+            seconds, _ = best_of(repeat, lambda: [client.get("/transactions/", params=page).raise_for_status()
+                                                  for page in pages])
+            results["fast" if fast else "default"] = {"seconds": seconds, "rows": count, "pages": len(pages)}
+    return results
+
+
+def print_results(title, results, count):
+    print(f"\n=== {title} ===")
+    baseline = results.get("default", {}).get("seconds")
+    for name, result in results.items():
+        speedup = f"  x{baseline / result['seconds']:.1f}" if baseline and name != "default" else ""
+        print(f"  {name:<15} {result['seconds'] * 1000:10.1f} ms  {count / result['seconds']:12,.0f} rows/s{speedup}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare JSON serialization paths on large list responses.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-apps", action="store_true", help="only time the encoders, not the apps")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, FRONTEND_DIR)
+    from main import Transaction as FrontendTransaction
+    sys.path.remove(FRONTEND_DIR)
+    sys.modules.pop("main", None)
+
+    report = {
+        "rows": args.rows,
+        "encoders": {
+            "MockBankAPI rows": encoder_results(mock_rows(args.rows), args.repeat),
+            "Frontend rows": encoder_results(frontend_rows(args.rows), args.repeat, FrontendTransaction),
+        },
+    }
+    for title, results in report["encoders"].items():
+        print_results(f"encode {args.rows} {title}", results, args.rows)
+
+    if not args.no_apps:
+        report["apps"] = {
+            "MockBankAPI GET /transactions/": mock_endpoint_results(args.rows, args.repeat),
+            "Frontend GET /transactions/ (all pages)": frontend_endpoint_results(args.rows, args.repeat),
+        }
+        for title, results in report["apps"].items():
+            print_results(title, results, args.rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Prompt token budget and per-call LLM token metrics.
+
+Prompts are measured with `count_tokens` (an approximation), scaled by a factor
+learned from the prompt token counts the model reports after each call, so the
+estimates track the model's own tokenizer. `fit_sections` trims the
+lowest-priority prompt sections until the prompt fits the budget, and
+`TokenMeter` keeps prompt/completion token counts and throughput per call.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from prompt_encoding import TOKEN, count_tokens
+
+# Context window requested from the model, and the part of it kept free for the answer
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "32768"))
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "8192"))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", str(LLM_CONTEXT_TOKENS - LLM_COMPLETION_TOKENS)))
+MIN_LINE_TOKENS = 24
+# Calls shorter than this say little about the ratio; the learned ratio stays within these bounds
+CALIBRATION_MIN_TOKENS = 256
+RATIO_BOUNDS = (0.5, 2.0)
+
+
+class PromptTooLarge(ValueError):
+    """The sections that cannot be trimmed do not fit the budget on their own."""
+
+
+class TokenMeter:
+    """Per-call token counts and throughput, and the estimate-to-model token ratio."""
+
+    def __init__(self, history=1000):
+        self.calls = deque(maxlen=history)
+        self.estimated_total = 0
+        self.reported_total = 0
+        self.lock = threading.Lock()
+
+    @property
+    def ratio(self):
+        """Model tokens per estimated token, learned from the calls so far (1.0 before any)."""
+        with self.lock:
+            if not self.estimated_total or not self.reported_total:
+                return 1.0
+            return min(max(self.reported_total / self.estimated_total, RATIO_BOUNDS[0]), RATIO_BOUNDS[1])
+
+    def estimate(self, text):
+        return int(count_tokens(text) * self.ratio + 0.5)
+
+    def record(self, estimated, prompt_tokens=None, completion_tokens=None, prompt_seconds=None,
+               completion_seconds=None, total_seconds=None, model=None):
+        call = {
+            "time": time.time(),
+            "model": model,
+            "estimated_prompt_tokens": estimated,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "prompt_tokens_per_second": round(prompt_tokens / prompt_seconds, 1)
+            if prompt_tokens and prompt_seconds else None,
+            "completion_tokens_per_second": round(completion_tokens / completion_seconds, 1)
+            if completion_tokens and completion_seconds else None,
+            "total_seconds": round(total_seconds, 3) if total_seconds is not None else None,
+        }
+        with self.lock:
+            self.calls.append(call)
+            # A prompt that filled the whole context was truncated by the model; its count says nothing
+            if prompt_tokens and estimated >= CALIBRATION_MIN_TOKENS and prompt_tokens < LLM_CONTEXT_TOKENS:
+                self.estimated_total += estimated
+                self.reported_total += prompt_tokens
+        return call
+
+    def summary(self):
+        with self.lock:
+            calls = list(self.calls)
+
+        def total(key):
+            return sum(call[key] or 0 for call in calls)
+
+        def mean(key):
+            values = [call[key] for call in calls if call[key]]
+            return round(sum(values) / len(values), 1) if values else None
+
+        return {
+            "calls": len(calls),
+            "prompt_tokens": total("prompt_tokens"),
+            "completion_tokens": total("completion_tokens"),
+            "mean_prompt_tokens_per_second": mean("prompt_tokens_per_second"),
+            "mean_completion_tokens_per_second": mean("completion_tokens_per_second"),
+            "estimate_ratio": round(self.ratio, 3),
+            "budget": {"context": LLM_CONTEXT_TOKENS, "completion": LLM_COMPLETION_TOKENS,
+                       "prompt": PROMPT_TOKEN_BUDGET},
+            "recent": calls[-20:],
+        }
+
+
+METER = TokenMeter()
+
+
+def cut_line(line, tokens):
+    """`line` up to its `tokens`-th token."""
+    for index, match in enumerate(TOKEN.finditer(line)):
+        if index == tokens:
+            return line[:match.start()].rstrip() + " ..."
+    return line
+
+
+def fit_text(text, max_tokens):
+    """
+    Shortens `text` to about `max_tokens` estimated tokens: first by capping every
+    line at the same length (so each entry keeps its beginning), then, if lines
+    would get shorter than MIN_LINE_TOKENS, by dropping lines from the end.
+    """
+    if METER.estimate(text) <= max_tokens:
+        return text
+    ratio = METER.ratio
+    lines = text.splitlines()
+    counts = [count_tokens(line) for line in lines]
+    allowed = max(int(max_tokens / ratio) - 12, 0)
+
+    low, high = 0, max(counts, default=0)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if sum(min(count, cap) for count in counts) <= allowed:
+            low = cap
+        else:
+            high = cap - 1
+    if low >= MIN_LINE_TOKENS:
+        kept = [cut_line(line, low) if count > low else line for line, count in zip(lines, counts)]
+        return "\n".join(kept) + "\n(long entries shortened to fit the prompt budget)\n"
+
+    kept, used = [], 0
+    for line, count in zip(lines, counts):
+        if used + min(count, MIN_LINE_TOKENS) > allowed:
+            break
+        kept.append(cut_line(line, MIN_LINE_TOKENS) if count > MIN_LINE_TOKENS else line)
+        used += min(count, MIN_LINE_TOKENS)
+    return "\n".join(kept) + f"\n({len(lines) - len(kept)} more lines left out to fit the prompt budget)\n" \
+        if kept else ""
+
+
+def fit_sections(sections, budget):
+    """
+    `sections` is a list of (name, text, priority) with priority None for sections
+    that must be sent whole. Trims the lowest-priority sections first until the
+    total fits `budget` estimated tokens; returns ({name: text}, {name: tokens}).
+    Raises PromptTooLarge when the untrimmable sections alone exceed the budget.
+    """
+    # Per-section estimates are rounded separately, so aim a little below the budget
+    budget -= 2 * len(sections)
+    texts = {name: text for name, text, _ in sections}
+    tokens = {name: METER.estimate(text) for name, text in texts.items()}
+    required = sum(tokens[name] for name, _, priority in sections if priority is None)
+    if required > budget:
+        raise PromptTooLarge(f"Prompt needs about {required} tokens before optional context; "
+                             f"the budget is {budget}")
+
+    for name, _, priority in sorted((s for s in sections if s[2] is not None), key=lambda s: s[2]):
+        excess = sum(tokens.values()) - budget
+        if excess <= 0:
+            break
+        texts[name] = fit_text(texts[name], max(tokens[name] - excess, 0))
+        tokens[name] = METER.estimate(texts[name])
+    return texts, tokens
@@ -0,0 +1,250 @@
+"""
+pytest plugin that records every HTTP request the generated tests send, one JSON
+object per line, tagged with the test that sent it:
+
+    DEEPFREAK_TRAFFIC=traffic.jsonl pytest -p traffic_recorder generated_tests.py
+
+It also keeps a response cassette for offline reruns. In record mode every
+request/response pair is stored under its test; in replay mode responses are
+served from the cassette without touching the network, and any request the
+cassette has no answer for fails the test (`CassetteMiss`, and the test is
+failed even if it catches the error). Each recorded test runs with a fresh
+`random`/Faker seed that is saved in the cassette; the replay reuses it, so
+generated payloads repeat while live recordings stay unique:
+
+    DEEPFREAK_CASSETTE=cassette.json DEEPFREAK_CASSETTE_MODE=record pytest -p traffic_recorder ...
+    DEEPFREAK_CASSETTE=cassette.json DEEPFREAK_CASSETTE_MODE=replay pytest -p traffic_recorder ...
+
+Both `requests.<verb>` and the template's `api_client` go through
+`requests.Session.request`, which is what gets wrapped here.
+"""
+import json
+import os
+import random
+import re
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    from faker import Faker
+except ImportError:
+    Faker = None
+
+TRAFFIC_ENV = "DEEPFREAK_TRAFFIC"
+CASSETTE_ENV = "DEEPFREAK_CASSETTE"
+CASSETTE_MODE_ENV = "DEEPFREAK_CASSETTE_MODE"
+CASSETTE_MODES = ("record", "replay")
+
+# Per-run values (uuid4 strings, `unique_value()` suffixes) that differ between recording and replay.
+# A long digit run only counts when it is an ID value; otherwise it is an amount or a count.
+DYNAMIC_VALUE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|\b(?=[0-9]*[a-f])[0-9a-f]{12,32}\b"
+    r"|(?:(?<=id-)|(?<=id\":)|(?<=id\":\"))[0-9]{12,32}\b"
+)
+KEPT_HEADERS = ("content-type", "location")
+
+_state = {"nodeid": None, "file": None, "original": None, "mode": None, "cassette": None, "misses": []}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Raised in replay mode for a request the cassette has no response for."""
+
+
+def request_record(method, url, kwargs):
+    record = {"test": _state["nodeid"], "method": method.upper(), "url": url}
+    for key in ("params", "json", "data"):
+        value = kwargs.get(key)
+        if value is None:
+            continue
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            value = str(value)
+        record[key] = value
+    headers = kwargs.get("headers")
+    if headers:
+        record["headers"] = {str(k): str(v) for k, v in dict(headers).items()}
+    return record
+
+
+# -----------------------------------------------------------------------------
+#  cassette
+# -----------------------------------------------------------------------------
+def request_key(method, url, kwargs):
+    """
+    Normalized "METHOD /path?query body" for a request (host dropped, query and
+    JSON keys sorted) plus the dynamic values it contained, in order.
+    """
+    prepared = requests.Request(method.upper(), url, params=kwargs.get("params"), json=kwargs.get("json"),
+                                data=kwargs.get("data")).prepare()
+    parts = urlsplit(prepared.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    body = prepared.body or b""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        pass
+    raw = f"{prepared.method} {parts.path}{'?' + query if query else ''} {body}".rstrip()
+    return DYNAMIC_VALUE.sub("*", raw), DYNAMIC_VALUE.findall(raw)
+
+
+def load_cassette(path):
+    """Returns ({node_id: entries}, {node_id: seed})."""
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("tests", {}), data.get("seeds", {})
+
+
+def save_cassette(path, tests, seeds):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 2, "tests": tests, "seeds": seeds}, f, separators=(",", ":"))
+
+
+def cassette_entry(key, values, response):
+    return {
+        "key": key,
+        "values": values,
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+        "body": response.content.decode("utf-8", "replace"),
+    }
+
+
+def find_entry(key):
+    """First unused entry for exactly `key` recorded by the current test."""
+    cassette = _state["cassette"]
+    for index, entry in enumerate(cassette["tests"].get(_state["nodeid"], [])):
+        if entry["key"] == key and (_state["nodeid"], index) not in cassette["used"]:
+            cassette["used"].add((_state["nodeid"], index))
+            return entry
+    return None
+
+
+def replayed_response(entry, values, prepared_url):
+    body = entry["body"]
+    # Put this run's dynamic values where the recorded ones were echoed back
+    for old, new in zip(entry["values"], values):
+        if old != new:
+            body = body.replace(old, new)
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = entry.get("reason")
+    response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+    response._content = body.encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = prepared_url
+    response.elapsed = timedelta(0)
+    return response
+
+
+def replaying_request(method, url, kwargs):
+    key, values = request_key(method, url, kwargs)
+    entry = find_entry(key)
+    if entry is None:
+        _state["misses"].append((_state["nodeid"], key))
+        raise CassetteMiss(f"No recorded response for {key}")
+    return replayed_response(entry, values, url)
+
+
+# -----------------------------------------------------------------------------
+#  plugin hooks
+# -----------------------------------------------------------------------------
+def recording_request(self, method, url, *args, **kwargs):
+    start = time.perf_counter()
+    if _state["mode"] == "replay":
+        response = replaying_request(method, url, kwargs)
+    else:
+        response = _state["original"](self, method, url, *args, **kwargs)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    if _state["mode"] == "record":
+        key, values = request_key(method, url, kwargs)
+        _state["cassette"]["tests"].setdefault(_state["nodeid"], []).append(cassette_entry(key, values, response))
+    if _state["file"]:
+        record = request_record(method, url, kwargs)
+        record["status"] = response.status_code
+        record["elapsed_ms"] = elapsed_ms
+        _state["file"].write(json.dumps(record) + "\n")
+        _state["file"].flush()
+    return response
+
+
+def pytest_configure(config):
+    path = os.getenv(TRAFFIC_ENV)
+    cassette = os.getenv(CASSETTE_ENV)
+    mode = os.getenv(CASSETTE_MODE_ENV, "replay") if cassette else None
+    if mode and mode not in CASSETTE_MODES:
+        raise ValueError(f"{CASSETTE_MODE_ENV} must be one of {CASSETTE_MODES}, got {mode!r}")
+    if not (path or mode) or _state["original"]:
+        return
+
+    if path:
+        _state["file"] = open(path, "w", encoding="utf-8")
+    if mode:
+        tests, seeds = load_cassette(cassette)
+        _state["cassette"] = {"path": cassette, "tests": tests, "seeds": seeds, "used": set()}
+    _state["mode"] = mode
+    _state["original"] = requests.Session.request
+    requests.Session.request = recording_request
+
+
+def seed_test_data(seed):
+    random.seed(seed)
+    if Faker is not None:
+        Faker.seed(seed)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    _state["nodeid"] = item.nodeid
+    cassette = _state["cassette"]
+    if _state["mode"] == "record":
+        # A re-recorded test replaces its previous interactions; other tests keep theirs.
+        # A fresh seed keeps live data unique per recording; the replay reuses it.
+        cassette["tests"].pop(item.nodeid, None)
+        cassette["seeds"][item.nodeid] = int.from_bytes(os.urandom(4), "big")
+        seed_test_data(cassette["seeds"][item.nodeid])
+    elif _state["mode"] == "replay" and item.nodeid in cassette["seeds"]:
+        seed_test_data(cassette["seeds"][item.nodeid])
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    misses = [key for nodeid, key in _state["misses"] if nodeid == item.nodeid]
+    # A test that caught the CassetteMiss must still fail: its result rests on a response never recorded
+    if call.when == "call" and report.passed and misses:
+        report.outcome = "failed"
+        report.longrepr = "Requests not in the cassette:\n" + "\n".join(misses)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _state["misses"]:
+        terminalreporter.section("cassette misses")
+        for nodeid, key in _state["misses"]:
+            terminalreporter.write_line(f"{nodeid}: {key}")
+
+
+def pytest_unconfigure(config):
+    if _state["original"]:
+        requests.Session.request = _state["original"]
+        _state["original"] = None
+    if _state["file"]:
+        _state["file"].close()
+        _state["file"] = None
+    if _state["mode"] == "record":
+        save_cassette(_state["cassette"]["path"], _state["cassette"]["tests"], _state["cassette"]["seeds"])
+    _state["mode"] = None
+    _state["cassette"] = None
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import List
@@ -9,11 +9,23 @@ from dotenv import load_dotenv
 import os
 import uvicorn
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# FAST_JSON=1 returns list pages as orjson-encoded bytes. Stored records were
+# validated on the way in, so the response_model pass over them is skipped.
+FAST_JSON = os.getenv("FAST_JSON", "").lower() in ("1", "true", "yes")
+if FAST_JSON and orjson is None:
+    logger.warning("FAST_JSON is set but orjson is not installed; using the default JSON encoder")
+    FAST_JSON = False
+
 app = FastAPI()
 
 # Enable CORS
@@ -63,6 +75,53 @@ fraud_cases = [
     }
 ]
 
+class RecordStore:
+    """
+    Records keyed by their ID: O(1) lookup, unique IDs, and pages in insertion
+    order without copying the whole table.
+    """
+
+    def __init__(self, key, records=()):
+        self.key = key
+        self.records = {}
+        self.order = []
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, record_id):
+        return record_id in self.records
+
+    def get(self, record_id):
+        return self.records.get(record_id)
+
+    def add(self, record):
+        """Stores `record`; returns False (and stores nothing) if its ID is taken."""
+        record_id = record[self.key]
+        if record_id in self.records:
+            return False
+        self.records[record_id] = record
+        self.order.append(record_id)
+        return True
+
+    def page(self, skip=0, limit=None):
+        ids = self.order[skip:] if limit is None else self.order[skip:skip + limit]
+        return [self.records[record_id] for record_id in ids]
+
+
+def json_page(records):
+    if not FAST_JSON:
+        return records
+    return Response(orjson.dumps(records), media_type="application/json")
+
+
+transactions = RecordStore("transaction_id", transactions)
+fraud_cases = RecordStore("fraud_id", fraud_cases)
+
+MAX_PAGE_SIZE = 1000
+
 # Models
 class Transaction(BaseModel):
     transaction_id: str = Field(..., min_length=1, description="Unique transaction ID")
@@ -85,11 +144,27 @@ class FraudDetection(BaseModel):
     risk_score: float = Field(..., ge=0, le=1, description="Risk score (0 to 1)")
     reason: str = Field(..., description="Reason for flagging the transaction")
 
+class BulkCreateResult(BaseModel):
+    message: str
+    inserted: int
+    failed: int
+    duplicates: List[str] = Field(default_factory=list, description="IDs that already existed and were skipped")
+
+
+def bulk_add(store, records):
+    """Adds every record whose ID is new; IDs already stored (or repeated in the batch) are skipped."""
+    duplicates = [record[store.key] for record in records if not store.add(record)]
+    return len(records) - len(duplicates), duplicates
+
+
 # Endpoints
 @app.get("/transactions/", response_model=List[Transaction], summary="Get all transactions")
-def get_all_transactions():
-    logger.info("Fetching all transactions")
-    return transactions
+def get_all_transactions(
+    skip: int = Query(0, ge=0, description="Number of transactions to skip"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of transactions to return"),
+):
+    logger.info(f"Fetching transactions {skip}..{skip + limit} of {len(transactions)}")
+    return json_page(transactions.page(skip, limit))
 
 @app.get(
     "/transactions/{transaction_id}",
@@ -99,7 +174,7 @@ def get_all_transactions():
 )
 def get_transaction(transaction_id: str):
     logger.info(f"Fetching transaction with ID: {transaction_id}")
-    transaction = next((t for t in transactions if t["transaction_id"] == transaction_id), None)
+    transaction = transactions.get(transaction_id)
     if not transaction:
         logger.error(f"Transaction with ID {transaction_id} not found")
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -114,13 +189,30 @@ def get_transaction(transaction_id: str):
 )
 def create_transaction(transaction: Transaction):
     logger.info("Creating a new transaction")
-    transactions.append(transaction.dict())
+    if not transactions.add(transaction.model_dump()):
+        logger.error(f"Transaction with ID {transaction.transaction_id} already exists")
+        raise HTTPException(status_code=400, detail="Transaction ID already exists")
     return transaction
 
+@app.post(
+    "/transactions/bulk",
+    response_model=BulkCreateResult,
+    summary="Create many transactions",
+    description="Create transactions in one request. Transactions whose ID already exists are skipped and listed in `duplicates`.",
+)
+def create_transactions_bulk(new_transactions: List[Transaction]):
+    logger.info(f"Creating {len(new_transactions)} transactions")
+    inserted, duplicates = bulk_add(transactions, [t.model_dump() for t in new_transactions])
+    return BulkCreateResult(message=f"{inserted} transactions added successfully", inserted=inserted,
+                            failed=len(duplicates), duplicates=duplicates)
+
 @app.get("/fraud/", response_model=List[FraudDetection], summary="Get all fraud cases")
-def get_all_fraud_cases():
-    logger.info("Fetching all fraud cases")
-    return fraud_cases
+def get_all_fraud_cases(
+    skip: int = Query(0, ge=0, description="Number of fraud cases to skip"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of fraud cases to return"),
+):
+    logger.info(f"Fetching fraud cases {skip}..{skip + limit} of {len(fraud_cases)}")
+    return json_page(fraud_cases.page(skip, limit))
 
 @app.get(
     "/fraud/{fraud_id}",
@@ -130,7 +222,7 @@ def get_all_fraud_cases():
 )
 def get_fraud_case(fraud_id: str):
     logger.info(f"Fetching fraud case with ID: {fraud_id}")
-    fraud_case = next((f for f in fraud_cases if f["fraud_id"] == fraud_id), None)
+    fraud_case = fraud_cases.get(fraud_id)
     if not fraud_case:
         logger.error(f"Fraud case with ID {fraud_id} not found")
         raise HTTPException(status_code=404, detail="Fraud case not found")
@@ -145,9 +237,23 @@ def get_fraud_case(fraud_id: str):
 )
 def create_fraud_case(fraud: FraudDetection):
     logger.info("Creating a new fraud case")
-    fraud_cases.append(fraud.dict())
+    if not fraud_cases.add(fraud.model_dump()):
+        logger.error(f"Fraud case with ID {fraud.fraud_id} already exists")
+        raise HTTPException(status_code=400, detail="Fraud ID already exists")
     return fraud
 
+@app.post(
+    "/fraud/bulk",
+    response_model=BulkCreateResult,
+    summary="Create many fraud cases",
+    description="Create fraud cases in one request. Cases whose ID already exists are skipped and listed in `duplicates`.",
+)
+def create_fraud_cases_bulk(new_cases: List[FraudDetection]):
+    logger.info(f"Creating {len(new_cases)} fraud cases")
+    inserted, duplicates = bulk_add(fraud_cases, [f.model_dump() for f in new_cases])
+    return BulkCreateResult(message=f"{inserted} fraud cases added successfully", inserted=inserted,
+                            failed=len(duplicates), duplicates=duplicates)
+
 # Root endpoint
 @app.get("/", summary="Root endpoint")
 def read_root():
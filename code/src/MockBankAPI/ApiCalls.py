@@ -1,29 +1,69 @@
 import random
-from fastapi import FastAPI, HTTPException
-from models.models import Transaction, FraudDetection, RegulatoryCompliance, LoanRequest, ChatbotQuery, ChatbotResponse
+import asyncio
+import io
+import csv
+import json
+import uuid
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter, ValidationError
+from models.models import Transaction, FraudDetection, RegulatoryCompliance, LoanRequest, ChatbotQuery, ChatbotResponse, FaultProfile
 import pandas as pd
 import numpy as np
 import os
+from storage import ExcelStore, SqliteStore, DuplicateKeyError
+from faults import FaultInjector
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = FastAPI()
 
-TRANSACTIONS_FILE = "db\\transactions.xlsx"
-FRAUD_DETECTION_FILE = "db\\fraudDetectionData.xlsx"
-REGULATORY_COMPLIANCE_FILE = "db\\regulatoryCompliance.xlsx"
-LOAN_RISK_EXCEL_FILE = "db\\loan_risk.xlsx"
-CHATBOT_INTERACTIONS_FILE = "db\\chatbotInteractions.xlsx"
+TRANSACTIONS_FILE = os.path.join("db", "transactions.xlsx")
+FRAUD_DETECTION_FILE = os.path.join("db", "fraudDetectionData.xlsx")
+REGULATORY_COMPLIANCE_FILE = os.path.join("db", "regulatoryCompliance.xlsx")
+LOAN_RISK_EXCEL_FILE = os.path.join("db", "loan_risk.xlsx")
+CHATBOT_INTERACTIONS_FILE = os.path.join("db", "chatbotInteractions.xlsx")
 SHEET_NAME = "Loan Risk"
+TEST_RUNS_FILE = os.path.join("db", "test_runs.json")
+TEST_RUN_HEADER = "X-Test-Run-Id"
+SNAPSHOT_DIR = os.path.join("db", "snapshots")
+
+# "excel" keeps the tables in db/*.xlsx (single worker); "sqlite" keeps them in one
+# WAL-mode database that `uvicorn --workers N` processes can share.
+STORAGE = os.getenv("MOCKBANK_STORAGE", "excel")
+SQLITE_FILE = os.getenv("MOCKBANK_DB", os.path.join("db", "mockbank.sqlite"))
+# Fault profiles live in memory unless a file is named here (e.g. db/faults.json). With
+# a file, every `--workers` process shares them, and they survive restarts until cleared.
+FAULTS_FILE = os.getenv("MOCKBANK_FAULTS_FILE") or None
+
+# FAST_JSON=1 serializes the list endpoints' rows straight to bytes with orjson
+# instead of walking them through FastAPI's jsonable_encoder (needs orjson).
+FAST_JSON = os.getenv("FAST_JSON", "").lower() in ("1", "true", "yes")
+if FAST_JSON and orjson is None:
+    print("FAST_JSON is set but orjson is not installed; using the default JSON encoder")
+    FAST_JSON = False
+
+TRANSACTION_COLUMNS = [
+    "Transaction ID", "Transaction Type", "Source Account", "Source Currency",
+    "Destination Account", "Destination Currency", "Amount", "Expected Result", "Notes"
+]
+FRAUD_COLUMNS = ["Scenario ID", "User", "Location", "Transaction Type", "Amount", "Fraud Score",
+                 "Initial Fraud Pattern", "GenAI Evolved Fraud Pattern", "Expected Alert Trigger"]
+CHATBOT_COLUMNS = [
+    "Query ID", "User Query", "Context (Account Info/Alert)", "Chatbot Response",
+    "Compliance Flags", "Result (Pass/Fail)"
+]
 
 if not os.path.exists(TRANSACTIONS_FILE):
-    transactions_df = pd.DataFrame(columns=[
-        "Transaction ID", "Transaction Type", "Source Account", "Source Currency",
-        "Destination Account", "Destination Currency", "Amount", "Expected Result", "Notes"
-    ])
+    transactions_df = pd.DataFrame(columns=TRANSACTION_COLUMNS)
     transactions_df.to_excel(TRANSACTIONS_FILE, index=False, engine="openpyxl")
 
 if not os.path.exists(FRAUD_DETECTION_FILE):
-    fraud_df = pd.DataFrame(columns=["Scenario ID", "User", "Location", "Transaction Type", "Amount", "Fraud Score",
-                                     "Initial Fraud Pattern", "GenAI Evolved Fraud Pattern", "Expected Alert Trigger"])
+    fraud_df = pd.DataFrame(columns=FRAUD_COLUMNS)
     fraud_df.to_excel(FRAUD_DETECTION_FILE, index=False, engine="openpyxl")
 
 if not os.path.exists(REGULATORY_COMPLIANCE_FILE):
@@ -38,25 +78,53 @@ if not os.path.exists(LOAN_RISK_EXCEL_FILE):
         "Loan ID", "Customer ID", "Loan Amount (USD)", "Credit Score",
         "Employment Status", "Debt-to-Income Ratio", "Approval Status", "Expected Result"
     ])
-    df.to_excel(LOAN_RISK_EXCEL_FILE, index=False, sheet_name=LOAN_RISK_EXCEL_FILE, engine="openpyxl")
+    df.to_excel(LOAN_RISK_EXCEL_FILE, index=False, sheet_name=SHEET_NAME, engine="openpyxl")
     
 if not os.path.exists(CHATBOT_INTERACTIONS_FILE):
-    chatbot_interactions_df = pd.DataFrame(columns=[
-        "Query ID", "User Query", "Context (Account Info/Alert)", "Chatbot Response",
-        "Compliance Flags", "Result (Pass/Fail)"
-    ])
+    chatbot_interactions_df = pd.DataFrame(columns=CHATBOT_COLUMNS)
     chatbot_interactions_df.to_excel(CHATBOT_INTERACTIONS_FILE, index=False, engine="openpyxl")
 
+# Hash/sorted indexes (or SQL indexes) on the columns the list endpoints filter by
+TABLES = {
+    "transactions": dict(file_path=TRANSACTIONS_FILE, columns=TRANSACTION_COLUMNS, key="Transaction ID",
+                         unique=True, hash_columns=["Source Account", "Transaction Type"],
+                         range_columns=["Amount"]),
+    "fraud_cases": dict(file_path=FRAUD_DETECTION_FILE, columns=FRAUD_COLUMNS, key="Scenario ID",
+                        hash_columns=["User", "Location", "Transaction Type", "Expected Alert Trigger"],
+                        range_columns=["Fraud Score", "Amount"]),
+    "chatbot_interactions": dict(file_path=CHATBOT_INTERACTIONS_FILE, columns=CHATBOT_COLUMNS, key="Query ID",
+                                 hash_columns=["Result (Pass/Fail)", "Compliance Flags"]),
+}
+
+if STORAGE == "sqlite":
+    STORE = SqliteStore(SQLITE_FILE, TABLES, SNAPSHOT_DIR)
+else:
+    STORE = ExcelStore(TABLES, TEST_RUNS_FILE, SNAPSHOT_DIR,
+                       extra_files=[REGULATORY_COMPLIANCE_FILE, LOAN_RISK_EXCEL_FILE])
+TRANSACTIONS_TABLE = STORE.table("transactions")
+FRAUD_TABLE = STORE.table("fraud_cases")
+CHATBOT_TABLE = STORE.table("chatbot_interactions")
+
 def clean_column_names(df):
     df.columns = df.columns.str.strip()
     return df
 
-def read_excel(file_path):
-    df = pd.read_excel(file_path, engine="openpyxl")
-    return df.replace({np.nan: None})
+def json_rows(rows):
+    """List endpoint result: the rows as is, or already encoded in fast JSON mode."""
+    if not FAST_JSON:
+        return rows
+    return Response(orjson.dumps(rows, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+                    media_type="application/json")
 
-def write_excel(file_path, df):
-    df.to_excel(file_path, index=False, engine="openpyxl")
+def tag_test_run(request: Request, table, *row_ids):
+    """
+    Remembers which test run (X-Test-Run-Id header) created rows so that
+    /admin/test-runs/{run_id} can purge them later.
+    """
+    run_id = request.headers.get(TEST_RUN_HEADER)
+    if not run_id or not row_ids:
+        return
+    STORE.tag_run(run_id, table.name, row_ids)
     
 def generate_chatbot_response(query: ChatbotQuery) -> ChatbotResponse:
     if "balance" in query.user_query.lower():
@@ -85,64 +153,149 @@ def generate_chatbot_response(query: ChatbotQuery) -> ChatbotResponse:
 # ─── TRANSACTION ENDPOINTS ───────────────────────────────────────────
 
 @app.get("/transactions/", tags=["Transactions"])
-async def get_all_transactions():
-    df = read_excel(TRANSACTIONS_FILE)
-    return df.to_dict(orient="records")
+async def get_all_transactions(
+    source_account: Optional[str] = Query(None, description="Only transactions from this source account"),
+    transaction_type: Optional[str] = Query(None, description="Only transactions of this type"),
+    min_amount: Optional[float] = Query(None, description="Lowest amount to include"),
+    max_amount: Optional[float] = Query(None, description="Highest amount to include"),
+):
+    """
+    List transactions, optionally filtered; filters are answered from the indexes.
+    """
+    return json_rows(TRANSACTIONS_TABLE.query(
+        equals={"Source Account": source_account, "Transaction Type": transaction_type},
+        ranges={"Amount": (min_amount, max_amount)},
+    ))
 
 
 @app.get("/transactions/{transaction_id}", tags=["Transactions"])
 async def get_transaction(transaction_id: str):
-    df = read_excel(TRANSACTIONS_FILE)
-    transaction = df[df["Transaction ID"] == transaction_id]
+    transaction = TRANSACTIONS_TABLE.get(transaction_id)
 
-    if transaction.empty:
+    if transaction is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    return transaction.to_dict(orient="records")[0]
+    return transaction
 
 
 @app.post("/transactions/", tags=["Transactions"])
-async def create_transaction(transaction: Transaction):
-    df = read_excel(TRANSACTIONS_FILE)
-
-    if transaction.transaction_id in df["Transaction ID"].astype(str).values:
+async def create_transaction(transaction: Transaction, request: Request):
+    new_transaction = dict(zip(TRANSACTION_COLUMNS, [
+        transaction.transaction_id, transaction.transaction_type,
+        transaction.source_account, transaction.source_currency,
+        transaction.destination_account, transaction.destination_currency,
+        transaction.amount, transaction.expected_result, transaction.notes]))
+
+    try:
+        TRANSACTIONS_TABLE.insert([new_transaction])
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Transaction ID already exists")
+    tag_test_run(request, TRANSACTIONS_TABLE, transaction.transaction_id)
 
-    new_transaction = pd.DataFrame([[transaction.transaction_id, transaction.transaction_type,
-                                    transaction.source_account, transaction.source_currency,
-                                    transaction.destination_account, transaction.destination_currency,
-                                    transaction.amount, transaction.expected_result, transaction.notes]],
-                                   columns=df.columns)
-    df = pd.concat([df, new_transaction], ignore_index=True)
+    return {"message": "Transaction added successfully", "transaction": transaction}
 
-    write_excel(TRANSACTIONS_FILE, df)
 
-    return {"message": "Transaction added successfully", "transaction": transaction}
+TRANSACTION_LIST = TypeAdapter(List[Transaction])
+BULK_BODY_SCHEMA = {"type": "array", "items": {"$ref": "#/components/schemas/Transaction"}}
+
+
+def parse_bulk_rows(content: bytes, content_type: str, filename: str = ""):
+    """
+    Rows from a JSON array, NDJSON or CSV body. CSV headers may be the field names
+    (transaction_id) or the sheet's column names (Transaction ID).
+    """
+    text = content.decode("utf-8-sig")
+    if "csv" in content_type or filename.lower().endswith(".csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        # Empty cells are left out so optional fields take their defaults
+        return [{key.strip().lower().replace(" ", "_"): value for key, value in row.items() if key and value != ""}
+                for row in reader]
+    if "ndjson" in content_type or "jsonl" in content_type or filename.lower().endswith((".ndjson", ".jsonl")):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    rows = json.loads(text)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of transactions")
+    return rows
+
+
+@app.post("/transactions/bulk", tags=["Transactions"], openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": BULK_BODY_SCHEMA},
+    "application/x-ndjson": {"schema": {"type": "string"}},
+    "text/csv": {"schema": {"type": "string"}},
+}}})
+async def create_transactions_bulk(request: Request):
+    """
+    Add many transactions in one write. Accepts a JSON array, NDJSON or CSV, as
+    the request body or as a multipart `file` upload. Rows that fail validation
+    or reuse an existing Transaction ID are skipped and listed in `errors`.
+    """
+    content_type = request.headers.get("content-type", "")
+    filename = ""
+    try:
+        if content_type.startswith("multipart/form-data"):
+            upload = (await request.form()).get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=400, detail="Expected a file upload named 'file'")
+            filename, content_type = upload.filename or "", upload.content_type or ""
+            content = await upload.read()
+        else:
+            content = await request.body()
+        rows = parse_bulk_rows(content, content_type, filename)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse transactions: {e}")
+
+    # Validate every row in one pass and collect the errors per row
+    errors = {}
+    try:
+        transactions = TRANSACTION_LIST.validate_python(rows)
+    except ValidationError as e:
+        for error in e.errors():
+            index = error["loc"][0] if error["loc"] else 0
+            field = ".".join(str(part) for part in error["loc"][1:])
+            errors.setdefault(index, []).append(f"{field}: {error['msg']}" if field else error["msg"])
+        transactions = TRANSACTION_LIST.validate_python([row for i, row in enumerate(rows) if i not in errors])
+    indices = [i for i in range(len(rows)) if i not in errors]
+
+    existing = TRANSACTIONS_TABLE.existing(t.transaction_id for t in transactions)
+    accepted = []
+    for index, transaction in zip(indices, transactions):
+        if transaction.transaction_id in existing:
+            errors.setdefault(index, []).append("transaction_id: Transaction ID already exists")
+            continue
+        existing.add(transaction.transaction_id)
+        accepted.append(transaction)
+
+    if accepted:
+        try:
+            TRANSACTIONS_TABLE.insert([dict(zip(TRANSACTION_COLUMNS, t.model_dump().values())) for t in accepted])
+        except DuplicateKeyError as e:
+            # Another worker inserted some of these IDs in the meantime; nothing was written
+            raise HTTPException(status_code=409, detail=f"Transaction IDs created concurrently: {e}")
+        tag_test_run(request, TRANSACTIONS_TABLE, *(t.transaction_id for t in accepted))
+
+    return {
+        "message": f"{len(accepted)} transactions added successfully",
+        "inserted": len(accepted),
+        "failed": len(errors),
+        "errors": [{"row": index, "transaction_id": rows[index].get("transaction_id") if isinstance(rows[index], dict) else None,
+                    "errors": messages} for index, messages in sorted(errors.items())],
+    }
 
 
 @app.put("/transactions/{transaction_id}", tags=["Transactions"])
 async def update_transaction(transaction_id: str, updated_transaction: Transaction):
-    df = read_excel(TRANSACTIONS_FILE)
-
-    if transaction_id not in df["Transaction ID"].astype(str).values:
+    if not TRANSACTIONS_TABLE.update(transaction_id,
+                                     dict(zip(TRANSACTION_COLUMNS, updated_transaction.dict().values()))):
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    df.loc[df["Transaction ID"] == transaction_id] = updated_transaction.dict().values()
-    write_excel(TRANSACTIONS_FILE, df)
-
     return {"message": "Transaction updated successfully", "transaction": updated_transaction}
 
 
 @app.delete("/transactions/{transaction_id}", tags=["Transactions"])
 async def delete_transaction(transaction_id: str):
-    df = read_excel(TRANSACTIONS_FILE)
-
-    if transaction_id not in df["Transaction ID"].astype(str).values:
+    if not TRANSACTIONS_TABLE.delete([transaction_id]):
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    df = df[df["Transaction ID"] != transaction_id]
-    write_excel(TRANSACTIONS_FILE, df)
-
     return {"message": "Transaction deleted successfully"}
 
 
@@ -196,13 +349,11 @@ def assign_alert(score):
 
 
 @app.post("/fraud-score/", tags=["Fraud Detection"])
-async def score_fraud(fraud: FraudDetection):
-    df = read_excel(FRAUD_DETECTION_FILE)
-
+async def score_fraud(fraud: FraudDetection, request: Request):
     fraud_score = calculate_fraud_score(fraud)
     alert = assign_alert(fraud_score)
 
-    new_fraud_case = pd.DataFrame([{
+    new_fraud_case = {
         "Scenario ID": fraud.fraud_id,
         "User": fraud.user,
         "Location": fraud.location,
@@ -210,10 +361,10 @@ async def score_fraud(fraud: FraudDetection):
         "Amount": fraud.amount,
         "Fraud Score": fraud_score,
         "Expected Alert Trigger": alert
-    }], columns=df.columns)
+    }
 
-    df = pd.concat([df, new_fraud_case], ignore_index=True)
-    write_excel(FRAUD_DETECTION_FILE, df)
+    FRAUD_TABLE.insert([new_fraud_case])
+    tag_test_run(request, FRAUD_TABLE, fraud.fraud_id)
 
     return {
         "message": "Fraud case scored successfully",
@@ -223,6 +374,27 @@ async def score_fraud(fraud: FraudDetection):
     }
 
 
+@app.get("/fraud-score/", tags=["Fraud Detection"])
+async def get_fraud_cases(
+    user: Optional[str] = Query(None, description="Only cases for this user"),
+    location: Optional[str] = Query(None, description="Only cases from this location"),
+    transaction_type: Optional[str] = Query(None, description="Only cases with this transaction type"),
+    alert: Optional[str] = Query(None, description="Only cases that raised this alert"),
+    min_score: Optional[int] = Query(None, description="Lowest fraud score to include"),
+    max_score: Optional[int] = Query(None, description="Highest fraud score to include"),
+    min_amount: Optional[float] = Query(None, description="Lowest amount to include"),
+    max_amount: Optional[float] = Query(None, description="Highest amount to include"),
+):
+    """
+    List scored fraud cases, optionally filtered; filters are answered from the indexes.
+    """
+    return json_rows(FRAUD_TABLE.query(
+        equals={"User": user, "Location": location, "Transaction Type": transaction_type,
+                "Expected Alert Trigger": alert},
+        ranges={"Fraud Score": (min_score, max_score), "Amount": (min_amount, max_amount)},
+    ))
+
+
 # # ─── REGULATORY COMPLIANCE ENDPOINTS ──────────────────────────────────
 
 # @app.get("/regulatory-compliance/", tags=["Regulatory Compliance"])
@@ -359,36 +531,37 @@ async def score_fraud(fraud: FraudDetection):
 # ─── AI CHATBOT ENDPOINTS ─────────────────────────────────────────────
 
 @app.post("/chatbot/query/", tags=["AI Chatbot"])
-async def handle_chatbot_query(query: ChatbotQuery):
+async def handle_chatbot_query(query: ChatbotQuery, request: Request):
     """
     Handle user queries and return chatbot responses.
     Log the interaction for compliance and testing purposes.
     """
-    df = read_excel(CHATBOT_INTERACTIONS_FILE)
-
     response = generate_chatbot_response(query)
 
-    new_interaction = pd.DataFrame([{
+    new_interaction = {
         "Query ID": query.query_id,
         "User Query": query.user_query,
         "Context (Account Info/Alert)": query.context,
         "Chatbot Response": response.response_content,
         "Compliance Flags": response.compliance_flags,
         "Result (Pass/Fail)": response.result
-    }])
-    df = pd.concat([df, new_interaction], ignore_index=True)
-    write_excel(CHATBOT_INTERACTIONS_FILE, df)
+    }
+    CHATBOT_TABLE.insert([new_interaction])
+    tag_test_run(request, CHATBOT_TABLE, query.query_id)
 
     return {"response": response}
 
 
 @app.get("/chatbot/interactions/", tags=["AI Chatbot"])
-async def get_all_chatbot_interactions():
+async def get_all_chatbot_interactions(
+    result: Optional[str] = Query(None, description="Only interactions with this result [Pass, Fail]"),
+    compliance_flags: Optional[str] = Query(None, description="Only interactions with these compliance flags"),
+):
     """
-    Retrieve all chatbot interactions for testing and compliance review.
+    Retrieve all chatbot interactions for testing and compliance review,
+    optionally filtered by result or compliance flags.
     """
-    df = read_excel(CHATBOT_INTERACTIONS_FILE)
-    return df.to_dict(orient="records")
+    return json_rows(CHATBOT_TABLE.query(equals={"Result (Pass/Fail)": result, "Compliance Flags": compliance_flags}))
 
 
 @app.get("/chatbot/interactions/{query_id}", tags=["AI Chatbot"])
@@ -396,10 +569,116 @@ async def get_chatbot_interaction(query_id: str):
     """
     Retrieve a specific chatbot interaction by Query ID.
     """
-    df = read_excel(CHATBOT_INTERACTIONS_FILE)
-    interaction = df[df["Query ID"] == query_id]
+    interaction = CHATBOT_TABLE.get(query_id)
 
-    if interaction.empty:
+    if interaction is None:
         raise HTTPException(status_code=404, detail="Chatbot interaction not found")
 
-    return interaction.to_dict(orient="records")[0]
\ No newline at end of file
+    return interaction
+
+
+# ─── FAULT INJECTION ──────────────────────────────────────────────────
+# Latency, errors, timeouts and truncated bodies per route, set through /admin/faults.
+
+FAULTS = FaultInjector(FAULTS_FILE)
+FAULT_EXEMPT_PREFIXES = ("/admin/", "/docs", "/redoc", "/openapi.json")
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    plan = None
+    if not request.url.path.startswith(FAULT_EXEMPT_PREFIXES):
+        plan = FAULTS.plan(request.method, request.url.path)
+    if plan is None:
+        return await call_next(request)
+
+    if plan["delay"]:
+        await asyncio.sleep(plan["delay"])
+    kind, value = plan["fault"] or (None, None)
+    if kind == "error":
+        return JSONResponse({"detail": "Injected fault"}, status_code=value, headers={"X-Injected-Fault": kind})
+    if kind == "timeout":
+        await asyncio.sleep(value)
+        return JSONResponse({"detail": "Injected timeout"}, status_code=504, headers={"X-Injected-Fault": kind})
+
+    response = await call_next(request)
+    if kind == "partial":
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        headers["X-Injected-Fault"] = kind
+        return Response(content=body[:len(body) // 2], status_code=response.status_code, headers=headers)
+    return response
+
+
+# ─── ADMIN ENDPOINTS ──────────────────────────────────────────────────
+# Hidden from the OpenAPI schema so generated suites do not test them.
+
+@app.delete("/admin/test-runs/{run_id}", include_in_schema=False)
+async def purge_test_run(run_id: str):
+    """
+    Delete every row created by requests tagged with this test run ID.
+    """
+    tables = STORE.pop_run(run_id)
+    if tables is None:
+        raise HTTPException(status_code=404, detail="Test run not found")
+
+    removed = {}
+    for table_name, row_ids in tables.items():
+        if table_name in STORE.tables:
+            removed[table_name] = STORE.table(table_name).delete(set(row_ids))
+
+    return {"message": "Test run purged successfully", "run_id": run_id, "removed": removed}
+
+
+@app.post("/admin/snapshot", include_in_schema=False)
+async def create_snapshot():
+    """
+    Capture every table: hardlinked workbooks with Excel storage (milliseconds at
+    any size), an online backup of the database with SQLite storage.
+    """
+    snapshot_id = uuid.uuid4().hex[:12]
+    STORE.snapshot(snapshot_id)
+
+    return {"message": "Snapshot created successfully", "snapshot_id": snapshot_id}
+
+
+@app.post("/admin/restore/{snapshot_id}", include_in_schema=False)
+async def restore_snapshot(snapshot_id: str):
+    """
+    Put every table back to its state at snapshot time. The snapshot stays intact
+    and can be restored again.
+    """
+    if not STORE.restore(snapshot_id):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+    return {"message": "Snapshot restored successfully", "snapshot_id": snapshot_id}
+
+
+@app.get("/admin/faults", include_in_schema=False)
+async def get_faults():
+    """
+    Current fault profiles, in matching order.
+    """
+    return [profile for profile, _ in FAULTS.profiles]
+
+
+@app.put("/admin/faults", include_in_schema=False)
+async def set_faults(profiles: List[FaultProfile]):
+    """
+    Replace the fault profiles. The first profile whose route matches a request
+    applies; every profile restarts its random sequence from its seed.
+    """
+    for profile in profiles:
+        if profile.latency not in ("none", "fixed", "normal", "long_tail"):
+            raise HTTPException(status_code=400, detail=f"Unknown latency distribution: {profile.latency}")
+    FAULTS.configure(profiles)
+    return {"message": "Fault profiles updated successfully", "profiles": len(profiles)}
+
+
+@app.delete("/admin/faults", include_in_schema=False)
+async def clear_faults():
+    """
+    Remove every fault profile.
+    """
+    FAULTS.configure([])
+    return {"message": "Fault profiles cleared successfully"}
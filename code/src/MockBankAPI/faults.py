@@ -0,0 +1,93 @@
+import os
+import json
+import math
+import random
+from fnmatch import fnmatch
+
+from models.models import FaultProfile
+
+
+class FaultInjector:
+    """
+    Per-route fault profiles (see models.FaultProfile) and their random streams.
+    Each profile draws from its own generator, so a seeded profile produces the
+    same latency/error sequence for the same sequence of matching requests.
+
+    Without a `path` the profiles only live in this process. With one, they are
+    saved there and every worker process reloads them when the file changes, so
+    one admin call configures all workers; saved profiles stay in effect across
+    restarts until they are cleared.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.profiles = []
+        self.loaded_mtime = None
+
+    def configure(self, profiles):
+        self.profiles = [(profile, random.Random(profile.seed)) for profile in profiles]
+        if self.path:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([profile.model_dump() for profile in profiles], f)
+            os.replace(tmp_path, self.path)
+            self.loaded_mtime = os.stat(self.path).st_mtime_ns
+
+    def reload(self):
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self.loaded_mtime:
+            return
+        self.loaded_mtime = mtime
+        profiles = []
+        if mtime is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                profiles = [FaultProfile(**profile) for profile in json.load(f)]
+        self.profiles = [(profile, random.Random(profile.seed)) for profile in profiles]
+
+    def matches(self, profile, method, path):
+        pattern = profile.route.strip()
+        if " " in pattern:
+            pattern_method, pattern = pattern.split(" ", 1)
+            if pattern_method.upper() != method.upper():
+                return False
+        return fnmatch(path, pattern.strip())
+
+    def delay(self, profile, rng):
+        """Latency in seconds drawn from the profile's distribution."""
+        if profile.latency == "fixed":
+            milliseconds = profile.latency_ms
+        elif profile.latency == "normal":
+            milliseconds = rng.gauss(profile.latency_ms, profile.jitter_ms)
+        elif profile.latency == "long_tail":
+            # Log-normal with `latency_ms` as the median: most requests near it, a few far slower
+            milliseconds = rng.lognormvariate(math.log(max(profile.latency_ms, 1e-3)), profile.tail_sigma)
+        else:
+            milliseconds = 0
+        return max(milliseconds, 0) / 1000
+
+    def plan(self, method, path):
+        """
+        Returns None when no profile matches, else {"delay", "fault"} where fault is
+        None, ("error", status), ("timeout", seconds) or ("partial", None).
+        """
+        self.reload()
+        for profile, rng in self.profiles:
+            if not self.matches(profile, method, path):
+                continue
+            delay = self.delay(profile, rng)
+            roll = rng.random()
+            if roll < profile.error_rate:
+                fault = ("error", profile.error_status)
+            elif roll < profile.error_rate + profile.timeout_rate:
+                fault = ("timeout", profile.timeout_ms / 1000)
+            elif roll < profile.error_rate + profile.timeout_rate + profile.partial_rate:
+                fault = ("partial", None)
+            else:
+                fault = None
+            return {"delay": delay, "fault": fault}
+        return None
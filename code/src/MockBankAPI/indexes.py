@@ -0,0 +1,131 @@
+import os
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right, insort
+
+
+class IndexedTable:
+    """
+    In-memory copy of one Excel table with hash indexes (equality filters) and
+    sorted indexes (range filters) on selected columns.
+
+    Endpoints write the file inside `with table.writing():` and report the change
+    through `append`, `update` and `remove`, which adjust the indexes in place.
+    A change made any other way (a snapshot restore, another process) is detected
+    from the file's stat signature and triggers a full rebuild on the next use.
+    """
+
+    def __init__(self, file_path, load, key, hash_columns=(), range_columns=()):
+        self.file_path = file_path
+        self.load = load
+        self.key = key
+        self.hash_columns = list(dict.fromkeys([key, *hash_columns]))
+        self.range_columns = list(range_columns)
+        self.signature = None
+        self.loaded = False
+
+    def file_signature(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def rebuild(self):
+        self.rows = {}
+        self.next_row = 0
+        self.hashes = {column: {} for column in self.hash_columns}
+        self.sorted = {column: [] for column in self.range_columns}
+        df = self.load(self.file_path)
+        self.append(df.to_dict(orient="records"))
+        self.loaded = True
+
+    def ensure_fresh(self):
+        signature = self.file_signature()
+        if not self.loaded or signature != self.signature:
+            self.rebuild()
+            self.signature = signature
+
+    # -------------------------------------------------------------------------
+    def _index(self, row_id, record):
+        for column in self.hash_columns:
+            self.hashes[column].setdefault(record.get(column), set()).add(row_id)
+        for column in self.range_columns:
+            value = record.get(column)
+            if isinstance(value, (int, float)):
+                insort(self.sorted[column], (value, row_id))
+
+    def _unindex(self, row_id, record):
+        for column in self.hash_columns:
+            ids = self.hashes[column].get(record.get(column))
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del self.hashes[column][record.get(column)]
+        for column in self.range_columns:
+            value = record.get(column)
+            if isinstance(value, (int, float)):
+                entries = self.sorted[column]
+                position = bisect_left(entries, (value, row_id))
+                if position < len(entries) and entries[position] == (value, row_id):
+                    del entries[position]
+
+    def _ids_with_key(self, key_value):
+        return sorted(self.hashes[self.key].get(key_value, set()))
+
+    # -------------------------------------------------------------------------
+    def append(self, records):
+        for record in records:
+            row_id = self.next_row
+            self.next_row += 1
+            self.rows[row_id] = record
+            self._index(row_id, record)
+
+    def update(self, key_value, record):
+        for row_id in self._ids_with_key(key_value):
+            self._unindex(row_id, self.rows[row_id])
+            self.rows[row_id] = dict(record)
+            self._index(row_id, self.rows[row_id])
+
+    def remove(self, key_values):
+        for key_value in key_values:
+            for row_id in self._ids_with_key(key_value):
+                self._unindex(row_id, self.rows.pop(row_id))
+
+    @contextmanager
+    def writing(self):
+        """
+        Wraps an endpoint's write: the indexes are brought up to date with the file
+        first, and afterwards the new file is recorded as matching them.
+        """
+        self.ensure_fresh()
+        try:
+            yield self
+        except BaseException:
+            self.loaded = False
+            raise
+        self.signature = self.file_signature()
+
+    # -------------------------------------------------------------------------
+    def query(self, equals=None, ranges=None):
+        """
+        Records matching every `equals` {column: value} and `ranges`
+        {column: (low, high)} filter (None values and bounds are ignored), in table order.
+        """
+        self.ensure_fresh()
+        candidates = None
+        for column, value in (equals or {}).items():
+            if value is None:
+                continue
+            ids = self.hashes[column].get(value, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+        for column, (low, high) in (ranges or {}).items():
+            if low is None and high is None:
+                continue
+            entries = self.sorted[column]
+            start = 0 if low is None else bisect_left(entries, (low, -1))
+            end = len(entries) if high is None else bisect_right(entries, (high, self.next_row))
+            ids = {row_id for _, row_id in entries[start:end]}
+            candidates = ids if candidates is None else candidates & ids
+        if candidates is None:
+            return list(self.rows.values())
+        return [self.rows[row_id] for row_id in sorted(candidates)]
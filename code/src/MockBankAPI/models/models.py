@@ -58,4 +58,19 @@ class ChatbotQuery(BaseModel):
 class ChatbotResponse(BaseModel):
     response_content: str
     compliance_flags: Optional[str] = None  
-    result: Optional[str] = None
\ No newline at end of file
+    result: Optional[str] = None
+
+
+# Fault Injection Model (admin)
+class FaultProfile(BaseModel):
+    route: str = Field("*", description="Route pattern such as 'POST /fraud-score/', '/transactions/*' or '*'")
+    latency: str = Field("none", description="[none, fixed, normal, long_tail]")
+    latency_ms: float = Field(0, ge=0, description="Fixed delay, mean (normal) or median (long_tail) in ms")
+    jitter_ms: float = Field(0, ge=0, description="Standard deviation of the normal distribution in ms")
+    tail_sigma: float = Field(1.0, ge=0, description="Log-normal shape of the long_tail distribution")
+    error_rate: float = Field(0, ge=0, le=1, description="Share of requests answered with error_status")
+    error_status: int = Field(503, ge=400, le=599)
+    timeout_rate: float = Field(0, ge=0, le=1, description="Share of requests held for timeout_ms, then answered 504")
+    timeout_ms: float = Field(30000, ge=0)
+    partial_rate: float = Field(0, ge=0, le=1, description="Share of responses truncated to half their body")
+    seed: Optional[int] = Field(None, description="Seed for reproducible fault sequences")
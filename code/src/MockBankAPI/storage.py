@@ -0,0 +1,367 @@
+"""
+Table storage for MockBankAPI.
+
+`ExcelStore` keeps each table in its db/*.xlsx workbook (the original format;
+one worker only). `SqliteStore` keeps every table in one SQLite database in WAL
+mode, which several uvicorn worker processes can share: reads run concurrently
+and each write is a short transaction. Both expose the same table operations,
+test-run registry and snapshots.
+"""
+import os
+import json
+import uuid
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from indexes import IndexedTable
+
+
+class DuplicateKeyError(Exception):
+    """Raised when inserting into a unique-key table a key that already exists."""
+
+
+def read_excel(file_path):
+    df = pd.read_excel(file_path, engine="openpyxl")
+    return df.replace({np.nan: None})
+
+def replace_file(file_path, write):
+    """
+    Writes through a temporary file and renames it over `file_path`, so readers never
+    see a partial file and snapshot hardlinks keep pointing at the old contents.
+    """
+    base, extension = os.path.splitext(file_path)
+    tmp_path = f"{base}.{uuid.uuid4().hex}.tmp{extension}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_excel(file_path, df):
+    replace_file(file_path, lambda path: df.to_excel(path, index=False, engine="openpyxl"))
+
+def link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def plain(value):
+    """numpy scalars and NaN as plain Python values."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+# ─── EXCEL ────────────────────────────────────────────────────────────
+
+class ExcelTable:
+    """One workbook, served from an IndexedTable and rewritten on every change."""
+
+    def __init__(self, name, file_path, columns, key, unique=False, hash_columns=(), range_columns=()):
+        self.name = name
+        self.file_path = file_path
+        self.key = key
+        self.unique = unique
+        self.index = IndexedTable(file_path, read_excel, key, hash_columns, range_columns)
+        self.columns = list(columns)
+        if os.path.exists(file_path):
+            # Keep the workbook's own columns (seed files may carry extra ones)
+            file_columns = list(pd.read_excel(file_path, engine="openpyxl", nrows=0).columns)
+            self.columns = file_columns + [column for column in columns if column not in file_columns]
+
+    def query(self, equals=None, ranges=None):
+        return self.index.query(equals, ranges)
+
+    def get(self, key_value):
+        rows = self.index.query({self.key: key_value})
+        return rows[0] if rows else None
+
+    def existing(self, key_values):
+        self.index.ensure_fresh()
+        keys = {str(key) for key in self.index.hashes[self.key]}
+        return {value for value in key_values if str(value) in keys}
+
+    def _write(self, change):
+        with self.index.writing():
+            change()
+            df = pd.DataFrame(list(self.index.rows.values()), columns=self.columns)
+            write_excel(self.file_path, df)
+
+    def insert(self, rows):
+        rows = [{column: plain(row.get(column)) for column in self.columns} for row in rows]
+        if self.unique:
+            duplicates = self.existing(row[self.key] for row in rows)
+            if duplicates:
+                raise DuplicateKeyError(sorted(duplicates))
+        self._write(lambda: self.index.append(rows))
+
+    def update(self, key_value, row):
+        if self.get(key_value) is None:
+            return False
+        self._write(lambda: self.index.update(key_value, {column: plain(row.get(column)) for column in self.columns}))
+        return True
+
+    def delete(self, key_values):
+        self.index.ensure_fresh()
+        targets = {str(value) for value in key_values}
+        matched = [key for key in self.index.hashes[self.key] if str(key) in targets]
+        count = sum(len(self.index.hashes[self.key][key]) for key in matched)
+        if count:
+            self._write(lambda: self.index.remove(matched))
+        return count
+
+
+class ExcelStore:
+    """Workbooks under db/, a JSON test-run registry and hardlink snapshots."""
+
+    def __init__(self, tables, test_runs_file, snapshot_dir, extra_files=()):
+        self.tables = {name: ExcelTable(name, **spec) for name, spec in tables.items()}
+        self.test_runs_file = test_runs_file
+        self.snapshot_dir = snapshot_dir
+        self.files = [table.file_path for table in self.tables.values()] + list(extra_files) + [test_runs_file]
+
+    def table(self, name):
+        return self.tables[name]
+
+    def read_test_runs(self):
+        if not os.path.exists(self.test_runs_file):
+            return {}
+        with open(self.test_runs_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_test_runs(self, runs):
+        def write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(runs, f)
+        replace_file(self.test_runs_file, write)
+
+    def tag_run(self, run_id, table_name, row_ids):
+        runs = self.read_test_runs()
+        runs.setdefault(run_id, {}).setdefault(table_name, []).extend(str(row_id) for row_id in row_ids)
+        self.write_test_runs(runs)
+
+    def pop_run(self, run_id):
+        """{table name: [row keys]} tagged with `run_id`, now forgotten; None if unknown."""
+        runs = self.read_test_runs()
+        tables = runs.pop(run_id, None)
+        if tables is not None:
+            self.write_test_runs(runs)
+        return tables
+
+    def snapshot(self, snapshot_id):
+        """
+        Writes replace files instead of modifying them, so hardlinking every table
+        is a copy-on-write snapshot taken in milliseconds at any size.
+        """
+        snapshot_path = os.path.join(self.snapshot_dir, snapshot_id)
+        os.makedirs(snapshot_path)
+        for file_path in self.files:
+            if os.path.exists(file_path):
+                link_or_copy(file_path, os.path.join(snapshot_path, os.path.basename(file_path)))
+
+    def restore(self, snapshot_id):
+        snapshot_path = os.path.join(self.snapshot_dir, os.path.basename(snapshot_id))
+        if not os.path.isdir(snapshot_path):
+            return False
+        for file_path in self.files:
+            saved = os.path.join(snapshot_path, os.path.basename(file_path))
+            if os.path.exists(saved):
+                replace_file(file_path, lambda path: link_or_copy(saved, path))
+            elif os.path.exists(file_path):
+                os.remove(file_path)
+        return True
+
+
+# ─── SQLITE ───────────────────────────────────────────────────────────
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SqliteTable:
+    """One SQL table with real indexes on the filter columns."""
+
+    def __init__(self, store, name, file_path, columns, key, unique=False, hash_columns=(), range_columns=()):
+        self.store = store
+        self.name = name
+        self.file_path = file_path
+        self.key = key
+        self.unique = unique
+        self.columns = list(columns)
+        self.hash_columns = list(hash_columns)
+        self.range_columns = list(range_columns)
+
+    def create(self, conn):
+        """Creates the table and its indexes and seeds it from the workbook, once."""
+        seed = None
+        if os.path.exists(self.file_path):
+            seed = read_excel(self.file_path)
+            self.columns += [column for column in seed.columns if column not in self.columns]
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.name,)).fetchone()
+        if exists:
+            self.columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote(self.name)})")]
+            return
+        definitions = ", ".join(quote(column) + (" UNIQUE" if self.unique and column == self.key else "")
+                                for column in self.columns)
+        conn.execute(f"CREATE TABLE {quote(self.name)} ({definitions})")
+        for column in dict.fromkeys([self.key, *self.hash_columns, *self.range_columns]):
+            conn.execute(f"CREATE INDEX {quote(f'{self.name}_{column}')} ON {quote(self.name)} ({quote(column)})")
+        if seed is not None and not seed.empty:
+            rows = seed.to_dict(orient="records")
+            if self.unique:
+                rows = list({str(row[self.key]): row for row in rows}.values())
+            self._insert(conn, rows)
+
+    def _insert(self, conn, rows):
+        placeholders = ", ".join("?" for _ in self.columns)
+        columns = ", ".join(quote(column) for column in self.columns)
+        conn.executemany(f"INSERT INTO {quote(self.name)} ({columns}) VALUES ({placeholders})",
+                         [[plain(row.get(column)) for column in self.columns] for row in rows])
+
+    def _select(self, where="", params=(), limit=None):
+        columns = ", ".join(quote(column) for column in self.columns)
+        sql = f"SELECT {columns} FROM {quote(self.name)} {where} ORDER BY rowid"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(zip(self.columns, row)) for row in self.store.conn().execute(sql, params)]
+
+    def query(self, equals=None, ranges=None):
+        clauses, params = [], []
+        for column, value in (equals or {}).items():
+            if value is not None:
+                clauses.append(f"{quote(column)} = ?")
+                params.append(value)
+        for column, (low, high) in (ranges or {}).items():
+            if low is not None:
+                clauses.append(f"{quote(column)} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{quote(column)} <= ?")
+                params.append(high)
+        return self._select("WHERE " + " AND ".join(clauses) if clauses else "", params)
+
+    def get(self, key_value):
+        rows = self._select(f"WHERE {quote(self.key)} = ?", (key_value,), limit=1)
+        return rows[0] if rows else None
+
+    def existing(self, key_values):
+        found = set()
+        values = [str(value) for value in key_values]
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            sql = (f"SELECT {quote(self.key)} FROM {quote(self.name)} "
+                   f"WHERE {quote(self.key)} IN ({', '.join('?' for _ in chunk)})")
+            found.update(str(row[0]) for row in self.store.conn().execute(sql, chunk))
+        return found
+
+    def insert(self, rows):
+        try:
+            with self.store.transaction() as conn:
+                self._insert(conn, rows)
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError(sorted(self.existing(row.get(self.key) for row in rows)))
+
+    def update(self, key_value, row):
+        assignments = ", ".join(f"{quote(column)} = ?" for column in self.columns)
+        with self.store.transaction() as conn:
+            cursor = conn.execute(f"UPDATE {quote(self.name)} SET {assignments} WHERE {quote(self.key)} = ?",
+                                  [plain(row.get(column)) for column in self.columns] + [key_value])
+        return cursor.rowcount > 0
+
+    def delete(self, key_values):
+        values = [str(value) for value in key_values]
+        count = 0
+        with self.store.transaction() as conn:
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                cursor = conn.execute(f"DELETE FROM {quote(self.name)} "
+                                      f"WHERE {quote(self.key)} IN ({', '.join('?' for _ in chunk)})", chunk)
+                count += cursor.rowcount
+        return count
+
+
+class SqliteStore:
+    """
+    Every table in one WAL-mode SQLite database shared by all worker processes.
+    Each process opens its own connection; writers serialize on BEGIN IMMEDIATE.
+    """
+
+    def __init__(self, db_file, tables, snapshot_dir):
+        self.db_file = db_file
+        self.snapshot_dir = snapshot_dir
+        self.tables = {name: SqliteTable(self, name, **spec) for name, spec in tables.items()}
+        self._local = threading.local()
+        with self.transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS test_runs (run_id TEXT, table_name TEXT, row_id TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS test_runs_run_id ON test_runs (run_id)")
+            for table in self.tables.values():
+                table.create(conn)
+
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def table(self, name):
+        return self.tables[name]
+
+    def tag_run(self, run_id, table_name, row_ids):
+        with self.transaction() as conn:
+            conn.executemany("INSERT INTO test_runs VALUES (?, ?, ?)",
+                             [(run_id, table_name, str(row_id)) for row_id in row_ids])
+
+    def pop_run(self, run_id):
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT table_name, row_id FROM test_runs WHERE run_id = ?", (run_id,)).fetchall()
+            conn.execute("DELETE FROM test_runs WHERE run_id = ?", (run_id,))
+        if not rows:
+            return None
+        tables = {}
+        for table_name, row_id in rows:
+            tables.setdefault(table_name, []).append(row_id)
+        return tables
+
+    def snapshot(self, snapshot_id):
+        """Online backup of the whole database (page copy, consistent while workers keep writing)."""
+        snapshot_path = os.path.join(self.snapshot_dir, snapshot_id)
+        os.makedirs(snapshot_path)
+        target = sqlite3.connect(os.path.join(snapshot_path, os.path.basename(self.db_file)))
+        try:
+            self.conn().backup(target)
+        finally:
+            target.close()
+
+    def restore(self, snapshot_id):
+        saved = os.path.join(self.snapshot_dir, os.path.basename(snapshot_id), os.path.basename(self.db_file))
+        if not os.path.exists(saved):
+            return False
+        source = sqlite3.connect(saved)
+        try:
+            source.backup(self.conn())
+        finally:
+            source.close()
+        return True